@@ -26,15 +26,15 @@ async def main():
     
     # 2. Accuracy por estrategia individual
     print("\n--- STRATEGY VOTES (cada estrategia individual) ---")
+    # Del ledger strategy_accuracy (una fila por estrategia), sin contar empates
     strats = await conn.fetch("""
         SELECT 
             strategy_name,
-            COUNT(*) as total,
-            SUM(CASE WHEN was_correct THEN 1 ELSE 0 END) as correct,
-            ROUND(100.0 * SUM(CASE WHEN was_correct THEN 1 ELSE 0 END) / COUNT(*), 1) as accuracy
-        FROM strategy_votes
-        WHERE actual_winner IS NOT NULL AND actual_winner != 'Tie'
-        GROUP BY strategy_name
+            total - ties as total,
+            correct - tie_correct as correct,
+            ROUND(100.0 * (correct - tie_correct) / (total - ties), 1) as accuracy
+        FROM strategy_accuracy
+        WHERE total > ties
         ORDER BY accuracy DESC
     """)
     
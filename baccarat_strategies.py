@@ -17,16 +17,19 @@ class BaccaratStrategies:
             return 0
         
         try:
-            df = await self.db.get_recent_rounds(limit)
-            if len(df) > 0:
-                for _, row in df.iterrows():
-                    self.history.append({
-                        'winner': row['winner'],
-                        'player_score': row.get('player_score') or 0,
-                        'banker_score': row.get('banker_score') or 0,
-                        'player_pair': row.get('player_pair', False),
-                        'banker_pair': row.get('banker_pair', False)
-                    })
+            rounds = await self.db.get_round_arrays(limit)
+            if len(rounds) > 0:
+                # Todo lo cargado (hasta max_history): add_round recortaría a 30
+                self.history.extend(
+                    {
+                        'winner': winner,
+                        'player_score': ps,
+                        'banker_score': bs,
+                        'player_pair': player_pair,
+                        'banker_pair': banker_pair
+                    }
+                    for winner, ps, bs, player_pair, banker_pair, _ in rounds.iter_rounds()
+                )
                 logger.info(f"📚 Cargadas {len(self.history)} rondas para estrategias")
                 return len(self.history)
         except Exception as e:
@@ -47,26 +50,28 @@ class BaccaratStrategies:
         while len(self.history) > 30:
             self.history.popleft()
     
+    @staticmethod
+    def _shoe_entry(game):
+        """Ronda de history_v2 de Evolution → formato interno del historial"""
+        return {
+            'winner': game.get('winner'),
+            'player_score': game.get('playerScore', 0),
+            'banker_score': game.get('bankerScore', 0),
+            'player_pair': game.get('playerPair', False),
+            'banker_pair': game.get('bankerPair', False)
+        }
+    
     def sync_from_shoe_history(self, history_v2):
         """Sincronizar historial completo desde Evolution Gaming encodedShoeState"""
         self.history.clear()
-        for game in history_v2:
-            winner = game.get('winner')
-            player_score = game.get('playerScore', 0)
-            banker_score = game.get('bankerScore', 0)
-            player_pair = game.get('playerPair', False)
-            banker_pair = game.get('bankerPair', False)
-            
-            self.history.append({
-                'winner': winner,
-                'player_score': player_score,
-                'banker_score': banker_score,
-                'player_pair': player_pair,
-                'banker_pair': banker_pair
-            })
+        self.history.extend(self._shoe_entry(game) for game in history_v2)
         
         logger.info(f"✅ Sincronizado {len(self.history)} rondas desde Evolution Gaming")
     
+    def extend_from_shoe_history(self, new_rounds):
+        """Agregar solo las rondas nuevas de history_v2 (sync incremental)"""
+        self.history.extend(self._shoe_entry(game) for game in new_rounds)
+    
     def get_big_road(self, limit=20):
         """Generar Big Road (camino principal)"""
         if not self.history:
@@ -6,6 +6,13 @@ import os
 import logging
 from datetime import datetime
 from playwright.async_api import async_playwright
+from src.config import config
+from src.frame_dedupe import FrameDeduper
+from src.game_round import RoundAssembler
+from src.ingest_queue import FrameQueue
+from src.pg_partitions import ensure_tables
+from src.queries import QueryCatalog, round_params
+from src.ws_messages import decode
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,33 +24,16 @@ class DragonBotDB:
     def __init__(self, dsn):
         self.dsn = dsn
         self.pool = None
+        self.queries = QueryCatalog()
     
     async def init(self):
-        self.pool = await asyncpg.create_pool(self.dsn, min_size=5, max_size=20)
+        self.pool = await asyncpg.create_pool(
+            self.dsn, min_size=5, max_size=20, **self.queries.pool_options()
+        )
         async with self.pool.acquire() as conn:
+            # baccarat_rounds (particiones mensuales) y round_ids, compartidas con dragon_bot_ml
+            await ensure_tables(conn)
             await conn.execute('''
-                CREATE TABLE IF NOT EXISTS baccarat_rounds (
-                    id SERIAL PRIMARY KEY,
-                    game_id VARCHAR(100) UNIQUE,
-                    game_number VARCHAR(50),
-                    timestamp TIMESTAMP DEFAULT NOW(),
-                    winner VARCHAR(20),
-                    player_score INT,
-                    banker_score INT,
-                    player_pair BOOLEAN,
-                    banker_pair BOOLEAN,
-                    is_natural BOOLEAN,
-                    player_cards JSONB,
-                    banker_cards JSONB,
-                    lightning_multipliers JSONB,
-                    winning_spots JSONB,
-                    with_lightning BOOLEAN,
-                    shoe_cards_out INT,
-                    total_winners INT,
-                    total_amount NUMERIC,
-                    captured_at TIMESTAMP DEFAULT NOW()
-                );
-                
                 CREATE TABLE IF NOT EXISTS shoe_statistics (
                     id SERIAL PRIMARY KEY,
                     shoe_id VARCHAR(100),
@@ -67,9 +57,11 @@ class DragonBotDB:
                     big_eye_boy JSONB,
                     small_road JSONB,
                     cockroach_road JSONB,
-                    FOREIGN KEY (game_id) REFERENCES baccarat_rounds(game_id)
+                    FOREIGN KEY (game_id) REFERENCES round_ids(game_id)
                 );
                 
+                ALTER TABLE baccarat_rounds ADD COLUMN IF NOT EXISTS table_id VARCHAR(100);
+
                 CREATE INDEX IF NOT EXISTS idx_game_id ON baccarat_rounds(game_id);
                 CREATE INDEX IF NOT EXISTS idx_timestamp ON baccarat_rounds(timestamp DESC);
                 CREATE INDEX IF NOT EXISTS idx_winner ON baccarat_rounds(winner);
@@ -80,32 +72,7 @@ class DragonBotDB:
     async def save_round(self, data):
         async with self.pool.acquire() as conn:
             try:
-                await conn.execute('''
-                    INSERT INTO baccarat_rounds 
-                    (game_id, game_number, winner, player_score, banker_score,
-                     player_pair, banker_pair, is_natural, player_cards, banker_cards,
-                     lightning_multipliers, winning_spots, with_lightning, 
-                     shoe_cards_out, total_winners, total_amount)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16)
-                    ON CONFLICT (game_id) DO NOTHING
-                ''',
-                    data['game_id'],
-                    data.get('game_number'),
-                    data.get('winner'),
-                    data.get('player_score'),
-                    data.get('banker_score'),
-                    data.get('player_pair'),
-                    data.get('banker_pair'),
-                    data.get('is_natural'),
-                    json.dumps(data.get('player_cards', [])),
-                    json.dumps(data.get('banker_cards', [])),
-                    json.dumps(data.get('lightning_multipliers', {})),
-                    json.dumps(data.get('winning_spots', [])),
-                    data.get('with_lightning'),
-                    data.get('shoe_cards_out'),
-                    data.get('total_winners'),
-                    data.get('total_amount')
-                )
+                await self.queries.execute(conn, 'insert_round', *round_params(data))
                 logger.info(f"✓ Saved round {data['game_id']}: {data.get('winner')} wins")
             except Exception as e:
                 logger.error(f"DB Error: {e}")
@@ -114,20 +81,8 @@ class DragonBotDB:
         """Guardar estadísticas del zapato (contadores P/B/T)"""
         async with self.pool.acquire() as conn:
             try:
-                await conn.execute('''
-                    INSERT INTO shoe_statistics 
-                    (shoe_id, game_count, player_wins, banker_wins, ties, 
-                     player_pairs, banker_pairs, history_data)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                    ON CONFLICT (shoe_id, timestamp) DO UPDATE
-                    SET game_count = EXCLUDED.game_count,
-                        player_wins = EXCLUDED.player_wins,
-                        banker_wins = EXCLUDED.banker_wins,
-                        ties = EXCLUDED.ties,
-                        player_pairs = EXCLUDED.player_pairs,
-                        banker_pairs = EXCLUDED.banker_pairs,
-                        history_data = EXCLUDED.history_data
-                ''',
+                await self.queries.execute(
+                    conn, 'upsert_shoe_stats',
                     shoe_id,
                     stats.get('gameCount'),
                     stats.get('playerWins'),
@@ -145,11 +100,8 @@ class DragonBotDB:
         """Guardar roadmaps para análisis de patrones"""
         async with self.pool.acquire() as conn:
             try:
-                await conn.execute('''
-                    INSERT INTO roadmaps 
-                    (game_id, big_road, bead_road, big_eye_boy, small_road, cockroach_road)
-                    VALUES ($1, $2, $3, $4, $5, $6)
-                ''',
+                await self.queries.execute(
+                    conn, 'insert_roadmap',
                     game_id,
                     json.dumps(roadmap_data.get('big_road', [])),
                     json.dumps(roadmap_data.get('bead_road', [])),
@@ -165,8 +117,12 @@ class DragonBot:
     def __init__(self, db, target_url):
         self.db = db
         self.target_url = target_url
-        self.current_game_data = {}
+        self.rounds = RoundAssembler()
         self.current_shoe_id = None
+        self.deduper = FrameDeduper(
+            max_entries=config.WS_DEDUPE_MAX_ENTRIES,
+            window_seconds=config.WS_DEDUPE_WINDOW_SECONDS
+        )
         
     async def run(self):
         async with async_playwright() as p:
@@ -181,11 +137,19 @@ class DragonBot:
             
             def handle_websocket(ws):
                 logger.info(f"✅ WebSocket connected")
+                queue = FrameQueue(
+                    self.process_message,
+                    maxsize=config.WS_QUEUE_MAXSIZE,
+                    drop_types=config.WS_QUEUE_DROP_TYPES,
+                    name=ws.url[:80],
+                ).start()
                 
                 def on_frame(payload):
-                    asyncio.create_task(self.process_message(payload))
+                    if not self.deduper.is_duplicate(payload):
+                        queue.put(payload)
                 
                 ws.on('framereceived', on_frame)
+                ws.on('close', lambda: queue.close())
             
             page.on('websocket', handle_websocket)
             
@@ -204,45 +168,31 @@ class DragonBot:
             return
         
         try:
-            data = json.loads(payload)
-            msg_type = data.get('type')
+            msg = decode(payload)
+            if msg is None:
+                return
+            msg_type = msg.type
             
             # Nueva ronda
             if msg_type == 'baccarat.newGame':
-                args = data.get('args', {})
-                self.current_game_data = {
-                    'game_id': args.get('gameId'),
-                    'game_number': args.get('gameNumber'),
-                    'shoe_cards_out': args.get('shoeCardsOut')
-                }
-                logger.info(f"🎮 New game: {args.get('gameNumber')}")
+                self.rounds.start(msg)
+                logger.info(f"🎮 New game: {msg.game_number}")
             
             # Cartas repartidas
             elif msg_type == 'baccarat.cardDealt':
-                args = data.get('args', {})
-                game_data = args.get('gameData', {})
-                
-                player_hand = game_data.get('playerHand', {})
-                banker_hand = game_data.get('bankerHand', {})
-                
-                self.current_game_data['player_cards'] = player_hand.get('cards', [])
-                self.current_game_data['banker_cards'] = banker_hand.get('cards', [])
-                self.current_game_data['player_score'] = player_hand.get('score')
-                self.current_game_data['banker_score'] = banker_hand.get('score')
+                self.rounds.round_for(msg).apply_card_dealt(msg)
             
             # Multiplicadores Lightning
             elif msg_type == 'baccarat.potentialMultipliers':
-                args = data.get('args', {})
-                self.current_game_data['lightning_multipliers'] = args.get('multipliers', {})
+                self.rounds.round_for(msg).apply_multipliers(msg)
             
             # ⭐ NUEVO: Estadísticas del Zapato (P/B/T counters)
             elif msg_type == 'baccarat.encodedShoeState':
-                args = data.get('args', {})
-                stats = args.get('stats', {})
-                history = args.get('history_v2', [])
+                stats = msg.stats
+                history = msg.history
                 
                 # Generar shoe_id único basado en contadores
-                shoe_id = f"shoe_{stats.get('gameCount', 0)}_{stats.get('playerWins', 0)}_{stats.get('bankerWins', 0)}"
+                shoe_id = f"shoe_{msg.game_count}_{msg.player_wins}_{msg.banker_wins}"
                 self.current_shoe_id = shoe_id
                 
                 # Guardar estadísticas del zapato
@@ -253,41 +203,26 @@ class DragonBot:
                 
                 # Extraer roadmap del history
                 roadmap_data = self.build_roadmap_from_history(history)
-                if self.current_game_data.get('game_id'):
+                open_round = self.rounds.open_round
+                if open_round:
                     await self.db.save_roadmap(
-                        self.current_game_data['game_id'],
+                        open_round.game_id,
                         roadmap_data
                     )
             
             # Resultado final
             elif msg_type == 'baccarat.resolved':
-                args = data.get('args', {})
-                result = args.get('result', {})
-                
-                round_data = {
-                    **self.current_game_data,
-                    'winner': result.get('winner'),
-                    'player_score': result.get('playerScore'),
-                    'banker_score': result.get('bankerScore'),
-                    'player_pair': result.get('playerPair'),
-                    'banker_pair': result.get('bankerPair'),
-                    'is_natural': result.get('natural'),
-                    'winning_spots': args.get('winningSpots', []),
-                    'with_lightning': args.get('withLightning')
-                }
+                round_data = self.rounds.resolve(msg).to_dict()
                 
                 await self.db.save_round(round_data)
                 
                 logger.info(f"🎯 Result: {round_data['winner']} ({round_data['banker_score']}-{round_data['player_score']})")
-                
-                self.current_game_data = {}
             
             # Ganadores
             elif msg_type == 'baccarat.gameWinners':
-                args = data.get('args', {})
-                if self.current_game_data.get('game_id'):
-                    self.current_game_data['total_winners'] = args.get('totalWinners')
-                    self.current_game_data['total_amount'] = args.get('totalAmount')
+                game_round = self.rounds.round_for(msg, create=False)
+                if game_round and game_round.game_id:
+                    game_round.apply_winners(msg)
                     
         except Exception as e:
             logger.error(f"Error processing message: {e}")
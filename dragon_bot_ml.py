@@ -4,9 +4,10 @@ import asyncpg
 import json
 import os
 import logging
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from playwright.async_api import async_playwright
-import pandas as pd
 import numpy as np
 from xgboost import XGBClassifier
 from sklearn.preprocessing import LabelEncoder
@@ -15,8 +16,22 @@ from collections import deque
 from baccarat_strategies import BaccaratStrategies
 from telegram_notifier import TelegramNotifier
 from road_analyzer import RoadAnalyzer
+from src.frame_archive import build_archive
+from src.frame_dedupe import FrameDeduper
+from src.game_round import RoundAssembler
 from src.lightning_tracker import LightningTracker
+from src.shoe_sync import DELTA, RESYNC, UNCHANGED, ShoeHistorySync
+from src.strategy_ledger import ACCURACY_WINDOW, accuracy_rows, shoe_phase
+from src.round_arrays import WINNERS, round_arrays
 from src.bankroll_manager import BankrollManager
+from src.ingest_queue import FrameQueue
+from src.latency import latency
+from src.live_state import LiveState, is_pair
+from src.pg_indexes import ensure_indexes
+from src.pg_partitions import ensure_tables, month_start, server_now
+from src.queries import QueryCatalog, affected_rows, round_params
+from src.ws_messages import decode
+from src.ws_protocol import sniff_type
 from src.config import config
 
 logging.basicConfig(
@@ -25,6 +40,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
 class MLPredictor:
     def __init__(self):
         self.model = XGBClassifier(
@@ -40,7 +56,8 @@ class MLPredictor:
             random_state=42
         )
         self.le = LabelEncoder()
-        self.le.fit(['Banker', 'Player', 'Tie'])
+        # Mismo orden que los códigos de RoundArrays.winner
+        self.le.fit(list(WINNERS))
         self.history = deque(maxlen=50)
         self.score_history = deque(maxlen=50)  # (player_score, banker_score)
         self.is_trained = False
@@ -169,28 +186,25 @@ class MLPredictor:
         # Total: 5 + 9 + 2 + 2 + 3 + 2 + 6 + 2 = 31 features
         return features
     
-    def train(self, rounds_df):
-        if len(rounds_df) < 30:
+    def train(self, rounds):
+        """Entrenar con un RoundArrays (rondas de la más antigua a la más reciente)"""
+        if len(rounds) < 30:
             logger.warning("Necesito mínimo 30 rondas para entrenar")
             return False
         
         X, y = [], []
-        history_list = rounds_df['winner'].tolist()
-        
-        # Construir lista de scores
-        scores_list = []
-        if 'player_score' in rounds_df.columns and 'banker_score' in rounds_df.columns:
-            for _, row in rounds_df.iterrows():
-                ps = row.get('player_score', 0) or 0
-                bs = row.get('banker_score', 0) or 0
-                scores_list.append((ps, bs))
+        history_list = rounds.winners()
+        scores_list = rounds.scores()
+        # Los códigos de ganador ya son las etiquetas del LabelEncoder
+        labels = rounds.winner.tolist()
         
         for i in range(10, len(history_list)):
-            sc = scores_list[:i] if scores_list else None
-            features = self.prepare_features(history_list[:i], sc)
+            if labels[i] < 0:
+                continue
+            features = self.prepare_features(history_list[:i], scores_list[:i])
             if features:
                 X.append(features)
-                y.append(self.le.transform([history_list[i]])[0])
+                y.append(labels[i])
         
         if len(X) < 20:
             return False
@@ -258,47 +272,48 @@ class MLPredictor:
 ╚════════════════════════════════════════╝
         """
 
+def strategy_vote_rows(game_id, strategies_list):
+    """(game_id, estrategia, predicción) de cada voto válido del consenso"""
+    rows = []
+    for s in strategies_list or []:
+        name = s.get('strategy') or s.get('type') or 'unknown'
+        pred = s.get('predicted') or s.get('prediction')
+        if not name or not pred:
+            continue
+        rows.append((str(game_id), str(name), str(pred)))
+    return rows
+
+
 class DragonBotDB:
+    # Ventana en memoria de get_recent_stats (últimas N rondas por mesa)
+    LIVE_WINDOW = 81
+    # Filas recientes con las que se reconstruye el estado en memoria al arrancar
+    LIVE_REHYDRATE_ROWS = 2000
+    # Últimos votos por estrategia de la precisión reciente (strategy_accuracy.recent)
+    ACCURACY_WINDOW = ACCURACY_WINDOW
+
     def __init__(self, dsn):
         self.dsn = dsn
         self.pool = None
+        # Racha, contadores y últimas rondas por mesa, actualizados en save_round
+        self.live = LiveState(window=self.LIVE_WINDOW)
+        # id más alto de baccarat_rounds contado en self.live y game_ids guardados
+        # por este proceso desde entonces (refresh_live no los cuenta dos veces)
+        self._live_last_id = 0
+        self._live_saved = set()
+        # Sentencias por nombre, preparadas una vez por conexión y cronometradas
+        self.queries = QueryCatalog()
+        # Mes de las últimas particiones comprobadas (maintain_partitions)
+        self._partitions_month = None
     
     async def init(self):
-        self.pool = await asyncpg.create_pool(self.dsn, min_size=2, max_size=10)
+        self.pool = await asyncpg.create_pool(
+            self.dsn, min_size=2, max_size=10, **self.queries.pool_options()
+        )
+        # baccarat_rounds, ml_predictions y strategy_votes: particiones mensuales
+        await self.maintain_partitions()
         async with self.pool.acquire() as conn:
             await conn.execute('''
-                CREATE TABLE IF NOT EXISTS baccarat_rounds (
-                    id SERIAL PRIMARY KEY,
-                    game_id VARCHAR(100) UNIQUE,
-                    game_number VARCHAR(50),
-                    timestamp TIMESTAMP DEFAULT NOW(),
-                    winner VARCHAR(20),
-                    player_score INT,
-                    banker_score INT,
-                    player_pair BOOLEAN,
-                    banker_pair BOOLEAN,
-                    is_natural BOOLEAN,
-                    player_cards JSONB,
-                    banker_cards JSONB,
-                    lightning_multipliers JSONB,
-                    winning_spots JSONB,
-                    with_lightning BOOLEAN,
-                    shoe_cards_out INT,
-                    total_winners INT,
-                    total_amount NUMERIC,
-                    captured_at TIMESTAMP DEFAULT NOW()
-                );
-                
-                CREATE TABLE IF NOT EXISTS ml_predictions (
-                    id SERIAL PRIMARY KEY,
-                    game_id VARCHAR(100),
-                    predicted_winner VARCHAR(20),
-                    confidence NUMERIC,
-                    actual_winner VARCHAR(20),
-                    was_correct BOOLEAN,
-                    timestamp TIMESTAMP DEFAULT NOW()
-                );
-                
                 CREATE TABLE IF NOT EXISTS baccarat_roads (
                     id SERIAL PRIMARY KEY,
                     game_id VARCHAR(100) UNIQUE,
@@ -310,74 +325,194 @@ class DragonBotDB:
                     bead_plate JSONB
                 );
                 
-                CREATE TABLE IF NOT EXISTS strategy_votes (
-                    id SERIAL PRIMARY KEY,
-                    game_id VARCHAR(100) NOT NULL,
-                    strategy_name VARCHAR(80) NOT NULL,
-                    predicted_winner VARCHAR(20) NOT NULL,
-                    actual_winner VARCHAR(20),
-                    was_correct BOOLEAN,
-                    created_at TIMESTAMP DEFAULT NOW()
+                -- Precisión acumulada por estrategia, al día con cada resolución de votos
+                CREATE TABLE IF NOT EXISTS strategy_accuracy (
+                    strategy_name VARCHAR(80) PRIMARY KEY,
+                    total BIGINT NOT NULL DEFAULT 0,
+                    correct BIGINT NOT NULL DEFAULT 0,
+                    ties BIGINT NOT NULL DEFAULT 0,
+                    tie_correct BIGINT DEFAULT 0,
+                    early_total BIGINT NOT NULL DEFAULT 0,
+                    early_correct BIGINT NOT NULL DEFAULT 0,
+                    middle_total BIGINT NOT NULL DEFAULT 0,
+                    middle_correct BIGINT NOT NULL DEFAULT 0,
+                    late_total BIGINT NOT NULL DEFAULT 0,
+                    late_correct BIGINT NOT NULL DEFAULT 0,
+                    recent TEXT NOT NULL DEFAULT '',
+                    updated_at TIMESTAMP DEFAULT NOW()
                 );
-                CREATE INDEX IF NOT EXISTS idx_strategy_votes_game_id ON strategy_votes(game_id);
-                CREATE INDEX IF NOT EXISTS idx_strategy_votes_name ON strategy_votes(strategy_name);
+                -- Filas anteriores quedan en NULL hasta que _ensure_strategy_accuracy recuente
+                ALTER TABLE strategy_accuracy ADD COLUMN IF NOT EXISTS tie_correct BIGINT;
+                ALTER TABLE strategy_accuracy ALTER COLUMN tie_correct SET DEFAULT 0;
+
+                ALTER TABLE baccarat_rounds ADD COLUMN IF NOT EXISTS table_id VARCHAR(100);
+                CREATE INDEX IF NOT EXISTS idx_rounds_table_ts
+                    ON baccarat_rounds(table_id, timestamp DESC);
                 
                 CREATE INDEX IF NOT EXISTS idx_game_id ON baccarat_rounds(game_id);
                 CREATE INDEX IF NOT EXISTS idx_timestamp ON baccarat_rounds(timestamp DESC);
                 CREATE INDEX IF NOT EXISTS idx_roads_game_id ON baccarat_roads(game_id);
             ''')
+            # Índices parciales de predicciones/votos pendientes y resueltos
+            built = await ensure_indexes(conn)
+            if built:
+                logger.info(f"✓ Índices creados: {', '.join(built)}")
+        await self._load_live_state()
+        await self._ensure_strategy_accuracy()
         logger.info("✓ Database initialized")
+
+    async def maintain_partitions(self):
+        """Crear tablas y particiones del mes actual y siguientes (una vez por mes del servidor)"""
+        async with self.pool.acquire() as conn:
+            # Mismo reloj que DEFAULT NOW(): el del servidor, no el de este proceso
+            now = await server_now(conn)
+            if month_start(now) == self._partitions_month:
+                return
+            report = await ensure_tables(conn, ahead=config.PG_PARTITIONS_AHEAD, now=now)
+        self._partitions_month = month_start(now)
+        if report['created']:
+            logger.info(f"✓ Particiones creadas: {', '.join(report['created'])}")
+        for table in report['unpartitioned']:
+            logger.warning(
+                f"⚠️ {table} sin particionar: con el bot parado, "
+                f"python -m src.pg_partitions migrate"
+            )
+
+    async def _ensure_strategy_accuracy(self):
+        """Primer arranque con el ledger (o sin tie_correct): contarlo desde strategy_votes"""
+        async with self.pool.acquire() as conn:
+            needed = await self.queries.fetchval(conn, 'ledger_needs_rebuild')
+        if needed:
+            strategies = await self.rebuild_strategy_accuracy()
+            logger.info(f"✓ strategy_accuracy reconstruida ({strategies} estrategias)")
+
+    async def rebuild_strategy_accuracy(self):
+        """Recontar strategy_accuracy desde strategy_votes; devuelve las estrategias"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # TRUNCATE bloquea el ledger: las resoluciones en curso esperan y suman después
+                await conn.execute('TRUNCATE strategy_accuracy')
+                status = await self.queries.execute(
+                    conn, 'rebuild_strategy_accuracy', self.ACCURACY_WINDOW
+                )
+        return affected_rows(status)
+
+    async def _load_live_state(self):
+        """Reconstruir el estado en memoria con las últimas rondas guardadas"""
+        self.live.clear()
+        self._live_saved.clear()
+        async with self.pool.acquire() as conn:
+            rows = await self.queries.fetch(conn, 'live_state_rows', self.LIVE_REHYDRATE_ROWS)
+        self._live_last_id = rows[0]['id'] if rows else 0
+        for row in reversed(rows):
+            self._apply_live_row(row)
+
+    def _apply_live_row(self, row):
+        self.live.apply(
+            row['table_id'], row['winner'],
+            player_pair=bool(row['player_pair']), banker_pair=bool(row['banker_pair']),
+            round_id=row['game_id'],
+        )
+
+    async def refresh_live(self):
+        """
+        Contar en memoria las rondas guardadas por otros procesos
+        (dragon_bot_advanced.py, load_historical_data.py, otra instancia)
+        desde la última contada: una lectura por id, vacía si no hay nada nuevo
+        """
+        async with self.pool.acquire() as conn:
+            rows = await self.queries.fetch(
+                conn, 'live_state_since', self._live_last_id, self.LIVE_REHYDRATE_ROWS
+            )
+        if len(rows) == self.LIVE_REHYDRATE_ROWS:
+            # Carga masiva: más rápido reconstruir desde las últimas rondas
+            await self._load_live_state()
+            return
+        for row in rows:
+            if row['id'] <= self._live_last_id:
+                continue  # Ya contada por una llamada concurrente
+            self._live_last_id = row['id']
+            if row['game_id'] in self._live_saved:
+                self._live_saved.discard(row['game_id'])
+            else:
+                self._apply_live_row(row)
     
+    def _round_saved(self, data):
+        """Ronda nueva en la DB: actualizar el estado en memoria"""
+        self._live_saved.add(str(data['game_id']))
+        self.live.apply(
+            data.get('table_id'), data['winner'],
+            player_pair=bool(data.get('player_pair')),
+            banker_pair=bool(data.get('banker_pair')),
+            round_id=str(data['game_id']),
+        )
+        logger.info(
+            f"✅ Guardada ronda {data.get('game_number')}: {data.get('winner')} "
+            f"({data.get('banker_score')}-{data.get('player_score')})"
+        )
+
     async def save_round(self, data):
         if not data.get('game_id') or not data.get('winner'):
             return
             
         async with self.pool.acquire() as conn:
             try:
-                await conn.execute('''
-                    INSERT INTO baccarat_rounds 
-                    (game_id, game_number, winner, player_score, banker_score,
-                     player_pair, banker_pair, is_natural, player_cards, banker_cards,
-                     lightning_multipliers, winning_spots, with_lightning, 
-                     shoe_cards_out, total_winners, total_amount)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16)
-                    ON CONFLICT (game_id) DO NOTHING
-                ''',
-                    str(data['game_id']),
-                    str(data.get('game_number', '')),
-                    str(data['winner']),
-                    data.get('player_score'),
-                    data.get('banker_score'),
-                    data.get('player_pair', False),
-                    data.get('banker_pair', False),
-                    data.get('is_natural', False),
-                    json.dumps(data.get('player_cards', [])),
-                    json.dumps(data.get('banker_cards', [])),
-                    json.dumps(data.get('lightning_multipliers', {})), 
-                    json.dumps(data.get('winning_spots', [])),
-                    data.get('with_lightning', False),
-                    data.get('shoe_cards_out'),
-                    data.get('total_winners'),
-                    data.get('total_amount')
-                )
-                logger.info(f"✅ Guardada ronda {data.get('game_number')}: {data.get('winner')} ({data.get('banker_score')}-{data.get('player_score')})")
+                status = await self.queries.execute(conn, 'insert_round', *round_params(data))
+                # "INSERT 0 1" si la ronda es nueva, "INSERT 0 0" si ya existía
+                if status.endswith(' 1'):
+                    self._round_saved(data)
             except Exception as e:
                 pass
+
+    async def resolve_round(self, data, include_totals=False, include_accuracy=False,
+                            min_votes=3):
+        """
+        Todo lo que necesita un baccarat.resolved en una sola transacción y conexión:
+        guardar la ronda, resolver predicción ML y votos de estrategia y, si se piden,
+        totales de predicciones y precisión por estrategia (ya con esta ronda).
+        """
+        resolved = {
+            'inserted': False,
+            'predictions_updated': 0,
+            'votes_updated': 0,
+            'total_stats': None,
+            'strategy_accuracy': None,
+        }
+        if not data.get('game_id') or not data.get('winner'):
+            return resolved
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    row = await self.queries.fetchrow(
+                        conn, 'resolve_round', *round_params(data), include_totals,
+                        shoe_phase(data.get('shoe_cards_out')), self.ACCURACY_WINDOW,
+                    )
+                    if include_accuracy:
+                        rows = await self.queries.fetch(conn, 'strategy_accuracy', min_votes)
+                        resolved['strategy_accuracy'] = accuracy_rows(rows)
+        except Exception as e:
+            logger.warning(f"Error resolve_round: {e}")
+            return resolved
+
+        resolved['inserted'] = row['inserted'] > 0
+        resolved['predictions_updated'] = row['predictions_updated']
+        resolved['votes_updated'] = row['votes_updated']
+        if include_totals:
+            resolved['total_stats'] = {'total': row['total'], 'correct': row['correct']}
+        if resolved['inserted']:
+            self._round_saved(data)
+        if resolved['votes_updated'] > 0:
+            logger.info(
+                f"📊 Actualizado {resolved['votes_updated']} votos de estrategia "
+                f"para {str(data['game_id'])[:12]}"
+            )
+        return resolved
     
     async def save_roads(self, game_id, roads_data):
         async with self.pool.acquire() as conn:
             try:
-                await conn.execute('''
-                    INSERT INTO baccarat_roads 
-                    (game_id, big_road, big_eye_road, small_road, cockroach_road, bead_plate)
-                    VALUES ($1, $2, $3, $4, $5, $6)
-                    ON CONFLICT (game_id) DO UPDATE SET
-                        big_road = EXCLUDED.big_road,
-                        big_eye_road = EXCLUDED.big_eye_road,
-                        small_road = EXCLUDED.small_road,
-                        cockroach_road = EXCLUDED.cockroach_road,
-                        bead_plate = EXCLUDED.bead_plate
-                ''',
+                await self.queries.execute(
+                    conn, 'upsert_roads',
                     str(game_id),
                     json.dumps(roads_data.get('bigRoad', [])),
                     json.dumps(roads_data.get('bigEyeRoad', [])),
@@ -395,10 +530,9 @@ class DragonBotDB:
             
         async with self.pool.acquire() as conn:
             try:
-                await conn.execute('''
-                    INSERT INTO ml_predictions (game_id, predicted_winner, confidence)
-                    VALUES ($1, $2, $3)
-                ''', str(game_id), str(predicted), float(confidence))
+                await self.queries.execute(
+                    conn, 'insert_prediction', str(game_id), str(predicted), float(confidence)
+                )
             except Exception as e:
                 pass
     
@@ -407,14 +541,10 @@ class DragonBotDB:
             return 0
         try:
             async with self.pool.acquire() as conn:
-                result = await conn.execute('''
-                    UPDATE ml_predictions
-                    SET actual_winner = $2::varchar,
-                        was_correct = (predicted_winner = $2::varchar)
-                    WHERE game_id = $1::varchar AND actual_winner IS NULL
-                ''', str(game_id), str(actual_winner))
-                count = int(result.split()[-1]) if result else 0
-                return count
+                result = await self.queries.execute(
+                    conn, 'resolve_predictions', str(game_id), str(actual_winner)
+                )
+                return affected_rows(result)
         except Exception as e:
             logger.warning(f"Error update_prediction_result: {e}")
             return 0
@@ -423,32 +553,53 @@ class DragonBotDB:
         """Registrar voto de cada estrategia para esta mano (para precisión por estrategia)."""
         if not game_id or not strategies_list:
             return
+        rows = strategy_vote_rows(game_id, strategies_list)
+        if not rows:
+            return
         async with self.pool.acquire() as conn:
             try:
-                for s in strategies_list:
-                    name = s.get('strategy') or s.get('type') or 'unknown'
-                    pred = s.get('predicted') or s.get('prediction')
-                    if not name or not pred:
-                        continue
-                    await conn.execute('''
-                        INSERT INTO strategy_votes (game_id, strategy_name, predicted_winner)
-                        VALUES ($1, $2, $3)
-                    ''', str(game_id), str(name), str(pred))
+                # Todos los votos de la mano en una sola sentencia
+                await self.queries.execute(
+                    conn, 'insert_votes',
+                    str(game_id), [r[1] for r in rows], [r[2] for r in rows],
+                )
             except Exception as e:
                 logger.debug(f"save_strategy_votes: {e}")
 
-    async def update_strategy_votes_result(self, game_id, actual_winner):
-        """Marcar acierto/fallo de cada voto cuando se resuelve la ronda."""
+    async def save_strategy_votes_many(self, votes):
+        """
+        Votos de varias manos de golpe (backfill/replay): votes es un iterable de
+        (game_id, strategies_list). Un único COPY; devuelve los votos escritos.
+        """
+        records = [
+            row
+            for game_id, strategies_list in votes if game_id
+            for row in strategy_vote_rows(game_id, strategies_list)
+        ]
+        if not records:
+            return 0
+        async with self.pool.acquire() as conn:
+            try:
+                await conn.copy_records_to_table(
+                    'strategy_votes',
+                    records=records,
+                    columns=['game_id', 'strategy_name', 'predicted_winner'],
+                )
+            except Exception as e:
+                logger.warning(f"Error save_strategy_votes_many: {e}")
+                return 0
+        return len(records)
+
+    async def update_strategy_votes_result(self, game_id, actual_winner, shoe_cards_out=None):
+        """Marcar acierto/fallo de cada voto (y sumarlo a strategy_accuracy) al resolver."""
         if not game_id or not actual_winner:
             return 0
         try:
             async with self.pool.acquire() as conn:
-                result = await conn.execute('''
-                    UPDATE strategy_votes
-                    SET actual_winner = $2::varchar, was_correct = (predicted_winner = $2::varchar)
-                    WHERE game_id = $1::varchar AND actual_winner IS NULL
-                ''', str(game_id), str(actual_winner))
-                count = int(result.split()[-1]) if result else 0
+                count = await self.queries.fetchval(
+                    conn, 'resolve_votes', str(game_id), str(actual_winner),
+                    shoe_phase(shoe_cards_out), self.ACCURACY_WINDOW,
+                )
                 if count > 0:
                     logger.info(f"📊 Actualizado {count} votos de estrategia para {game_id[:12]}")
                 return count
@@ -457,28 +608,11 @@ class DragonBotDB:
             return 0
 
     async def get_strategy_accuracy(self, min_votes=5):
-        """Precisión por estrategia (solo con actual_winner ya rellenado)."""
+        """Precisión por estrategia, leída del ledger strategy_accuracy."""
         async with self.pool.acquire() as conn:
             try:
-                rows = await conn.fetch('''
-                    SELECT strategy_name,
-                           COUNT(*) AS total,
-                           SUM(CASE WHEN was_correct THEN 1 ELSE 0 END) AS correct
-                    FROM strategy_votes
-                    WHERE actual_winner IS NOT NULL
-                    GROUP BY strategy_name
-                    HAVING COUNT(*) >= $1
-                    ORDER BY (SUM(CASE WHEN was_correct THEN 1 ELSE 0 END)::numeric / NULLIF(COUNT(*), 0)) DESC
-                ''', min_votes)
-                return [
-                    {
-                        'strategy': r['strategy_name'],
-                        'total': r['total'],
-                        'correct': r['correct'],
-                        'accuracy': round((r['correct'] / r['total'] * 100), 2) if r['total'] else 0,
-                    }
-                    for r in rows
-                ]
+                rows = await self.queries.fetch(conn, 'strategy_accuracy', min_votes)
+                return accuracy_rows(rows)
             except Exception as e:
                 logger.debug(f"get_strategy_accuracy: {e}")
                 return []
@@ -487,13 +621,7 @@ class DragonBotDB:
         """Obtener precisión global de predicciones"""
         async with self.pool.acquire() as conn:
             try:
-                row = await conn.fetchrow('''
-                    SELECT 
-                        COUNT(*) AS total,
-                        SUM(CASE WHEN predicted = actual_winner THEN 1 ELSE 0 END) AS correct
-                    FROM predictions
-                    WHERE actual_winner IS NOT NULL
-                ''')
+                row = await self.queries.fetchrow(conn, 'prediction_totals')
                 return {
                     'correct': row['correct'] or 0,
                     'total': row['total'] or 0
@@ -502,25 +630,27 @@ class DragonBotDB:
                 logger.debug(f"get_global_accuracy: {e}")
                 return {'correct': 0, 'total': 0}
     
-    async def get_recent_rounds(self, limit=100):
+    async def get_round_arrays(self, limit=100, table_id=None):
+        """Últimas rondas como RoundArrays, de la más antigua a la más reciente
+        (de una mesa si se indica table_id)"""
         async with self.pool.acquire() as conn:
-            rows = await conn.fetch('''
-                SELECT winner, player_score, banker_score, is_natural, timestamp
-                FROM baccarat_rounds
-                ORDER BY timestamp DESC
-                LIMIT $1
-            ''', limit)
-            return pd.DataFrame(rows, columns=['winner', 'player_score', 'banker_score', 'is_natural', 'timestamp'])
+            if table_id is None:
+                rows = await self.queries.fetch(conn, 'recent_rounds', limit)
+            else:
+                rows = await self.queries.fetch(conn, 'recent_rounds_by_table', limit, table_id)
+        return round_arrays(rows)
     
-    async def get_recent_stats(self, limit=81):
-        """Obtener estadísticas de las últimas N rondas"""
+    async def get_recent_stats(self, limit=81, table_id=None):
+        """Obtener estadísticas de las últimas N rondas (de memoria si caben en la ventana)"""
+        await self.refresh_live()
+        stats = self.live.counts(limit, table_id)
+        if stats is not None:
+            return stats
         async with self.pool.acquire() as conn:
-            rows = await conn.fetch('''
-                SELECT winner
-                FROM baccarat_rounds
-                ORDER BY timestamp DESC
-                LIMIT $1
-            ''', limit)
+            if table_id is None:
+                rows = await self.queries.fetch(conn, 'recent_winners', limit)
+            else:
+                rows = await self.queries.fetch(conn, 'recent_winners_by_table', limit, table_id)
             
             stats = {'player': 0, 'banker': 0, 'tie': 0}
             for row in rows:
@@ -533,13 +663,7 @@ class DragonBotDB:
     async def get_total_prediction_stats(self):
         """Obtener estadísticas totales de predicciones"""
         async with self.pool.acquire() as conn:
-            row = await conn.fetchrow('''
-                SELECT 
-                    COUNT(*) as total,
-                    COUNT(*) FILTER (WHERE was_correct = true) as correct
-                FROM ml_predictions
-                WHERE actual_winner IS NOT NULL
-            ''')
+            row = await self.queries.fetchrow(conn, 'prediction_totals')
             
             return {
                 'total': row['total'] if row else 0,
@@ -547,11 +671,27 @@ class DragonBotDB:
             }
 
 class DragonBot:
-    def __init__(self, db, target_url, user_data_dir='./browser_data'):
+    # Tipos que process_message maneja; el resto se descarta sin json.loads
+    HANDLED_TYPES = frozenset({
+        'baccarat.newGame',
+        'baccarat.cardDealt',
+        'baccarat.potentialMultipliers',
+        'baccarat.gameHistory',
+        'baccarat.roads',
+        'baccarat.encodedShoeState',
+        'baccarat.resolved',
+        'baccarat.gameWinners',
+    })
+
+    def __init__(self, db, target_url, user_data_dir='./browser_data', telegram=None,
+                 table_id=None):
         self.db = db
         self.target_url = target_url
         self.user_data_dir = user_data_dir
-        self.current_game_data = {}
+        # Mesa de este bot en modo multi-mesa (None = mesa única, sin filtrar la DB)
+        self.table_id = table_id
+        # Rondas en curso/recientes por gameId (ver src/game_round.py)
+        self.rounds = RoundAssembler()
         self.predictor = MLPredictor()
         self.strategies = BaccaratStrategies(db=self.db)
         self.road_analyzer = RoadAnalyzer()
@@ -563,15 +703,39 @@ class DragonBot:
         self.last_message_time = datetime.now()
         self._last_shoe_game_count = 0
         self._shoe_synced = False
+        # Detecta rondas nuevas en encodedShoeState para no reconstruir todo el zapato
+        self.shoe_sync = ShoeHistorySync()
+        # Predicción de la próxima ronda, calculada al llegar encodedShoeState
+        self._next_prediction = None
+        self.newgame_latency_ms = deque(maxlen=500)
+        # Ramas especulativas (una por resultado posible) calculadas durante cardDealt
+        self._speculation = None
+        self._speculation_task = None
+        self._speculative_key = None
+        self.speculation_stats = {'hits': 0, 'misses': 0}
+        # Compartido entre conexiones: descarta frames ya recibidos por otro socket
+        self.deduper = FrameDeduper(
+            max_entries=config.WS_DEDUPE_MAX_ENTRIES,
+            window_seconds=config.WS_DEDUPE_WINDOW_SECONDS
+        )
+        # Archivo comprimido de frames crudos (hilo en segundo plano, None si está desactivado)
+        self.archive = build_archive(config)
+        # Histogramas de latencia por etapa (src/latency.py)
+        latency.enabled = config.LATENCY_METRICS_ENABLED
+        # Una cola ordenada por conexión WebSocket (ver src/ingest_queue.py)
+        self.frame_queues = []
         # Stats reales del zapato actual de Evolution Gaming
         self.shoe_stats = {
             'player': 0, 'banker': 0, 'tie': 0,
             'player_pairs': 0, 'banker_pairs': 0
         }
         
-        telegram_token = os.getenv("TELEGRAM_BOT_TOKEN", "")
-        telegram_chat_id = os.getenv("TELEGRAM_CHAT_ID", "")
-        self.telegram = TelegramNotifier(telegram_token, telegram_chat_id)
+        if telegram is None:
+            telegram_token = os.getenv("TELEGRAM_BOT_TOKEN", "")
+            telegram_chat_id = os.getenv("TELEGRAM_CHAT_ID", "")
+            telegram = TelegramNotifier(telegram_token, telegram_chat_id)
+        # Inyectable para replay/tests (src/replay.py usa un stand-in local)
+        self.telegram = telegram
         # Solo enviar señal a Telegram si confianza >= este umbral (default 50%)
         self.min_confidence_to_send = float(os.getenv("MIN_CONFIDENCE_TO_SEND", "50"))
         
@@ -592,40 +756,366 @@ class DragonBot:
         logger.info("🤖 Inicializando ML Predictor...")
         
         # ML: cargar TODOS los datos para mejor entrenamiento
-        df_ml = await self.db.get_recent_rounds(500)
+        rounds = await self.db.get_round_arrays(500, table_id=self.table_id)
         # Estrategias: solo últimas 20 del shoe
-        df = await self.db.get_recent_rounds(20)
+        recent = rounds.tail(20)
         
-        if len(df_ml) > 0:
+        if len(rounds) > 0:
             # ML entrena con todos los datos históricos
-            for _, row in df_ml.iterrows():
-                self.predictor.add_round(
-                    row['winner'],
-                    row.get('player_score', 0) or 0,
-                    row.get('banker_score', 0) or 0
-                )
-            self.predictor.train(df_ml)
+            for winner, (ps, bs) in zip(rounds.winners(), rounds.scores()):
+                self.predictor.add_round(winner, ps, bs)
+            self.predictor.train(rounds)
             
             # Estrategias usan solo las últimas 20 rondas
-            for _, row in df.iterrows():
-                self.strategies.add_round(
-                    row['winner'],
-                    row.get('player_score', 0) or 0,
-                    row.get('banker_score', 0) or 0,
-                    row.get('player_pair', False),
-                    row.get('banker_pair', False)
-                )
-            logger.info(f"🤖 ML entrenado y estrategias inicializadas con {len(df)} rondas")
+            for winner, ps, bs, player_pair, banker_pair, _ in recent.iter_rounds():
+                self.strategies.add_round(winner, ps, bs, player_pair, banker_pair)
+            logger.info(f"🤖 ML entrenado y estrategias inicializadas con {len(recent)} rondas")
         else:
             logger.info("⏳ No hay datos históricos, esperando rondas...")
     
-    async def check_websocket_health(self):
-        """Monitorear salud del WebSocket"""
+    def _predict_bundle(self, verbose=True):
+        """
+        Calcular la predicción completa para la próxima ronda (parte síncrona)
+
+        Fusiona ML + estrategias y, si supera el umbral de envío, precalcula
+        también el análisis que va en el mensaje.
+        """
+        log = logger.info if verbose else logger.debug
+        predicted_ml, confidence_ml = self.predictor.predict_next()
+        advanced = self.strategies.get_advanced_prediction()
+        consensus = advanced.get('consensus') if advanced else None
+        predicted_st = consensus['predicted'] if consensus else None
+        confidence_st = consensus['confidence'] if consensus else 0
+
+        # Debug: qué predice cada componente
+        strats_detail = ""
+        if consensus and consensus.get('strategies'):
+            strats_detail = " | ".join(
+                f"{s['strategy']}={s['predicted']}({s['confidence']:.0f}%)"
+                for s in consensus['strategies']
+            )
+        ml_str = f"{predicted_ml}({confidence_ml:.1f}%)" if predicted_ml else "None"
+        st_str = f"{predicted_st}({confidence_st:.1f}%)" if predicted_st else "None"
+        log(f"🔍 ML={ml_str} | Estrategias={st_str} [{strats_detail}]")
+
+        if consensus and consensus.get('unanimous'):
+            confidence_st = min(confidence_st + 5, 95)  # bonus consenso unánime
+
+        # Fusión ML + Estrategias: usar la mejor señal para no perder predicciones
+        if predicted_ml and predicted_st:
+            if predicted_ml == predicted_st:
+                predicted = predicted_ml
+                confidence = max(confidence_ml, confidence_st)
+                if confidence > confidence_ml:
+                    log(
+                        f"📈 Boost consenso: ML {confidence_ml:.1f}% + "
+                        f"estrategias {confidence_st:.1f}% → {confidence:.1f}%"
+                    )
+            else:
+                if confidence_st >= confidence_ml:
+                    predicted, confidence = predicted_st, confidence_st
+                    log(f"🔄 Usando estrategias ({confidence:.1f}%) > ML ({confidence_ml:.1f}%)")
+                else:
+                    predicted, confidence = predicted_ml, confidence_ml
+        elif predicted_st:
+            predicted, confidence = predicted_st, confidence_st
+        elif predicted_ml:
+            predicted, confidence = predicted_ml, confidence_ml
+        else:
+            predicted, confidence = None, 0
+
+        bundle = {
+            'predicted': predicted,
+            'confidence': confidence,
+            'consensus': consensus,
+            'recommendation': self.predictor.get_recommendation() if predicted else None,
+            'deep_analysis': None,
+            'all_strategies': None,
+            'viz_data': {},
+            'global_stats': None,
+        }
+
+        if self._should_send(bundle):
+            bundle['deep_analysis'] = self.strategies.get_deep_analysis()
+            bundle['all_strategies'] = self.strategies.get_all_strategies_status()
+            bundle['viz_data'] = self.strategies.get_visualization_data()
+
+        return bundle
+
+    def _should_send(self, bundle):
+        return bool(bundle['predicted']) and bundle['confidence'] >= self.min_confidence_to_send
+
+    async def _build_prediction_bundle(self):
+        """Predicción completa + stats globales que van en el mensaje"""
+        bundle = self._predict_bundle()
+        if self._should_send(bundle):
+            bundle['global_stats'] = await self.db.get_global_accuracy()
+        return bundle
+
+    def _apply_shoe_rounds(self, rounds):
+        """Agregar rondas de history_v2 al predictor ML"""
+        for game in rounds:
+            self.predictor.add_round(
+                game.get('winner'),
+                game.get('player_score', 0),
+                game.get('banker_score', 0)
+            )
+
+    @staticmethod
+    def _branch_key(game):
+        """Identifica una ronda de history_v2 (lo que cambia el estado de predicción)"""
+        return (
+            game.get('winner'),
+            game.get('playerScore', 0),
+            game.get('bankerScore', 0),
+            bool(game.get('playerPair')),
+            bool(game.get('bankerPair')),
+        )
+
+    @contextmanager
+    def _hypothetical_round(self, game):
+        """Aplicar temporalmente una ronda al historial y deshacerla al salir"""
+        histories = (self.strategies.history, self.predictor.history, self.predictor.score_history)
+        # Si el deque está lleno, append descarta el primero: guardarlo para restaurar
+        evicted = [
+            (h, h[0]) for h in histories if h.maxlen is not None and len(h) == h.maxlen
+        ]
+        self.strategies.extend_from_shoe_history([game])
+        self._apply_shoe_rounds([game])
+        try:
+            yield
+        finally:
+            for history in histories:
+                history.pop()
+            for history, first in evicted:
+                history.appendleft(first)
+
+    def _schedule_speculation(self, game_round):
+        """Durante cardDealt: precalcular en segundo plano la rama del resultado de las cartas"""
+        if not config.SPECULATIVE_PREDICTION or game_round.player_score is None \
+                or game_round.banker_score is None:
+            return
+
+        player_pair = is_pair(game_round.player_cards)
+        banker_pair = is_pair(game_round.banker_cards)
+        key = (game_round.game_id, game_round.player_score, game_round.banker_score,
+               player_pair, banker_pair)
+        if self._speculation and self._speculation[0] == key:
+            return
+
+        if self._speculation_task and not self._speculation_task.done():
+            self._speculation_task.cancel()
+        self._speculation = (key, None)
+        self._speculation_task = asyncio.get_running_loop().create_task(
+            self._speculate(key)
+        )
+
+    async def _speculate(self, key):
+        # Ceder el loop: el frame actual termina de procesarse primero
+        await asyncio.sleep(0)
+        game_id, player_score, banker_score, player_pair, banker_pair = key
+        # Los puntos deciden el ganador: solo esa rama puede coincidir en resolved
+        if player_score > banker_score:
+            winner = 'Player'
+        elif banker_score > player_score:
+            winner = 'Banker'
+        else:
+            winner = 'Tie'
+        game = {
+            'winner': winner,
+            'playerScore': player_score,
+            'bankerScore': banker_score,
+            'playerPair': player_pair,
+            'bankerPair': banker_pair,
+        }
+        try:
+            with latency.span('speculate', 'baccarat.cardDealt'):
+                # Sin awaits dentro: ningún otro frame ve el historial hipotético
+                with self._hypothetical_round(game):
+                    branches = {self._branch_key(game): self._predict_bundle(verbose=False)}
+        except Exception as e:
+            logger.warning(f"⚠️ Error en predicción especulativa: {e}")
+            return
+        if self._speculation and self._speculation[0] == key:
+            self._speculation = (key, branches)
+            logger.debug(f"🔮 Rama especulativa lista: {winner} (gid {game_id})")
+
+    async def _select_speculative_branch(self, game_round):
+        """En resolved: tomar la rama que coincide con el resultado real"""
+        speculation, self._speculation = self._speculation, None
+        self._speculative_key = None
+        if not config.SPECULATIVE_PREDICTION:
+            return
+
+        branches = speculation[1] if speculation else None
+        key = self._branch_key({
+            'winner': game_round.winner,
+            'playerScore': game_round.player_score,
+            'bankerScore': game_round.banker_score,
+            'playerPair': game_round.player_pair,
+            'bankerPair': game_round.banker_pair,
+        })
+        bundle = branches.get(key) if branches and speculation[0][0] == game_round.game_id else None
+        if bundle is None:
+            self.speculation_stats['misses'] += 1
+            return
+
+        self.speculation_stats['hits'] += 1
+        if self._should_send(bundle):
+            bundle['global_stats'] = await self.db.get_global_accuracy()
+        self._next_prediction = bundle
+        self._speculative_key = key
+
+    async def _precompute_prediction(self):
+        """Preparar la predicción de la próxima ronda antes de que llegue newGame"""
+        self._next_prediction = None
+        if not config.PRECOMPUTE_PREDICTION:
+            return
+        try:
+            with latency.span('predict', 'baccarat.encodedShoeState'):
+                self._next_prediction = await self._build_prediction_bundle()
+        except Exception as e:
+            logger.warning(f"⚠️ Error precalculando predicción: {e}")
+
+    async def _send_prediction(self, bundle, gid, game_number, game_round):
+        """Enviar la señal a Telegram (solo datos en vivo se calculan aquí)"""
+        predicted = bundle['predicted']
+        confidence = bundle['confidence']
+        viz_data = bundle['viz_data']
+
+        # Usar stats del zapato de Evolution
+        recent_stats = self.shoe_stats
+
+        # Get Lightning data and bankroll signals
+        lightning_stats = self.lightning_tracker.get_stats()
+        avg_multiplier = self.lightning_tracker.get_ev_multiplier()
+
+        # Calculate EV and get betting signal
+        # Note: confidence is in percentage (0-100), convert to 0-1
+        confidence_decimal = confidence / 100.0
+        signal_data = self.bankroll_manager.get_signal(
+            predicted,
+            confidence_decimal,
+            avg_multiplier
+        )
+
+        session_stats = self.bankroll_manager.get_session_stats()
+
+        # Check if Lightning mode is enabled (has multipliers)
+        has_lightning = lightning_stats.get('total_rounds', 0) > 0
+
+        if has_lightning:
+            # Send Lightning prediction with EV and Kelly
+            await self.telegram.send_lightning_prediction({
+                'predicted': predicted,
+                'confidence': confidence,
+                'game_id': gid,
+                'game_number': game_number,
+                'lightning_data': {
+                    'avg_multiplier': avg_multiplier,
+                    'distribution': self.lightning_tracker.format_distribution(),
+                    'hot_table': lightning_stats.get('hot_streak', False)
+                },
+                'signal_data': signal_data,
+                'session_stats': session_stats,
+                'recent_stats': recent_stats
+            })
+        else:
+            # Send regular comprehensive prediction (backward compatible)
+            await self.telegram.send_comprehensive_prediction({
+                'predicted': predicted,
+                'confidence': confidence,
+                'game_id': gid,
+                'game_number': game_number,
+                'game_name': self.table_id or 'Baccarat',
+                'timestamp': datetime.now().strftime('%H:%M:%S'),
+                'strategies_data': {
+                    'consensus': bundle['consensus'],
+                    'all_strategies': bundle['all_strategies']
+                },
+                'deep_analysis': bundle['deep_analysis'],
+                'recent_stats': recent_stats,
+                'pairs_data': {
+                    'player_pairs': self.shoe_stats.get('player_pairs', 0),
+                    'banker_pairs': self.shoe_stats.get('banker_pairs', 0)
+                },
+                'shoe_cards_out': game_round.shoe_cards_out or 0,
+                'total_stats': bundle['global_stats'],
+                'big_road': viz_data.get('big_road', ''),
+                'score_grid': viz_data.get('score_grid', ''),
+                'last_results': viz_data.get('last_results', '')
+            })
+
+    async def _check_process_health(self):
+        """Estado compartido por todas las mesas del proceso"""
+        dedupe_stats = self.deduper.stats()
+        if dedupe_stats['duplicates']:
+            logger.info(
+                f"♻️ Frames duplicados: {dedupe_stats['duplicates']}/{dedupe_stats['checked']} "
+                f"({dedupe_stats['hit_rate']:.1%})"
+            )
+
+        if latency.log_if_due(logger, config.LATENCY_LOG_INTERVAL_SECONDS):
+            self.db.queries.log_summary(logger)
+
+        try:
+            await self.db.maintain_partitions()
+        except Exception as e:
+            logger.warning(f"Particiones: {e}")
+
+        if self.archive:
+            archive_stats = self.archive.stats()
+            if archive_stats['dropped'] or archive_stats['errors']:
+                logger.warning(
+                    f"🗄️ Archivo de frames: {archive_stats['written']} escritos | "
+                    f"{archive_stats['dropped']} descartados | {archive_stats['errors']} errores"
+                )
+
+    async def check_websocket_health(self, process_wide=True):
+        """
+        Monitorear salud del WebSocket
+
+        process_wide: también lo que es del proceso y no de la mesa (latencias,
+        catálogo SQL, particiones, deduplicación y archivo de frames); en
+        multi-mesa solo lo hace un bot.
+        """
         while True:
             await asyncio.sleep(45)  # Check cada 45 segundos
-            
+
             time_since_last_msg = (datetime.now() - self.last_message_time).seconds
-            
+
+            if process_wide:
+                await self._check_process_health()
+
+            if self.speculation_stats['hits'] or self.speculation_stats['misses']:
+                logger.info(
+                    f"🔮 Ramas especulativas: {self.speculation_stats['hits']} aciertos | "
+                    f"{self.speculation_stats['misses']} fallos"
+                )
+
+            if self.newgame_latency_ms:
+                latencies = sorted(self.newgame_latency_ms)
+                logger.info(
+                    f"⏱️ newGame→Telegram p50 {latencies[len(latencies) // 2]:.1f} ms | "
+                    f"máx {latencies[-1]:.1f} ms ({len(latencies)} envíos)"
+                )
+
+            sync_stats = self.shoe_sync.stats()
+            if sync_stats['resyncs_total']:
+                logger.info(
+                    f"🔄 Sync zapato: {sync_stats['deltas']} incrementales | "
+                    f"resyncs {sync_stats['resyncs']}"
+                )
+
+            for queue in self.frame_queues:
+                stats = queue.stats()
+                if stats['dropped_total'] or stats['depth']:
+                    logger.info(
+                        f"📥 Cola WS: profundidad {stats['depth']} "
+                        f"(máx {stats['max_depth']}) | descartados {stats['dropped']} "
+                        f"(de ronda: {stats['round_dropped']})"
+                    )
+
             if time_since_last_msg > 180:  # 3 minutos sin mensajes
                 logger.warning(
                     f"⚠️ WebSocket inactivo por {time_since_last_msg}s, "
@@ -633,10 +1123,12 @@ class DragonBot:
                 )
                 self.websocket_alive = False
                 return
-    
+
     async def run(self):
         """Ejecutar con auto-reconexión"""
         await self.initialize_ml()
+        if self.archive:
+            self.archive.start()
         
         while True:
             try:
@@ -665,70 +1157,90 @@ class DragonBot:
                 
                 await asyncio.sleep(wait_time)
     
-    async def _run_bot(self):
-        """Ejecutar una sesión del bot"""
-        async with async_playwright() as p:
-            os.makedirs(self.user_data_dir, exist_ok=True)
-            
-            context = await p.chromium.launch_persistent_context(
-                user_data_dir=self.user_data_dir,
-                headless=False,
-                channel='chrome',
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-blink-features=AutomationControlled'
-                ],
-                viewport={'width': 1920, 'height': 1080}
-            )
-            
-            page = context.pages[0] if context.pages else await context.new_page()
-            
-            self.websocket_alive = False
-            self._shoe_synced = False  # Resetear sincronización en cada conexión
+    def _reset_connection(self):
+        """Estado por conexión: se descarta al reconectar"""
+        self.websocket_alive = False
+        self._shoe_synced = False  # Resetear sincronización en cada conexión
+        self.shoe_sync.reset()
+        for queue in self.frame_queues:
+            queue.close()
+        self.frame_queues = []
+
+    def _attach_page(self, page):
+        """Enrutar los WebSockets de esta página a este bot"""
+        def handle_websocket(ws):
+            logger.info(f"✅ WebSocket connected{self._table_tag()}")
+            self.websocket_alive = True
+            self.reconnect_attempts = 0
             
-            def handle_websocket(ws):
-                logger.info(f"✅ WebSocket connected")
-                self.websocket_alive = True
-                self.reconnect_attempts = 0
-                
-                def on_frame(payload):
-                    self.last_message_time = datetime.now()
-                    asyncio.create_task(self.process_message(payload))
-                
-                def on_close():
-                    logger.warning("⚠️ WebSocket cerrado")
-                    self.websocket_alive = False
-                
-                ws.on('framereceived', on_frame)
-                ws.on('close', on_close)
+            # Consumidor único y ordenado: resolved nunca adelanta a cardDealt
+            queue = FrameQueue(
+                self.process_message,
+                maxsize=config.WS_QUEUE_MAXSIZE,
+                drop_types=config.WS_QUEUE_DROP_TYPES,
+                name=ws.url[:80],
+            ).start()
+            self.frame_queues.append(queue)
             
-            page.on('websocket', handle_websocket)
+            def on_frame(payload):
+                self.last_message_time = datetime.now()
+                # Mismo mensaje recibido por otra conexión (reconexión / recarga del iframe)
+                if self.deduper.is_duplicate(payload):
+                    return
+                if self.archive:
+                    self.archive.write(payload)
+                queue.put(payload)
             
-            logger.info(f"🚀 Navegando a {self.target_url}")
-            await page.goto(self.target_url, timeout=60000)
+            def on_close():
+                logger.warning(f"⚠️ WebSocket cerrado{self._table_tag()}")
+                self.websocket_alive = False
+                queue.close()
             
-            # Esperar a que cargue la página
-            try:
-                await page.wait_for_load_state('domcontentloaded', timeout=15000)
-                logger.info("✅ Página cargada correctamente")
-            except:
-                logger.warning("⚠️ Página cargando...")
+            ws.on('framereceived', on_frame)
+            ws.on('close', on_close)
+
+        page.on('websocket', handle_websocket)
+
+    def _table_tag(self):
+        return f" [{self.table_id}]" if self.table_id else ""
+
+    async def _open_game(self, page):
+        """Navegar a la mesa y esperar la conexión WebSocket"""
+        logger.info(f"🚀 Navegando a {self.target_url}")
+        await page.goto(self.target_url, timeout=60000)
+
+        # Esperar a que cargue la página
+        try:
+            await page.wait_for_load_state('domcontentloaded', timeout=15000)
+            logger.info("✅ Página cargada correctamente")
+        except:
+            logger.warning("⚠️ Página cargando...")
+
+        # Esperar a que el WebSocket se conecte (máximo 45 segundos)
+        logger.info("⏳ Esperando conexión WebSocket...")
+        ws_timeout = 45
+        while not self.websocket_alive and ws_timeout > 0:
+            await asyncio.sleep(1)
+            ws_timeout -= 1
+
+        if self.websocket_alive:
+            logger.info(f"✅ WebSocket conectado{self._table_tag()}, iniciando...")
+        else:
+            logger.warning(
+                f"⚠️ WebSocket no conectado tras 45s{self._table_tag()}, continuando..."
+            )
+            await asyncio.sleep(5)
+
+    async def _run_bot(self):
+        """Ejecutar una sesión del bot"""
+        async with async_playwright() as p:
+            context = await _launch_context(p, self.user_data_dir)
             
-            # Esperar a que el WebSocket se conecte (máximo 45 segundos)
-            logger.info("⏳ Esperando conexión WebSocket...")
-            ws_timeout = 45
-            while not self.websocket_alive and ws_timeout > 0:
-                await asyncio.sleep(1)
-                ws_timeout -= 1
+            page = context.pages[0] if context.pages else await context.new_page()
             
-            if self.websocket_alive:
-                logger.info("✅ WebSocket conectado, iniciando...")
-            else:
-                logger.warning(
-                    "⚠️ WebSocket no conectado tras 45s, continuando..."
-                )
-                await asyncio.sleep(5)
+            self._reset_connection()
+            self._attach_page(page)
+            await self._open_game(page)
             
             # Mantener página activa
             async def keep_page_alive():
@@ -772,171 +1284,80 @@ class DragonBot:
         if not isinstance(payload, str):
             return
         
+        if sniff_type(payload) not in self.HANDLED_TYPES:
+            return
+
         try:
-            data = json.loads(payload)
-            msg_type = data.get('type')
+            msg = decode(payload)
+            if msg is None:
+                return
+            msg_type = msg.type
             
             if msg_type == 'baccarat.newGame':
-                args = data.get('args', {})
-                self.current_game_data = {
-                    'game_id': args.get('gameId'),
-                    'game_number': args.get('gameNumber'),
-                    'shoe_cards_out': args.get('shoeCardsOut')
-                }
+                started = time.perf_counter()
+                game_round = self.rounds.start(msg)
                 
-                predicted_ml, confidence_ml = self.predictor.predict_next()
-                advanced = self.strategies.get_advanced_prediction()
-                consensus = advanced.get('consensus') if advanced else None
-                predicted_st = consensus['predicted'] if consensus else None
-                confidence_st = consensus['confidence'] if consensus else 0
+                # Normalmente ya viene calculada desde encodedShoeState
+                bundle = self._next_prediction
+                precomputed = bundle is not None
+                if bundle is None:
+                    with latency.span('predict', msg_type):
+                        bundle = await self._build_prediction_bundle()
                 
-                # Debug: qué predice cada componente
-                strats_detail = ""
-                if consensus and consensus.get('strategies'):
-                    strats_detail = " | ".join([f"{s['strategy']}={s['predicted']}({s['confidence']:.0f}%)" for s in consensus['strategies']])
-                ml_str = f"{predicted_ml}({confidence_ml:.1f}%)" if predicted_ml else "None"
-                st_str = f"{predicted_st}({confidence_st:.1f}%)" if predicted_st else "None"
-                logger.info(f"🔍 ML={ml_str} | Estrategias={st_str} [{strats_detail}]")
+                predicted = bundle['predicted']
+                confidence = bundle['confidence']
+                consensus = bundle['consensus']
                 
-                if consensus and consensus.get('unanimous'):
-                    confidence_st = min(confidence_st + 5, 95)  # bonus consenso unánime
-                
-                # Fusión ML + Estrategias: usar la mejor señal para no perder predicciones
-                if predicted_ml and predicted_st:
-                    if predicted_ml == predicted_st:
-                        predicted = predicted_ml
-                        confidence = max(confidence_ml, confidence_st)
-                        if confidence > confidence_ml:
-                            logger.info(f"📈 Boost consenso: ML {confidence_ml:.1f}% + estrategias {confidence_st:.1f}% → {confidence:.1f}%")
-                    else:
-                        if confidence_st >= confidence_ml:
-                            predicted, confidence = predicted_st, confidence_st
-                            logger.info(f"🔄 Usando estrategias ({confidence:.1f}%) > ML ({confidence_ml:.1f}%)")
-                        else:
-                            predicted, confidence = predicted_ml, confidence_ml
-                elif predicted_st:
-                    predicted, confidence = predicted_st, confidence_st
-                elif predicted_ml:
-                    predicted, confidence = predicted_ml, confidence_ml
-                else:
-                    predicted, confidence = None, 0
-                
-                if predicted and self.current_game_data.get('game_id'):
+                if predicted and game_round.game_id:
                     self.last_prediction = (predicted, confidence)
-                    gid = self.current_game_data['game_id']
-                    await self.db.save_prediction(gid, predicted, confidence)
-                    if consensus and consensus.get('strategies'):
-                        await self.db.save_strategy_votes(gid, consensus['strategies'])
-                    print(self.predictor.get_recommendation())
+                    gid = game_round.game_id
                     
                     if confidence >= self.min_confidence_to_send:
-                        deep_analysis = self.strategies.get_deep_analysis()
-                        all_strategies = self.strategies.get_all_strategies_status()
-                        viz_data = self.strategies.get_visualization_data()
-                        
-                        game_name = self.current_game_data.get('game_name', 'Baccarat')
-                        # Usar stats del zapato de Evolution
-                        recent_stats = self.shoe_stats
-                        global_stats = await self.db.get_global_accuracy()
-                        
-                        player_pairs = self.shoe_stats.get(
-                            'player_pairs', 0
-                        )
-                        banker_pairs = self.shoe_stats.get(
-                            'banker_pairs', 0
-                        )
-                        
-                        # Get Lightning data and bankroll signals
-                        lightning_stats = self.lightning_tracker.get_stats()
-                        avg_multiplier = self.lightning_tracker.get_ev_multiplier()
-
-                        # Calculate EV and get betting signal
-                        # Note: confidence is in percentage (0-100), convert to 0-1
-                        confidence_decimal = confidence / 100.0
-                        signal_data = self.bankroll_manager.get_signal(
-                            predicted,
-                            confidence_decimal,
-                            avg_multiplier
+                        with latency.span('telegram', msg_type):
+                            await self._send_prediction(bundle, gid, msg.game_number, game_round)
+                        latency.record_since_frame('frame_to_telegram', msg_type)
+                        latency_ms = (time.perf_counter() - started) * 1000
+                        self.newgame_latency_ms.append(latency_ms)
+                        logger.info(
+                            f"⏱️ newGame→Telegram {latency_ms:.1f} ms "
+                            f"({'precalculada' if precomputed else 'en línea'})"
                         )
-                        
-                        session_stats = self.bankroll_manager.get_session_stats()
-                        
-                        # Check if Lightning mode is enabled (has multipliers)
-                        has_lightning = lightning_stats.get('total_rounds', 0) > 0
-                        
-                        if has_lightning:
-                            # Send Lightning prediction with EV and Kelly
-                            await self.telegram.send_lightning_prediction({
-                                'predicted': predicted,
-                                'confidence': confidence,
-                                'game_id': gid,
-                                'game_number': args.get('gameNumber'),
-                                'lightning_data': {
-                                    'avg_multiplier': avg_multiplier,
-                                    'distribution': self.lightning_tracker.format_distribution(),
-                                    'hot_table': lightning_stats.get('hot_streak', False)
-                                },
-                                'signal_data': signal_data,
-                                'session_stats': session_stats,
-                                'recent_stats': recent_stats
-                            })
-                        else:
-                            # Send regular comprehensive prediction (backward compatible)
-                            await self.telegram.send_comprehensive_prediction({
-                                'predicted': predicted,
-                                'confidence': confidence,
-                                'game_id': gid,
-                                'game_number': args.get('gameNumber'),
-                                'game_name': game_name,
-                                'timestamp': datetime.now().strftime('%H:%M:%S'),
-                                'strategies_data': {
-                                    'consensus': consensus,
-                                    'all_strategies': all_strategies
-                                },
-                                'deep_analysis': deep_analysis,
-                                'recent_stats': recent_stats,
-                                'pairs_data': {'player_pairs': player_pairs, 'banker_pairs': banker_pairs},
-                                'shoe_cards_out': self.current_game_data.get('shoe_cards_out', 0),
-                                'total_stats': global_stats,
-                                'big_road': viz_data.get('big_road', ''),
-                                'score_grid': viz_data.get('score_grid', ''),
-                                'last_results': viz_data.get('last_results', '')
-                            })
                     else:
                         logger.info(
                             f"ℹ️ Predicción {predicted} ({confidence:.1f}%) por debajo del umbral "
                             f"({self.min_confidence_to_send}%), no enviada a Telegram"
                         )
+
+                    # Persistir después del envío: fuera de la ventana de apuestas
+                    with latency.span('db.save_prediction', msg_type):
+                        await self.db.save_prediction(gid, predicted, confidence)
+                    if consensus and consensus.get('strategies'):
+                        with latency.span('db.save_strategy_votes', msg_type):
+                            await self.db.save_strategy_votes(gid, consensus['strategies'])
+                    print(bundle['recommendation'])
                 
-                logger.info(f"🎮 Nueva ronda: {args.get('gameNumber')}")
+                logger.info(f"🎮 Nueva ronda: {msg.game_number}")
             
             elif msg_type == 'baccarat.cardDealt':
-                args = data.get('args', {})
-                game_data = args.get('gameData', {})
-                
-                player_hand = game_data.get('playerHand', {})
-                banker_hand = game_data.get('bankerHand', {})
-                
-                self.current_game_data['player_cards'] = player_hand.get('cards', [])
-                self.current_game_data['banker_cards'] = banker_hand.get('cards', [])
-                self.current_game_data['player_score'] = player_hand.get('score')
-                self.current_game_data['banker_score'] = banker_hand.get('score')
+                game_round = self.rounds.round_for(msg)
+                game_round.apply_card_dealt(msg)
+                self._schedule_speculation(game_round)
             
             elif msg_type == 'baccarat.potentialMultipliers':
-                args = data.get('args', {})
-                multipliers = args.get('multipliers', {})
-                self.current_game_data['lightning_multipliers'] = multipliers
+                multipliers = msg.multipliers
+                game_round = self.rounds.round_for(msg)
+                game_round.apply_multipliers(msg)
 
                 # Record multipliers in Lightning tracker if available
                 if (
                     multipliers
-                    and self.current_game_data.get('game_id')
+                    and game_round.game_id
                     and 'player' in multipliers
                     and 'banker' in multipliers
                 ):
                     try:
                         self.lightning_tracker.record_round(
-                            self.current_game_data['game_id'],
+                            game_round.game_id,
                             multipliers
                         )
                         logger.debug(f"⚡ Multipliers recorded: {multipliers}")
@@ -944,28 +1365,26 @@ class DragonBot:
                         logger.error(f"Error recording multipliers: {e}")
             
             elif msg_type == 'baccarat.gameHistory':
-                args = data.get('args', {})
-                roads_data = args.get('roads', {})
+                roads_data = msg.roads
                 
                 if roads_data:
                     self.road_analyzer.update_from_websocket(roads_data)
                     
-                    if self.current_game_data.get('game_id'):
-                        await self.db.save_roads(self.current_game_data['game_id'], roads_data)
+                    open_round = self.rounds.open_round
+                    if open_round:
+                        await self.db.save_roads(open_round.game_id, roads_data)
             
             elif msg_type == 'baccarat.roads':
-                args = data.get('args', {})
-                self.road_analyzer.update_from_websocket(args)
+                self.road_analyzer.update_from_websocket(msg.roads)
                 
-                if self.current_game_data.get('game_id'):
-                    await self.db.save_roads(self.current_game_data['game_id'], args)
+                open_round = self.rounds.open_round
+                if open_round:
+                    await self.db.save_roads(open_round.game_id, msg.roads)
             
             elif msg_type == 'baccarat.encodedShoeState':
                 # FUENTE DE VERDAD: siempre sincronizar con Evolution
-                args = data.get('args', {})
-                history_v2 = args.get('history_v2', [])
-                stats = args.get('stats', {})
-                current_game_count = stats.get('gameCount', 0)
+                history_v2 = msg.history
+                current_game_count = msg.game_count
                 
                 if history_v2:
                     # Detectar cambio de zapato
@@ -974,36 +1393,26 @@ class DragonBot:
                         < self._last_shoe_game_count
                     ) or (current_game_count <= 1)
                     
-                    # Sincronizar estrategias
-                    self.strategies.sync_from_shoe_history(
-                        history_v2
-                    )
+                    # Normalmente llega el mismo zapato + 1 ronda: aplicar solo la cola
+                    mode, new_rounds = self.shoe_sync.diff(history_v2, is_new_shoe)
                     
-                    # Sincronizar predictor ML
-                    self.predictor.history.clear()
-                    self.predictor.score_history.clear()
-                    for game in history_v2:
-                        self.predictor.add_round(
-                            game.get('winner'),
-                            game.get('player_score', 0),
-                            game.get('banker_score', 0)
-                        )
+                    if mode == RESYNC:
+                        # Sincronizar estrategias y predictor ML desde cero
+                        self.strategies.sync_from_shoe_history(history_v2)
+                        self.predictor.history.clear()
+                        self.predictor.score_history.clear()
+                    elif mode == DELTA:
+                        self.strategies.extend_from_shoe_history(new_rounds)
+
+                    self._apply_shoe_rounds(new_rounds)
                     
                     # Guardar stats reales del zapato
                     self.shoe_stats = {
-                        'player': stats.get(
-                            'playerWins', 0
-                        ),
-                        'banker': stats.get(
-                            'bankerWins', 0
-                        ),
-                        'tie': stats.get('ties', 0),
-                        'player_pairs': stats.get(
-                            'playerPairs', 0
-                        ),
-                        'banker_pairs': stats.get(
-                            'bankerPairs', 0
-                        ),
+                        'player': msg.player_wins,
+                        'banker': msg.banker_wins,
+                        'tie': msg.ties,
+                        'player_pairs': msg.player_pairs,
+                        'banker_pairs': msg.banker_pairs,
                     }
                     
                     if not self._shoe_synced or is_new_shoe:
@@ -1020,49 +1429,53 @@ class DragonBot:
                         logger.info(
                             "🆕 Nuevo zapato detectado"
                         )
+
+                    # Historial final de la ronda: dejar lista la predicción de la próxima,
+                    # salvo que la rama especulativa elegida en resolved sea esta misma ronda
+                    speculative_hit = (
+                        mode == DELTA
+                        and len(new_rounds) == 1
+                        and self._next_prediction is not None
+                        and self._speculative_key == self._branch_key(new_rounds[0])
+                    )
+                    self._speculative_key = None
+                    if not speculative_hit and (mode != UNCHANGED or self._next_prediction is None):
+                        await self._precompute_prediction()
                 
                 self._last_shoe_game_count = current_game_count
             
             elif msg_type == 'baccarat.resolved':
-                args = data.get('args', {})
-                result = args.get('result', {})
-                
-                winner = result.get('winner')
-                game_id = args.get('gameId') or self.current_game_data.get('game_id')
-                game_number = args.get('gameNumber') or self.current_game_data.get('game_number')
+                # La predicción precalculada ya no corresponde a la próxima ronda
+                self._next_prediction = None
+                game_round = self.rounds.resolve(msg)
+                winner = game_round.winner
+                game_id = game_round.game_id
+                game_number = game_round.game_number
                 
                 if not game_id or not winner:
                     return
                 
-                player_score = result.get('playerScore', 0)
-                banker_score = result.get('bankerScore', 0)
-                player_pair = result.get('playerPair', False)
-                banker_pair = result.get('bankerPair', False)
+                player_score = game_round.player_score or 0
+                banker_score = game_round.banker_score or 0
                 
-                round_data = {
-                    'game_id': game_id,
-                    'game_number': game_number,
-                    'winner': winner,
-                    'player_score': player_score,
-                    'banker_score': banker_score,
-                    'player_pair': player_pair,
-                    'banker_pair': banker_pair,
-                    'is_natural': result.get('natural', False),
-                    'winning_spots': args.get('winningSpots', []),
-                    'with_lightning': args.get('withLightning', False),
-                    'shoe_cards_out': self.current_game_data.get('shoe_cards_out'),
-                    'total_winners': self.current_game_data.get('total_winners'),
-                    'total_amount': self.current_game_data.get('total_amount'),
-                    'player_cards': self.current_game_data.get('player_cards', []),
-                    'banker_cards': self.current_game_data.get('banker_cards', []),
-                    'lightning_multipliers': self.current_game_data.get('lightning_multipliers', {})
-                }
+                round_data = game_round.to_dict()
+                round_data['player_score'] = player_score
+                round_data['banker_score'] = banker_score
+                round_data['table_id'] = self.table_id
                 
-                await self.db.save_round(round_data)
+                # Guardar ronda y SIEMPRE actualizar resultados en DB (incluso tras
+                # reinicios): una transacción, con los totales que usa el mensaje
+                report_due = bool(self.last_prediction) and self._strategy_report_count + 1 >= 30
+                with latency.span('db.resolve_round', msg_type):
+                    resolved = await self.db.resolve_round(
+                        round_data,
+                        include_totals=bool(self.last_prediction),
+                        include_accuracy=report_due,
+                    )
+                ml_updated = resolved['predictions_updated']
                 
-                # SIEMPRE actualizar resultados en DB (incluso tras reinicios)
-                ml_updated = await self.db.update_prediction_result(game_id, winner)
-                sv_updated = await self.db.update_strategy_votes_result(game_id, winner)
+                # Rama especulativa calculada durante cardDealt para este resultado
+                await self._select_speculative_branch(game_round)
                 
                 if self.last_prediction:
                     self._strategy_report_count += 1
@@ -1075,12 +1488,14 @@ class DragonBot:
                     # Reporte de precisión por estrategia cada 30 rondas resueltas
                     if self._strategy_report_count >= 30:
                         self._strategy_report_count = 0
-                        acc_list = await self.db.get_strategy_accuracy(min_votes=3)
+                        acc_list = resolved['strategy_accuracy']
                         if acc_list:
                             lines = ["📊 <b>Precisión por estrategia</b> (uso real)\n"]
                             for i, row in enumerate(acc_list[:8], 1):
                                 lines.append(
-                                    f"  {i}. {row['strategy']}: {row['accuracy']:.1f}% ({row['correct']}/{row['total']})"
+                                    f"  {i}. {row['strategy']}: {row['accuracy']:.1f}% "
+                                    f"({row['correct']}/{row['total']}) "
+                                    f"· últ. {row['recent_total']}: {row['recent_accuracy']:.0f}%"
                                 )
                             report = "\n".join(lines)
                             logger.info(f"Precisión estrategias:\n{report}")
@@ -1088,7 +1503,7 @@ class DragonBot:
                     
                     # Stats del zapato de Evolution
                     recent_stats = self.shoe_stats
-                    total_stats = await self.db.get_total_prediction_stats()
+                    total_stats = resolved['total_stats']
                     
                     await self.telegram.send_result({
                         'predicted': predicted,
@@ -1097,11 +1512,11 @@ class DragonBot:
                         'confidence': confidence,
                         'game_id': game_id,
                         'game_number': game_number,
-                        'player_cards': self.current_game_data.get('player_cards', []),
-                        'banker_cards': self.current_game_data.get('banker_cards', []),
+                        'player_cards': round_data['player_cards'],
+                        'banker_cards': round_data['banker_cards'],
                         'player_score': player_score,
                         'banker_score': banker_score,
-                        'shoe_cards_out': self.current_game_data.get('shoe_cards_out', 0),
+                        'shoe_cards_out': game_round.shoe_cards_out or 0,
                         'recent_stats': recent_stats,
                         'total_stats': total_stats
                     })
@@ -1113,22 +1528,103 @@ class DragonBot:
                 # es la fuente de verdad y llega justo después
                 # Re-entrenar ML cada 30 rondas con todos los datos
                 if len(self.predictor.history) % 30 == 0 and len(self.predictor.history) >= 20:
-                    df = await self.db.get_recent_rounds(500)
-                    self.predictor.train(df)
+                    rounds = await self.db.get_round_arrays(500, table_id=self.table_id)
+                    self.predictor.train(rounds)
+                    # Modelo nuevo: la rama especulativa ya no vale
+                    self._next_prediction = None
+                    self._speculative_key = None
                 
-                self.current_game_data = {}
                 self.last_prediction = None
             
             elif msg_type == 'baccarat.gameWinners':
-                args = data.get('args', {})
-                if self.current_game_data.get('game_id'):
-                    self.current_game_data['total_winners'] = args.get('totalWinners')
-                    self.current_game_data['total_amount'] = args.get('totalAmount')
+                # Suele llegar tras resolved: se asocia a su gameId, no a la siguiente ronda
+                game_round = self.rounds.round_for(msg, create=False)
+                if game_round and game_round.game_id:
+                    game_round.apply_winners(msg)
                     
         except Exception as e:
             if str(e):
                 logger.warning(f"⚠️ Error procesando mensaje: {e}")
 
+async def _launch_context(p, user_data_dir):
+    """Chrome persistente compartido por todas las mesas"""
+    os.makedirs(user_data_dir, exist_ok=True)
+    return await p.chromium.launch_persistent_context(
+        user_data_dir=user_data_dir,
+        headless=False,
+        channel='chrome',
+        args=[
+            '--no-sandbox',
+            '--disable-setuid-sandbox',
+            '--disable-blink-features=AutomationControlled'
+        ],
+        viewport={'width': 1920, 'height': 1080}
+    )
+
+
+async def run_tables(bots, user_data_dir='./browser_data'):
+    """
+    Modo multi-mesa: un solo navegador, una pestaña por DragonBot
+
+    Cada bot conserva su estado por mesa (estrategias, roads, historial ML,
+    lightning tracker); DB, Telegram, deduplicación y archivo de frames se
+    comparten, y sus comprobaciones periódicas las hace solo el primer bot.
+    Si una mesa pierde su WebSocket solo se recarga su pestaña.
+    """
+    shared = bots[0]
+    for bot in bots:
+        bot.deduper = shared.deduper
+        bot.archive = shared.archive
+        await bot.initialize_ml()
+    if shared.archive:
+        shared.archive.start()
+
+    while True:
+        health_checks = {}
+        try:
+            async with async_playwright() as p:
+                context = await _launch_context(p, user_data_dir)
+                pages = {}
+                for bot in bots:
+                    page = await context.new_page()
+                    bot._reset_connection()
+                    bot._attach_page(page)
+                    pages[bot] = page
+                    await bot._open_game(page)
+                    health_checks[bot] = asyncio.create_task(
+                        bot.check_websocket_health(process_wide=bot is shared)
+                    )
+
+                try:
+                    while True:
+                        await asyncio.sleep(5)
+                        for bot in bots:
+                            if bot.websocket_alive:
+                                continue
+                            logger.warning(
+                                f"⚠️ Conexión perdida{bot._table_tag()}, recargando pestaña..."
+                            )
+                            health_checks[bot].cancel()
+                            bot._reset_connection()
+                            await bot._open_game(pages[bot])
+                            health_checks[bot] = asyncio.create_task(
+                                bot.check_websocket_health(process_wide=bot is shared)
+                            )
+                finally:
+                    for task in health_checks.values():
+                        task.cancel()
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        logger.debug(f"Error cerrando contexto: {e}")
+        except KeyboardInterrupt:
+            logger.info("⛔ Bot detenido por usuario")
+            break
+        except Exception as e:
+            logger.error(f"❌ Error en modo multi-mesa: {e}", exc_info=True)
+            await asyncio.sleep(30)
+
+
 async def main():
     DB_URL = 'postgresql://localhost/dragon_bot'
     TARGET_URL = 'https://dragonslots-1.com/es/live-casino/game/evolution/xxxtremelightningbaccarat'
@@ -1136,13 +1632,28 @@ async def main():
     db = DragonBotDB(DB_URL)
     await db.init()
     
-    bot = DragonBot(db, TARGET_URL)
+    if len(config.GAME_TABLES) > 1:
+        # GAME_TABLES=mesa=url,...: una pestaña por mesa, DB y Telegram compartidos
+        table_id, url = config.GAME_TABLES[0]
+        bot = DragonBot(db, url, table_id=table_id)
+        bots = [bot] + [
+            DragonBot(db, url, telegram=bot.telegram, table_id=table_id)
+            for table_id, url in config.GAME_TABLES[1:]
+        ]
+    else:
+        bot = DragonBot(db, TARGET_URL)
+        bots = [bot]
     
     logger.info("🚀 Dragon Bot ML + Auto-Reconexión + Estadísticas started...")
     
     try:
-        await bot.run()
+        if len(bots) > 1:
+            await run_tables(bots)
+        else:
+            await bot.run()
     finally:
+        if bot.archive:
+            await asyncio.to_thread(bot.archive.close)
         if db.pool:
             await db.pool.close()
 
@@ -3,6 +3,8 @@ import asyncio
 import asyncpg
 import json
 
+from src.queries import INSERT_ROUND, affected_rows, round_params
+
 async def load_data():
     # Conectar a BD
     conn = await asyncpg.connect('postgresql://localhost/dragon_bot')
@@ -29,24 +31,21 @@ async def load_data():
                 continue
             
             try:
-                await conn.execute('''
-                    INSERT INTO baccarat_rounds 
-                    (game_id, game_number, winner, player_score, banker_score,
-                     player_pair, banker_pair, is_natural, winning_spots, with_lightning)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
-                    ON CONFLICT (game_id) DO NOTHING
-                ''',
-                    game_id,
-                    args.get('gameNumber'),
-                    result.get('winner'),
-                    result.get('playerScore'),
-                    result.get('bankerScore'),
-                    result.get('playerPair'),
-                    result.get('bankerPair'),
-                    result.get('natural'),
-                    json.dumps(args.get('winningSpots', [])),
-                    args.get('withLightning')
-                )
+                # Misma sentencia que los bots: deduplica por round_ids (tablas particionadas)
+                status = await conn.execute(INSERT_ROUND, *round_params({
+                    'game_id': game_id,
+                    'game_number': args.get('gameNumber') or '',
+                    'winner': result.get('winner'),
+                    'player_score': result.get('playerScore'),
+                    'banker_score': result.get('bankerScore'),
+                    'player_pair': result.get('playerPair'),
+                    'banker_pair': result.get('bankerPair'),
+                    'is_natural': result.get('natural'),
+                    'winning_spots': args.get('winningSpots', []),
+                    'with_lightning': args.get('withLightning'),
+                }))
+                if not affected_rows(status):
+                    continue
                 rounds_saved += 1
                 print(f"✅ Ronda {rounds_saved}: {result.get('winner')} ({result.get('bankerScore')}-{result.get('playerScore')})")
             except Exception as e:
@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 """
 Reporte de precisión por estrategia con datos de producción.
-Ejecutar: python report_strategy_accuracy.py
+Ejecutar: python report_strategy_accuracy.py [--rebuild]
 Usa DB_URL del .env o por defecto postgresql://localhost/dragon_bot
+
+Lee el ledger strategy_accuracy (una fila por estrategia); --rebuild lo
+recuenta antes desde strategy_votes.
 """
 import asyncio
 import os
+import sys
 
 # Cargar .env si existe
 if os.path.isfile(".env"):
@@ -22,6 +26,9 @@ async def main():
     db_url = os.getenv("DB_URL", "postgresql://localhost/dragon_bot")
     db = DragonBotDB(db_url)
     await db.init()
+    if "--rebuild" in sys.argv[1:]:
+        strategies = await db.rebuild_strategy_accuracy()
+        print(f"strategy_accuracy reconstruida: {strategies} estrategias")
     min_votes = int(os.getenv("MIN_VOTES_REPORT", "1"))
     acc_list = await db.get_strategy_accuracy(min_votes=min_votes)
     await db.pool.close()
@@ -31,12 +38,20 @@ async def main():
         print("El bot registra cada voto al predecir y actualiza al resolver.")
         return
     
-    print("\n" + "=" * 50)
+    print("\n" + "=" * 78)
     print("  PRECISIÓN POR ESTRATEGIA (uso real)")
-    print("=" * 50)
+    print(f"  {'':25}{'Total':>6}{'':16}{'Últimas':>8}{'Inicio':>8}{'Medio':>8}{'Final':>8}")
+    print("=" * 78)
     for i, row in enumerate(acc_list, 1):
-        print(f"  {i:2}. {row['strategy']:20} {row['accuracy']:5.1f}%  ({row['correct']}/{row['total']})")
-    print("=" * 50 + "\n")
+        phases = row['phases']
+        counts = f"({row['correct']}/{row['total']})"
+        print(
+            f"  {i:2}. {row['strategy']:20} {row['accuracy']:5.1f}% {counts:>14}"
+            f"{row['recent_accuracy']:8.1f}%"
+            f"{phases['early']['accuracy']:7.1f}%{phases['middle']['accuracy']:7.1f}%"
+            f"{phases['late']['accuracy']:7.1f}%"
+        )
+    print("=" * 78 + "\n")
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -22,6 +22,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from config import config
 from database import db
+from src.latency import latency
 
 # ============== Lifespan ==============
 
@@ -58,6 +59,7 @@ app.add_middleware(
 # ============== Models ==============
 
 class BaccaratResult(BaseModel):
+    id: Optional[int] = None
     round_id: str
     timestamp: str
     result: str  # P, B, or T
@@ -100,6 +102,10 @@ class HealthResponse(BaseModel):
 
 # ============== Endpoints ==============
 
+# Columns needed by the pattern/summary endpoints (skips cards and raw_data)
+_SIMPLE_FIELDS = ["result", "player_score", "banker_score"]
+
+
 @app.get("/", tags=["Health"])
 async def root():
     """Root endpoint"""
@@ -126,19 +132,20 @@ async def health_check():
 async def get_results(
     limit: int = Query(default=100, ge=1, le=1000, description="Number of results to return"),
     table_id: Optional[str] = Query(default=None, description="Filter by table ID"),
+    before_id: Optional[int] = Query(default=None, description="Only rows older than this id"),
+    since_id: Optional[int] = Query(default=None, description="Only rows newer than this id"),
 ):
     """
-    Get recent baccarat results
+    Get recent baccarat results (newest first)
 
     - **limit**: Number of results (1-1000)
     - **table_id**: Optional filter by table
+    - **before_id**: Page back: pass the smallest `id` of the previous page
+    - **since_id**: Poll for new rows: pass the largest `id` already seen
     """
-    results = await db.get_recent_results(limit)
-
-    if table_id:
-        results = [r for r in results if r.get("table_id") == table_id]
-
-    return results
+    return await db.get_recent_results(
+        limit, before_id=before_id, since_id=since_id, table_id=table_id
+    )
 
 
 @app.get("/api/results/latest", response_model=Optional[BaccaratResult], tags=["Results"])
@@ -154,16 +161,19 @@ async def get_latest_result():
 async def get_history(
     limit: int = Query(default=100, ge=1, le=1000),
     format: str = Query(default="full", description="'full' or 'simple'"),
+    before_id: Optional[int] = Query(default=None, description="Only rows older than this id"),
 ):
     """
     Get result history in different formats
 
     - **format=simple**: Returns just results string (e.g., "PBBTPPB")
     - **format=full**: Returns full result objects
+    - **before_id**: Page back: pass the smallest `id` of the previous page
     """
-    results = await db.get_recent_results(limit)
-
     if format == "simple":
+        results = await db.get_recent_results(
+            limit, before_id=before_id, fields=_SIMPLE_FIELDS + ["timestamp"]
+        )
         # Return BacVision-compatible format
         return {
             "ok": True,
@@ -181,25 +191,43 @@ async def get_history(
             ],
         }
 
+    results = await db.get_recent_results(limit, before_id=before_id)
     return {"ok": True, "data": results}
 
 
 @app.get("/api/statistics", response_model=Statistics, tags=["Analysis"])
 async def get_statistics(
     hours: int = Query(default=24, ge=1, le=168, description="Hours to analyze (1-168)"),
+    table_id: Optional[str] = Query(default=None, description="Filter by table ID"),
 ):
     """
-    Get statistics for a time period
+    Get statistics for a time period (from the hourly rollup)
 
     - **hours**: Number of hours to analyze (default: 24)
+    - **table_id**: Optional filter by table
     """
-    return await db.get_statistics(hours)
+    return await db.get_statistics(hours, table_id=table_id)
 
 
 @app.get("/api/streak", response_model=Streak, tags=["Analysis"])
-async def get_current_streak():
-    """Get current winning streak"""
-    return await db.get_current_streak()
+async def get_current_streak(
+    table_id: Optional[str] = Query(default=None, description="Filter by table ID"),
+):
+    """Get current winning streak (served from memory, no query)"""
+    return await db.get_current_streak(table_id)
+
+
+@app.get("/api/state", tags=["Analysis"])
+async def get_live_state():
+    """
+    Live table state kept in memory by the database layer
+
+    Per table: current streak, current shoe P/B/T and pair counters, last
+    result and counts of the last results window. A process that does not
+    store results itself (run.py --api-only) first counts the rows stored
+    since its last read.
+    """
+    return await db.get_live_state()
 
 
 @app.get("/api/pattern", tags=["Analysis"])
@@ -209,7 +237,7 @@ async def get_pattern(length: int = Query(default=20, ge=5, le=100)):
 
     Returns array of results for pattern matching
     """
-    results = await db.get_recent_results(length)
+    results = await db.get_recent_results(length, fields=_SIMPLE_FIELDS + ["is_natural"])
 
     # Reverse to get chronological order (oldest first)
     results = list(reversed(results))
@@ -237,7 +265,7 @@ async def get_roads_data(limit: int = Query(default=50, ge=10, le=200)):
     """
     Get data formatted for Big Road and derived roads analysis
     """
-    results = await db.get_recent_results(limit)
+    results = await db.get_recent_results(limit, fields=["result"])
     results = list(reversed(results))  # Chronological order
 
     # Build Big Road format
@@ -274,6 +302,17 @@ async def get_roads_data(limit: int = Query(default=50, ge=10, le=200)):
     }
 
 
+@app.get("/api/metrics/latency", tags=["Metrics"])
+async def get_latency_metrics():
+    """
+    Per-stage latency histograms of the ingestion pipeline (this process)
+
+    Stages: queue_wait, decode, handle, db.insert_result, webhook, frame_to_db.
+    Each stage has count/mean/p50/p95/p99/max in ms per message type.
+    """
+    return latency.snapshot()
+
+
 # ============== Run Server ==============
 
 
@@ -3,6 +3,7 @@ Configuration for Evolution Gaming Baccarat Scraper
 """
 import os
 from pathlib import Path
+from typing import List, Tuple
 
 from dotenv import load_dotenv
 
@@ -11,6 +12,16 @@ BASE_DIR = Path(__file__).parent.parent
 load_dotenv(BASE_DIR / ".env")
 
 
+def _parse_tables(spec: str) -> List[Tuple[str, str]]:
+    """Parse "table_id=url,table_id=url" into [(table_id, url), ...]"""
+    tables = []
+    for entry in spec.split(","):
+        table_id, sep, url = entry.strip().partition("=")
+        if sep and table_id.strip() and url.strip():
+            tables.append((table_id.strip(), url.strip()))
+    return tables
+
+
 class Config:
     """Scraper configuration"""
 
@@ -25,6 +36,9 @@ class Config:
         "https://dragonslots-1.com/es/live-casino/game/evolution/xxxtremelightningbaccarat"
     )
     GAME_TABLE_ID = os.getenv("GAME_TABLE_ID", "xxxtremelightningbaccarat")
+    # Multi-table mode: one page per table in the same browser context
+    # (empty = only GAME_TABLE_ID at GAME_URL)
+    GAME_TABLES = _parse_tables(os.getenv("GAME_TABLES", ""))
 
     # Browser
     HEADLESS = os.getenv("HEADLESS", "false").lower() == "true"
@@ -45,6 +59,19 @@ class Config:
 
     # Database
     DATABASE_PATH = BASE_DIR / os.getenv("DATABASE_PATH", "data/results.db")
+    # Write-behind: insert_result() defers the commit and group-commits every
+    # DB_BATCH_ROWS rows or DB_BATCH_MS milliseconds (and on close)
+    DB_WRITE_BEHIND = os.getenv("DB_WRITE_BEHIND", "false").lower() == "true"
+    DB_BATCH_ROWS = int(os.getenv("DB_BATCH_ROWS", "50"))
+    DB_BATCH_MS = int(os.getenv("DB_BATCH_MS", "1000"))
+    # Crash safety of each commit: FULL (fsync every commit), NORMAL or OFF
+    # (NORMAL in WAL mode only risks the last commits on power loss, never corruption)
+    DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL").upper()
+    # WAL lets the API read while the scraper writes; get_* use a read-only pool
+    DB_WAL = os.getenv("DB_WAL", "true").lower() == "true"
+    DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "2"))  # 0 = reads use the writer
+    DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+    DB_MMAP_SIZE_MB = int(os.getenv("DB_MMAP_SIZE_MB", "128"))
 
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -64,6 +91,38 @@ class Config:
     MAX_RECONNECT_ATTEMPTS = int(os.getenv("MAX_RECONNECT_ATTEMPTS", "5"))
     STORAGE_STATE_PATH = BASE_DIR / os.getenv("STORAGE_STATE_PATH", "storage_state.json")
 
+    # WebSocket ingestion queue (per connection)
+    WS_QUEUE_MAXSIZE = int(os.getenv("WS_QUEUE_MAXSIZE", "1000"))
+    WS_QUEUE_DROP_TYPES = [
+        t.strip()
+        for t in os.getenv("WS_QUEUE_DROP_TYPES", "baccarat.roads,baccarat.gameHistory").split(",")
+        if t.strip()
+    ]
+
+    # Frame de-duplication across WebSocket connections (by id and gameId+type)
+    WS_DEDUPE_MAX_ENTRIES = int(os.getenv("WS_DEDUPE_MAX_ENTRIES", "4096"))
+    WS_DEDUPE_WINDOW_SECONDS = float(os.getenv("WS_DEDUPE_WINDOW_SECONDS", "600"))
+
+    # Raw frame archive (compressed NDJSON segments, written off the event loop);
+    # segments rotate at FRAME_ARCHIVE_SEGMENT_MB compressed on disk
+    FRAME_ARCHIVE_ENABLED = os.getenv("FRAME_ARCHIVE_ENABLED", "true").lower() == "true"
+    FRAME_ARCHIVE_DIR = BASE_DIR / os.getenv("FRAME_ARCHIVE_DIR", "data/frames")
+    FRAME_ARCHIVE_SEGMENT_MB = int(os.getenv("FRAME_ARCHIVE_SEGMENT_MB", "64"))
+    FRAME_ARCHIVE_SEGMENT_MINUTES = int(os.getenv("FRAME_ARCHIVE_SEGMENT_MINUTES", "60"))
+    FRAME_ARCHIVE_COMPRESSION = os.getenv("FRAME_ARCHIVE_COMPRESSION", "auto")  # auto|zstd|gzip
+
+    # Per-stage latency histograms (logged periodically, served at /api/metrics/latency)
+    LATENCY_METRICS_ENABLED = os.getenv("LATENCY_METRICS_ENABLED", "true").lower() == "true"
+    LATENCY_LOG_INTERVAL_SECONDS = int(os.getenv("LATENCY_LOG_INTERVAL_SECONDS", "300"))
+
+    # Dragon Bot (Postgres): monthly partitions created ahead of the current month
+    PG_PARTITIONS_AHEAD = int(os.getenv("PG_PARTITIONS_AHEAD", "3"))
+
+    # Dragon Bot: build the next prediction on encodedShoeState instead of newGame
+    PRECOMPUTE_PREDICTION = os.getenv("PRECOMPUTE_PREDICTION", "true").lower() == "true"
+    # Dragon Bot: while cards are dealt, precompute the prediction for the outcome the scores give
+    SPECULATIVE_PREDICTION = os.getenv("SPECULATIVE_PREDICTION", "true").lower() == "true"
+
     # Anti-Detection
     USER_AGENT = os.getenv(
         "USER_AGENT",
@@ -1,75 +1,363 @@
 """
 Database handler for Evolution Gaming Baccarat Scraper
 Stores results in SQLite for persistence and analysis
+
+Connections: one writer connection (inserts, schema) plus a small pool of
+read-only connections used by the get_* methods. In WAL mode (DB_WAL) the
+readers never wait behind the writer's commits.
+
+Write-behind mode (DB_WRITE_BEHIND): insert_result() still executes each
+INSERT immediately, so duplicates are detected and rounds_captured stays
+exact, but the commit (and its fsync) is shared by up to DB_BATCH_ROWS rows
+or DB_BATCH_MS milliseconds. Pool readers see a batch once it is committed;
+a crash can lose at most the pending batch.
+
+Bulky payloads (cards, lightning cards, multipliers, raw Evolution result)
+live in result_payloads as one zlib-compressed JSON blob per round_id, so
+baccarat_results only holds the small columns that queries scan. Databases
+created with the old wide table are migrated (and checked) on connect.
+
+Hourly rollup: each new result also bumps its (table_id, hour) row in
+hourly_stats inside the same transaction, and get_statistics() sums at most
+168 of those rows instead of scanning baccarat_results. Rebuild the rollup
+of an existing database with:
+    python -m src.database --rebuild-rollups
 """
+import argparse
 import asyncio
 import json
 import logging
+import sys
+import zlib
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import aiosqlite
 
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
 from config import config
+from live_state import LiveState, is_pair
+from round_arrays import RoundArrays, round_arrays
 
 logger = logging.getLogger(__name__)
 
+_SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+# Recent rows replayed into the live state on connect (covers the current
+# shoe and streak of several tables)
+_LIVE_STATE_ROWS = 2000
+_LIVE_COLUMNS = "id, round_id, result, table_id, shoe_id, player_pair, banker_pair"
+
+# get_round_arrays, newest first: one statement per filter (all tables / one
+# table), like recent_rounds / recent_rounds_by_table, so each keeps its plan
+_ROUND_ARRAYS_SQL = """
+    SELECT result AS winner, player_score, banker_score,
+           player_pair, banker_pair, is_natural
+    FROM baccarat_results
+    {where}
+    ORDER BY id DESC
+    LIMIT ?
+"""
+
+RESULT_COLUMNS = (
+    'id', 'round_id', 'timestamp', 'result', 'player_score', 'banker_score',
+    'player_cards', 'banker_cards', 'player_third_card', 'banker_third_card',
+    'is_natural', 'player_pair', 'banker_pair', 'lightning_cards', 'multipliers',
+    'table_id', 'shoe_id', 'raw_data', 'created_at',
+)
+# Fields stored in result_payloads, with their default when missing from a result
+PAYLOAD_FIELDS = {
+    'player_cards': list, 'banker_cards': list, 'lightning_cards': list,
+    'multipliers': dict, 'raw_data': dict,
+}
+
+_RESULTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        round_id TEXT UNIQUE NOT NULL,
+        timestamp TEXT NOT NULL,
+        result TEXT NOT NULL CHECK(result IN ('P', 'B', 'T')),
+        player_score INTEGER,
+        banker_score INTEGER,
+        player_third_card TEXT,
+        banker_third_card TEXT,
+        is_natural INTEGER DEFAULT 0,
+        player_pair INTEGER DEFAULT 0,
+        banker_pair INTEGER DEFAULT 0,
+        table_id TEXT,
+        shoe_id TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+_RESULTS_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_timestamp ON baccarat_results(timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_result ON baccarat_results(result)",
+    "CREATE INDEX IF NOT EXISTS idx_table_id ON baccarat_results(table_id)",
+    "CREATE INDEX IF NOT EXISTS idx_shoe_id ON baccarat_results(shoe_id)",
+)
+# Columns copied as-is when migrating the old wide table
+_HOT_COLUMNS = (
+    'id', 'round_id', 'timestamp', 'result', 'player_score', 'banker_score',
+    'player_third_card', 'banker_third_card', 'is_natural', 'table_id', 'shoe_id',
+    'created_at',
+)
+_MIGRATION_BATCH = 5000
+
+
+# Hour bucket of a result timestamp (ISO-8601, with or without 'T'/'Z')
+_HOUR_BUCKET = "strftime('%Y-%m-%d %H:00:00', {ts})"
+
+_ROLLUP_UPSERT = f"""
+    INSERT INTO hourly_stats (
+        table_id, hour, total, player_wins, banker_wins, ties,
+        player_score_sum, player_score_count, banker_score_sum, banker_score_count, naturals
+    ) VALUES (
+        COALESCE(:table_id, ''), {_HOUR_BUCKET.format(ts=':timestamp')}, 1,
+        :result = 'P', :result = 'B', :result = 'T',
+        COALESCE(:player_score, 0), :player_score IS NOT NULL,
+        COALESCE(:banker_score, 0), :banker_score IS NOT NULL, :is_natural
+    )
+    ON CONFLICT (table_id, hour) DO UPDATE SET
+        total = total + 1,
+        player_wins = player_wins + excluded.player_wins,
+        banker_wins = banker_wins + excluded.banker_wins,
+        ties = ties + excluded.ties,
+        player_score_sum = player_score_sum + excluded.player_score_sum,
+        player_score_count = player_score_count + excluded.player_score_count,
+        banker_score_sum = banker_score_sum + excluded.banker_score_sum,
+        banker_score_count = banker_score_count + excluded.banker_score_count,
+        naturals = naturals + excluded.naturals
+"""
+
+# get_statistics: one statement per filter (all tables by idx_hourly_stats_hour,
+# one table by the primary key), like _ROUND_ARRAYS_SQL
+_STATISTICS_SQL = f"""
+    SELECT
+        SUM(total) as total,
+        SUM(player_wins) as player_wins,
+        SUM(banker_wins) as banker_wins,
+        SUM(ties) as ties,
+        SUM(player_score_sum) * 1.0 / SUM(player_score_count) as avg_player_score,
+        SUM(banker_score_sum) * 1.0 / SUM(banker_score_count) as avg_banker_score
+    FROM hourly_stats
+    WHERE hour >= {_HOUR_BUCKET.format(ts="'now', ?")}{{table}}
+"""
+
+
+# Payload blobs: one format byte, then zlib-compressed compact JSON. Payloads
+# are ~300 bytes, too small for zlib to learn from, so format 1 primes it with
+# a preset dictionary of the usual keys (halves the blob). Never edit
+# _PAYLOAD_ZDICT: add a new format instead.
+_PAYLOAD_FORMAT = 1
+_PAYLOAD_ZDICT = (
+    b'{"player_cards":["10S","AH"],"banker_cards":["KD","QC"],"lightning_cards":["JS"],'
+    b'"multipliers":{"2H":2,"3D":3,"4C":4,"5S":5,"8H":8},"raw_data":{"winner":"Player",'
+    b'"playerScore":1,"bankerScore":2,"playerPair":false,"bankerPair":false,'
+    b'"natural":false,"gameId":"'
+)
+
+
+def pack_payload(values: Dict[str, Any]) -> bytes:
+    """Compressed JSON blob of the payload fields of a result"""
+    payload = {
+        field: values[field] if field in values else default()
+        for field, default in PAYLOAD_FIELDS.items()
+    }
+    data = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    compressor = zlib.compressobj(6, zdict=_PAYLOAD_ZDICT)
+    return bytes((_PAYLOAD_FORMAT,)) + compressor.compress(data) + compressor.flush()
+
+
+def unpack_payload(blob: Optional[bytes]) -> Dict[str, Any]:
+    if not blob:
+        return {}
+    if blob[0] != _PAYLOAD_FORMAT:
+        raise ValueError(f"Unknown payload format {blob[0]}")
+    return json.loads(zlib.decompressobj(zdict=_PAYLOAD_ZDICT).decompress(blob[1:]))
+
+
+def _legacy_value(text: Optional[str]) -> Any:
+    """Value of an old JSON text column as get_recent_results used to return it"""
+    if not text:
+        return text
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return text
+
+
+def _pair_flags(result: Dict[str, Any]) -> Tuple[bool, bool]:
+    # Pair flags come with scraped results; otherwise derive them from the cards
+    player_pair = result.get('player_pair')
+    banker_pair = result.get('banker_pair')
+    return (
+        is_pair(result.get('player_cards')) if player_pair is None else bool(player_pair),
+        is_pair(result.get('banker_cards')) if banker_pair is None else bool(banker_pair),
+    )
+
+
+def _select_columns(fields: Optional[List[str]]) -> List[str]:
+    """Validated column list for a projection (all columns when fields is None)"""
+    if not fields:
+        return list(RESULT_COLUMNS)
+    unknown = [f for f in fields if f not in RESULT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown result fields: {', '.join(unknown)}")
+    return ['id'] + [f for f in dict.fromkeys(fields) if f != 'id']
+
 
 class Database:
     """Async SQLite database for baccarat results"""
 
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        write_behind: Optional[bool] = None,
+        batch_rows: Optional[int] = None,
+        batch_ms: Optional[int] = None,
+        synchronous: Optional[str] = None,
+        wal: Optional[bool] = None,
+        read_pool_size: Optional[int] = None,
+    ):
         self.db_path = db_path or config.DATABASE_PATH
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._connection: Optional[aiosqlite.Connection] = None
         self.rounds_captured: int = 0
         self.last_frame_at: Optional[str] = None
 
+        self.write_behind = config.DB_WRITE_BEHIND if write_behind is None else write_behind
+        self.batch_rows = max(1, batch_rows or config.DB_BATCH_ROWS)
+        self.batch_ms = batch_ms if batch_ms is not None else config.DB_BATCH_MS
+        self.synchronous = (synchronous or config.DB_SYNCHRONOUS).upper()
+        if self.synchronous not in _SYNCHRONOUS_LEVELS:
+            raise ValueError(
+                f"Invalid synchronous level '{self.synchronous}' "
+                f"(use one of {', '.join(_SYNCHRONOUS_LEVELS)})"
+            )
+        # An in-memory database is private to its connection: no WAL, no pool
+        in_memory = str(self.db_path) == ':memory:'
+        self.wal = (config.DB_WAL if wal is None else wal) and not in_memory
+        self.read_pool_size = max(
+            0, config.DB_READ_POOL_SIZE if read_pool_size is None else read_pool_size
+        )
+        self._pending_rows = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        # One insert_result at a time between its SAVEPOINT and RELEASE
+        self._write_lock = asyncio.Lock()
+        self.commits = 0
+        self._readers: List[aiosqlite.Connection] = []
+        # Streak / shoe / last results, updated by insert_result (see live_state.py)
+        self.live = LiveState()
+        # Highest baccarat_results id counted in self.live
+        self._live_last_id = 0
+        # Set by the first insert_result; until then reads refresh the live
+        # state from rows stored by another process (run.py --api-only)
+        self._writer = False
+        self._idle_readers: Optional[asyncio.Queue] = None
+
     async def connect(self):
         """Initialize database connection and create tables"""
         self._connection = await aiosqlite.connect(self.db_path)
         self._connection.row_factory = aiosqlite.Row
+        if self.wal:
+            await self._connection.execute("PRAGMA journal_mode = WAL")
+        await self._connection.execute(f"PRAGMA synchronous = {self.synchronous}")
+        await self._apply_cache_pragmas(self._connection)
         await self._create_tables()
+        await self._migrate_payloads()
         await self._load_initial_stats()
-        logger.info(f"Database connected: {self.db_path}")
+        await self._ensure_rollups()
+        await self._load_live_state()
+        await self._open_read_pool()
+        logger.info(
+            f"Database connected: {self.db_path} "
+            f"({'WAL' if self.wal else 'rollback journal'}, {len(self._readers)} readers)"
+        )
+
+    @staticmethod
+    async def _apply_cache_pragmas(conn: aiosqlite.Connection):
+        await conn.execute(f"PRAGMA cache_size = -{config.DB_CACHE_SIZE_KB}")
+        await conn.execute(f"PRAGMA mmap_size = {config.DB_MMAP_SIZE_MB * 1024 * 1024}")
+        await conn.execute("PRAGMA temp_store = MEMORY")
+
+    async def _open_read_pool(self):
+        """Read-only connections for get_* (skipped without WAL: readers would block)"""
+        if not self.wal or not self.read_pool_size:
+            return
+        self._idle_readers = asyncio.Queue()
+        uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+        for _ in range(self.read_pool_size):
+            conn = await aiosqlite.connect(uri, uri=True)
+            conn.row_factory = aiosqlite.Row
+            await conn.execute("PRAGMA query_only = ON")
+            await conn.execute("PRAGMA busy_timeout = 5000")
+            await self._apply_cache_pragmas(conn)
+            self._readers.append(conn)
+            self._idle_readers.put_nowait(conn)
+
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a pooled read connection (the writer connection if there is no pool)"""
+        if self._idle_readers is None:
+            yield self._connection
+            return
+        conn = await self._idle_readers.get()
+        try:
+            yield conn
+        finally:
+            self._idle_readers.put_nowait(conn)
 
     async def close(self):
-        """Close database connection"""
+        """Close database connection (committing any write-behind batch first)"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
         if self._connection:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing pending results on close: {e}")
+            for reader in self._readers:
+                await reader.close()
+            self._readers = []
+            self._idle_readers = None
             await self._connection.close()
             self._connection = None
             logger.info("Database connection closed")
 
     async def _create_tables(self):
         """Create necessary tables if they don't exist"""
+        # Main results table (small columns only) and its indexes
+        await self._connection.execute(_RESULTS_TABLE.format(name='baccarat_results'))
+        for statement in _RESULTS_INDEXES:
+            await self._connection.execute(statement)
         await self._connection.executescript("""
-            -- Main results table
-            CREATE TABLE IF NOT EXISTS baccarat_results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                round_id TEXT UNIQUE NOT NULL,
-                timestamp TEXT NOT NULL,
-                result TEXT NOT NULL CHECK(result IN ('P', 'B', 'T')),
-                player_score INTEGER,
-                banker_score INTEGER,
-                player_cards TEXT,
-                banker_cards TEXT,
-                player_third_card TEXT,
-                banker_third_card TEXT,
-                is_natural INTEGER DEFAULT 0,
-                lightning_cards TEXT,
-                multipliers TEXT,
-                table_id TEXT,
-                shoe_id TEXT,
-                raw_data TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            );
-
-            -- Index for fast queries
-            CREATE INDEX IF NOT EXISTS idx_timestamp ON baccarat_results(timestamp);
-            CREATE INDEX IF NOT EXISTS idx_result ON baccarat_results(result);
-            CREATE INDEX IF NOT EXISTS idx_table_id ON baccarat_results(table_id);
-            CREATE INDEX IF NOT EXISTS idx_shoe_id ON baccarat_results(shoe_id);
+            -- Cards, multipliers and raw result of each round (compressed JSON)
+            CREATE TABLE IF NOT EXISTS result_payloads (
+                round_id TEXT PRIMARY KEY,
+                payload BLOB NOT NULL
+            ) WITHOUT ROWID;
+
+            -- Per-table, per-hour counters maintained by insert_result
+            CREATE TABLE IF NOT EXISTS hourly_stats (
+                table_id TEXT NOT NULL,
+                hour TEXT NOT NULL,
+                total INTEGER NOT NULL DEFAULT 0,
+                player_wins INTEGER NOT NULL DEFAULT 0,
+                banker_wins INTEGER NOT NULL DEFAULT 0,
+                ties INTEGER NOT NULL DEFAULT 0,
+                player_score_sum INTEGER NOT NULL DEFAULT 0,
+                player_score_count INTEGER NOT NULL DEFAULT 0,
+                banker_score_sum INTEGER NOT NULL DEFAULT 0,
+                banker_score_count INTEGER NOT NULL DEFAULT 0,
+                naturals INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (table_id, hour)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_hourly_stats_hour ON hourly_stats(hour);
 
             -- Shoes table to track shoe changes
             CREATE TABLE IF NOT EXISTS shoes (
@@ -99,6 +387,133 @@ class Database:
         await self._connection.commit()
         logger.info("Database tables created/verified")
 
+    async def _migrate_payloads(self):
+        """Move the JSON columns of an old wide baccarat_results into result_payloads"""
+        cursor = await self._connection.execute("PRAGMA table_info(baccarat_results)")
+        columns = {row['name'] for row in await cursor.fetchall()}
+        if 'raw_data' not in columns:
+            return
+
+        conn = self._connection
+        logger.info("Migrating result payloads out of baccarat_results...")
+        await conn.execute("BEGIN IMMEDIATE")
+        try:
+            pairs = []
+            last_id = 0
+            while True:
+                cursor = await conn.execute("""
+                    SELECT id, round_id, player_cards, banker_cards,
+                           lightning_cards, multipliers, raw_data
+                    FROM baccarat_results WHERE id > ? ORDER BY id LIMIT ?
+                """, (last_id, _MIGRATION_BATCH))
+                rows = await cursor.fetchall()
+                if not rows:
+                    break
+                payloads = []
+                for row in rows:
+                    values = {field: _legacy_value(row[field]) for field in PAYLOAD_FIELDS}
+                    blob = pack_payload(values)
+                    if unpack_payload(blob) != values:
+                        raise RuntimeError(f"payload of {row['round_id']} does not round-trip")
+                    payloads.append((row['round_id'], blob))
+                    player_cards, banker_cards = values['player_cards'], values['banker_cards']
+                    if isinstance(player_cards, list) and isinstance(banker_cards, list):
+                        flags = (is_pair(player_cards), is_pair(banker_cards))
+                        if any(flags):
+                            pairs.append((int(flags[0]), int(flags[1]), row['id']))
+                await conn.executemany(
+                    "INSERT OR REPLACE INTO result_payloads (round_id, payload) VALUES (?, ?)",
+                    payloads,
+                )
+                last_id = rows[-1]['id']
+
+            hot = ', '.join(_HOT_COLUMNS)
+            await conn.execute(_RESULTS_TABLE.format(name='baccarat_results_slim'))
+            await conn.execute(
+                f"INSERT INTO baccarat_results_slim ({hot}) SELECT {hot} FROM baccarat_results"
+            )
+            await conn.executemany(
+                "UPDATE baccarat_results_slim SET player_pair = ?, banker_pair = ? WHERE id = ?",
+                pairs,
+            )
+
+            cursor = await conn.execute("""
+                SELECT (SELECT COUNT(*) FROM baccarat_results),
+                       (SELECT COUNT(*) FROM baccarat_results_slim),
+                       (SELECT COUNT(*) FROM baccarat_results_slim s
+                        JOIN result_payloads p ON p.round_id = s.round_id)
+            """)
+            old_count, new_count, with_payload = await cursor.fetchone()
+            if not old_count == new_count == with_payload:
+                raise RuntimeError(
+                    f"row counts differ (old {old_count}, new {new_count}, "
+                    f"with payload {with_payload})"
+                )
+
+            await conn.execute("DROP TABLE baccarat_results")
+            await conn.execute("ALTER TABLE baccarat_results_slim RENAME TO baccarat_results")
+            for statement in _RESULTS_INDEXES:
+                await conn.execute(statement)
+            await conn.commit()
+        except Exception as e:
+            await conn.rollback()
+            logger.error(f"Payload migration failed, database left unchanged: {e}")
+            raise
+        # Give the freed pages back to the filesystem
+        await conn.execute("VACUUM")
+        logger.info(f"Migrated {old_count} results ({len(pairs)} with pairs) to result_payloads")
+
+    async def _ensure_rollups(self):
+        """Backfill hourly_stats once for databases created before the rollup existed"""
+        cursor = await self._connection.execute("SELECT EXISTS (SELECT 1 FROM hourly_stats)")
+        if (await cursor.fetchone())[0] or not self.rounds_captured:
+            return
+        logger.info("hourly_stats empty: building it from existing results")
+        await self.rebuild_rollups()
+
+    async def _load_live_state(self):
+        """Rehydrate the in-memory streak/shoe state from the most recent rows"""
+        self.live.clear()
+        self._live_last_id = 0
+        cursor = await self._connection.execute(f"""
+            SELECT {_LIVE_COLUMNS}
+            FROM (SELECT * FROM baccarat_results ORDER BY id DESC LIMIT ?)
+            ORDER BY id
+        """, (_LIVE_STATE_ROWS,))
+        self._apply_live_rows(await cursor.fetchall())
+
+    def _apply_live_rows(self, rows):
+        for row in rows:
+            if row['id'] <= self._live_last_id:
+                continue  # Counted by a concurrent refresh
+            self._live_last_id = row['id']
+            self.live.apply(
+                row['table_id'], row['result'], shoe_id=row['shoe_id'],
+                player_pair=bool(row['player_pair']), banker_pair=bool(row['banker_pair']),
+                round_id=row['round_id'],
+            )
+
+    async def refresh_live_state(self, conn: Optional[aiosqlite.Connection] = None,
+                                 before: Optional[int] = None):
+        """
+        Count the results stored by other processes since the last one counted
+        (one primary-key range read, empty when nothing is new); `before`
+        stops short of a row this process is about to count itself
+        """
+        sql = f"SELECT {_LIVE_COLUMNS} FROM baccarat_results WHERE id > ?"
+        params: List[Any] = [self._live_last_id]
+        if before is not None:
+            sql += " AND id < ?"
+            params.append(before)
+        if conn is not None:
+            cursor = await conn.execute(sql + " ORDER BY id", params)
+            rows = await cursor.fetchall()
+        else:
+            async with self._reader() as reader:
+                cursor = await reader.execute(sql + " ORDER BY id", params)
+                rows = await cursor.fetchall()
+        self._apply_live_rows(rows)
+
     async def _load_initial_stats(self):
         """Load initial counters from database"""
         try:
@@ -111,90 +526,229 @@ class Database:
             logger.warning(f"Could not load initial stats: {e}")
 
     async def insert_result(self, result: Dict[str, Any]) -> int:
-        """Insert a new baccarat result"""
+        """
+        Insert a new baccarat result (and count it in hourly_stats)
+
+        The result row, its payload and the rollup are written under one
+        SAVEPOINT, so a failure leaves none of them for the next commit.
+        """
+        timestamp = result.get('timestamp', datetime.utcnow().isoformat())
+        player_pair, banker_pair = _pair_flags(result)
         try:
-            cursor = await self._connection.execute("""
+            async with self._write_lock:
+                cursor = await self._write_result(result, timestamp, player_pair, banker_pair)
+                if not self.write_behind:
+                    await self._connection.commit()
+                    self.commits += 1
+            if self.write_behind:
+                await self._schedule_commit()
+
+            if cursor.rowcount > 0:
+                self.rounds_captured += 1
+                logger.info(
+                    f"✅ Result saved: {result.get('result')}"
+                    f" (Round: {result.get('round_id')})"
+                )
+                return cursor.lastrowid
+            else:
+                logger.debug(f"Result already exists: {result.get('round_id')}")
+                return 0
+
+        except Exception as e:
+            logger.error(f"Error inserting result: {e}")
+            raise
+
+    async def _write_result(self, result: Dict[str, Any], timestamp: str,
+                            player_pair: bool, banker_pair: bool) -> aiosqlite.Cursor:
+        conn = self._connection
+        # Inside a transaction RELEASE keeps the rows for the (write-behind)
+        # commit; as the outermost savepoint it would commit on its own
+        if not conn.in_transaction:
+            await conn.execute("BEGIN")
+        await conn.execute("SAVEPOINT insert_result")
+        try:
+            cursor = await conn.execute("""
                 INSERT OR IGNORE INTO baccarat_results (
                     round_id, timestamp, result,
                     player_score, banker_score,
-                    player_cards, banker_cards,
                     player_third_card, banker_third_card,
-                    is_natural, lightning_cards, multipliers,
-                    table_id, shoe_id, raw_data
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    is_natural, player_pair, banker_pair,
+                    table_id, shoe_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 result.get('round_id'),
-                result.get('timestamp', datetime.utcnow().isoformat()),
+                timestamp,
                 result.get('result'),
                 result.get('player_score'),
                 result.get('banker_score'),
-                json.dumps(result.get('player_cards', [])),
-                json.dumps(result.get('banker_cards', [])),
                 result.get('player_third_card'),
                 result.get('banker_third_card'),
                 1 if result.get('is_natural') else 0,
-                json.dumps(result.get('lightning_cards', [])),
-                json.dumps(result.get('multipliers', {})),
+                int(player_pair),
+                int(banker_pair),
                 result.get('table_id'),
                 result.get('shoe_id'),
-                json.dumps(result.get('raw_data', {}))
             ))
-            await self._connection.commit()
-
             if cursor.rowcount > 0:
-                self.rounds_captured += 1
-                logger.info(
-                    f"✅ Result saved: {result.get('result')}"
-                    f" (Round: {result.get('round_id')})"
+                await conn.execute(
+                    "INSERT OR REPLACE INTO result_payloads (round_id, payload) VALUES (?, ?)",
+                    (result.get('round_id'), pack_payload(result)),
                 )
-                return cursor.lastrowid
-            else:
-                logger.debug(f"Result already exists: {result.get('round_id')}")
-                return 0
-
-        except Exception as e:
-            logger.error(f"Error inserting result: {e}")
+                await conn.execute(_ROLLUP_UPSERT, {
+                    'table_id': result.get('table_id'),
+                    'timestamp': timestamp,
+                    'result': result.get('result'),
+                    'player_score': result.get('player_score'),
+                    'banker_score': result.get('banker_score'),
+                    'is_natural': 1 if result.get('is_natural') else 0,
+                })
+        except Exception:
+            await conn.execute("ROLLBACK TO insert_result")
+            await conn.execute("RELEASE insert_result")
             raise
+        await conn.execute("RELEASE insert_result")
+
+        if cursor.rowcount > 0:
+            self._writer = True
+            if cursor.lastrowid > self._live_last_id + 1:
+                # Rows stored in between by another writer come first
+                await self.refresh_live_state(conn, before=cursor.lastrowid)
+            if cursor.lastrowid > self._live_last_id:
+                self._live_last_id = cursor.lastrowid
+                self.live.apply(
+                    result.get('table_id'), result.get('result'),
+                    shoe_id=result.get('shoe_id'), player_pair=player_pair,
+                    banker_pair=banker_pair, round_id=result.get('round_id'),
+                )
+        return cursor
+
+    async def _schedule_commit(self):
+        """Write-behind: commit now if the batch is full, otherwise within batch_ms"""
+        self._pending_rows += 1
+        if self._pending_rows >= self.batch_rows or self.batch_ms <= 0:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
 
-    async def get_recent_results(self, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get most recent results"""
-        cursor = await self._connection.execute("""
-            SELECT * FROM baccarat_results
-            ORDER BY timestamp DESC
-            LIMIT ?
-        """, (limit,))
-        rows = await cursor.fetchall()
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.batch_ms / 1000)
+            self._flush_task = None
+            await self.flush()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error committing result batch: {e}")
+
+    async def flush(self) -> int:
+        """Commit pending write-behind rows; returns how many were pending"""
+        pending, self._pending_rows = self._pending_rows, 0
+        if self._flush_task and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+        self._flush_task = None
+        if pending and self._connection:
+            # Never while an insert_result is between SAVEPOINT and RELEASE
+            async with self._write_lock:
+                await self._connection.commit()
+            self.commits += 1
+            logger.debug(f"Committed {pending} results in one transaction")
+        return pending
+
+    @property
+    def pending_rows(self) -> int:
+        return self._pending_rows
+
+    async def get_recent_results(
+        self,
+        limit: int = 100,
+        before_id: Optional[int] = None,
+        since_id: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        table_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get most recent results, newest first (by row id)
+
+        Keyset pagination: before_id pages back through history (pass the
+        smallest id of the previous page); since_id returns the next `limit`
+        rows inserted after that id (pass the largest id seen). `fields`
+        selects columns (`id` is always included); JSON columns are decoded
+        only when selected. table_id restricts the rows (and the pages) to
+        one table.
+        """
+        columns = _select_columns(fields)
+        payload_fields = [c for c in columns if c in PAYLOAD_FIELDS]
+        select = [f"r.{c}" for c in columns if c not in PAYLOAD_FIELDS]
+        sql_from = "baccarat_results r"
+        if payload_fields:
+            select.append("p.payload")
+            sql_from += " LEFT JOIN result_payloads p ON p.round_id = r.round_id"
+
+        where, params = [], []
+        if table_id is not None:
+            where.append("r.table_id = ?")
+            params.append(table_id)
+        if before_id is not None:
+            where.append("r.id < ?")
+            params.append(before_id)
+        if since_id is not None:
+            where.append("r.id > ?")
+            params.append(since_id)
+        # since_id walks forward from the cursor, everything else back from the newest row
+        order = "ASC" if since_id is not None and before_id is None else "DESC"
+        sql = f"SELECT {', '.join(select)} FROM {sql_from}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY r.id {order} LIMIT ?"
+        params.append(limit)
+
+        async with self._reader() as conn:
+            cursor = await conn.execute(sql, params)
+            rows = await cursor.fetchall()
+        if order == "ASC":
+            rows.reverse()
 
         results = []
         for row in rows:
-            result = dict(row)
-            # Parse JSON fields
-            for field in ['player_cards', 'banker_cards', 'lightning_cards',
-                          'multipliers', 'raw_data']:
-                if result.get(field):
-                    try:
-                        result[field] = json.loads(result[field])
-                    except (json.JSONDecodeError, TypeError, ValueError):
-                        pass
-            results.append(result)
+            values = dict(row)
+            if payload_fields:
+                values.update(unpack_payload(values.pop('payload')))
+            results.append({column: values.get(column) for column in columns})
 
         return results
 
-    async def get_statistics(self, hours: int = 24) -> Dict[str, Any]:
-        """Get statistics for recent period"""
-        cursor = await self._connection.execute("""
-            SELECT
-                COUNT(*) as total,
-                SUM(CASE WHEN result = 'P' THEN 1 ELSE 0 END) as player_wins,
-                SUM(CASE WHEN result = 'B' THEN 1 ELSE 0 END) as banker_wins,
-                SUM(CASE WHEN result = 'T' THEN 1 ELSE 0 END) as ties,
-                AVG(player_score) as avg_player_score,
-                AVG(banker_score) as avg_banker_score
-            FROM baccarat_results
-            WHERE timestamp > datetime('now', ?)
-        """, (f'-{hours} hours',))
-
-        row = await cursor.fetchone()
+    async def get_round_arrays(
+        self, limit: int = 500, table_id: Optional[str] = None
+    ) -> RoundArrays:
+        """Last `limit` results as columnar arrays, oldest first (see round_arrays)"""
+        async with self._reader() as conn:
+            if table_id is None:
+                cursor = await conn.execute(_ROUND_ARRAYS_SQL.format(where=""), (limit,))
+            else:
+                cursor = await conn.execute(
+                    _ROUND_ARRAYS_SQL.format(where="WHERE table_id = ?"), (table_id, limit)
+                )
+            rows = await cursor.fetchall()
+        return round_arrays(rows)
+
+    async def get_statistics(
+        self, hours: int = 24, table_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get statistics for recent period (from hourly_stats)
+
+        The window starts at the beginning of the hour `hours` ago, so it can
+        include up to one extra partial hour. table_id=None sums all tables.
+        """
+        since = f'-{hours} hours'
+        async with self._reader() as conn:
+            if table_id is None:
+                cursor = await conn.execute(_STATISTICS_SQL.format(table=""), (since,))
+            else:
+                cursor = await conn.execute(
+                    _STATISTICS_SQL.format(table=" AND table_id = ?"), (since, table_id)
+                )
+            row = await cursor.fetchone()
         total = row['total'] or 0
         safe_total = total if total > 0 else 1
 
@@ -211,33 +765,50 @@ class Database:
             'period_hours': hours
         }
 
-    async def get_current_streak(self) -> Dict[str, Any]:
-        """Get current winning streak"""
-        cursor = await self._connection.execute("""
-            SELECT result FROM baccarat_results
-            WHERE result != 'T'
-            ORDER BY timestamp DESC
-            LIMIT 50
-        """)
-        rows = await cursor.fetchall()
+    async def rebuild_rollups(self) -> int:
+        """Recompute hourly_stats from baccarat_results; returns the number of hour rows"""
+        await self.flush()
+        async with self._write_lock:
+            await self._connection.execute("DELETE FROM hourly_stats")
+            await self._connection.execute(f"""
+                INSERT INTO hourly_stats (
+                    table_id, hour, total, player_wins, banker_wins, ties,
+                    player_score_sum, player_score_count,
+                    banker_score_sum, banker_score_count, naturals
+                )
+                SELECT
+                    COALESCE(table_id, ''), {_HOUR_BUCKET.format(ts='timestamp')} as hour,
+                    COUNT(*),
+                    SUM(result = 'P'), SUM(result = 'B'), SUM(result = 'T'),
+                    COALESCE(SUM(player_score), 0), COUNT(player_score),
+                    COALESCE(SUM(banker_score), 0), COUNT(banker_score),
+                    SUM(is_natural != 0)
+                FROM baccarat_results
+                GROUP BY 1, 2
+                HAVING hour IS NOT NULL
+            """)
+            await self._connection.commit()
+        self.commits += 1
+        cursor = await self._connection.execute("SELECT COUNT(*) FROM hourly_stats")
+        hours = (await cursor.fetchone())[0]
+        logger.info(f"hourly_stats rebuilt: {hours} hour rows")
+        return hours
 
-        if not rows:
-            return {'side': None, 'length': 0}
+    async def get_current_streak(self, table_id: Optional[str] = None) -> Dict[str, Any]:
+        """Get current winning streak (from memory; ties are skipped)"""
+        await self._fresh_live_state()
+        return self.live.streak(table_id)
 
-        current_side = rows[0]['result']
-        streak = 0
+    async def get_live_state(self) -> Dict[str, Any]:
+        """Snapshot of the live state of every table (see live_state.py)"""
+        await self._fresh_live_state()
+        return self.live.snapshot()
 
-        for row in rows:
-            if row['result'] == current_side:
-                streak += 1
-            else:
-                break
-
-        return {
-            'side': 'Player' if current_side == 'P' else 'Banker',
-            'side_code': current_side,
-            'length': streak
-        }
+    async def _fresh_live_state(self):
+        # The writer counts its own rows as it stores them; a reader-only
+        # process catches up with the writer's rows before answering
+        if not self._writer:
+            await self.refresh_live_state()
 
 
 # Singleton instance
@@ -278,5 +849,18 @@ async def test_database():
     await db.close()
 
 
+async def _rebuild_rollups():
+    await db.connect()
+    try:
+        await db.rebuild_rollups()
+    finally:
+        await db.close()
+
+
 if __name__ == "__main__":
-    asyncio.run(test_database())
+    parser = argparse.ArgumentParser(description="SQLite results database")
+    parser.add_argument("--rebuild-rollups", action="store_true",
+                        help="recompute hourly_stats from baccarat_results")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_rebuild_rollups() if args.rebuild_rollups else test_database())
@@ -0,0 +1,289 @@
+"""
+Rotating, compressed archive of raw WebSocket frames
+
+Every text frame is appended to an NDJSON segment (zstd when the
+`zstandard` package is installed, gzip otherwise). Binary frames are archived
+when they hold UTF-8 text and counted as dropped otherwise. Writes happen on a
+background thread fed by a bounded queue, so the event loop never blocks on
+disk: when the queue is full the frame is counted as dropped instead.
+
+Segments rotate by compressed size on disk or by age. When a segment is closed a small sidecar
+index (<segment>.idx, JSON) records its time range, frame count, message
+types and gameIds, so replay/backfill can pick segments without opening them.
+
+Segment line format:
+    {"ts": <epoch seconds>, "type": "baccarat.resolved", "gid": "...", "raw": "<frame>"}
+
+Replay an archive directory:
+    python -m src.replay data/frames --target scraper
+"""
+import gzip
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+from src.ws_protocol import sniff_field
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional, gzip is used instead
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIXES = ('.ndjson.gz', '.ndjson.zst')
+INDEX_SUFFIX = '.idx'
+
+_STOP = object()
+
+
+def resolve_compression(compression: str = 'auto') -> str:
+    """'auto' picks zstd when zstandard is installed, gzip otherwise"""
+    if compression == 'auto':
+        return 'zstd' if zstandard is not None else 'gzip'
+    if compression == 'zstd' and zstandard is None:
+        raise ValueError("zstd compression requires the 'zstandard' package")
+    if compression not in ('zstd', 'gzip'):
+        raise ValueError(f"Unknown compression '{compression}' (use auto, zstd or gzip)")
+    return compression
+
+
+def open_segment(path: Path):
+    """Open an archive segment for reading as text (gzip or zstd)"""
+    path = Path(path)
+    if path.name.endswith('.zst'):
+        if zstandard is None:
+            raise ValueError(f"Reading {path.name} requires the 'zstandard' package")
+        import io
+
+        raw = open(path, 'rb')
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8')
+    return gzip.open(path, 'rt', encoding='utf-8')
+
+
+class _Segment:
+    """An open segment and the data for its index"""
+
+    def __init__(self, path: Path, compression: str):
+        self.path = path
+        self.opened_at = time.monotonic()
+        self.frames = 0
+        self.bytes_raw = 0
+        self.first_ts: Optional[float] = None
+        self.last_ts: Optional[float] = None
+        self.types: Dict[str, int] = {}
+        self.game_ids: Set[str] = set()
+
+        self.compression = compression
+        self._file = open(path, 'wb')
+        if compression == 'zstd':
+            self._writer = zstandard.ZstdCompressor(level=3).stream_writer(self._file)
+        else:
+            self._writer = gzip.GzipFile(fileobj=self._file, mode='wb', compresslevel=6)
+
+    @property
+    def bytes_compressed(self) -> int:
+        """Bytes on disk so far (lags by what the compressor still buffers)"""
+        return self._file.tell()
+
+    def write(self, ts: float, payload: str):
+        msg_type = sniff_field(payload, 'type')
+        game_id = sniff_field(payload, 'gameId')
+        line = json.dumps(
+            {'ts': ts, 'type': msg_type, 'gid': game_id, 'raw': payload},
+            ensure_ascii=False,
+        ).encode('utf-8') + b'\n'
+        self._writer.write(line)
+
+        self.frames += 1
+        self.bytes_raw += len(line)
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.last_ts = ts
+        if msg_type:
+            self.types[msg_type] = self.types.get(msg_type, 0) + 1
+        if game_id:
+            self.game_ids.add(game_id)
+
+    def flush(self):
+        if self.compression == 'zstd':
+            self._writer.flush(zstandard.FLUSH_BLOCK)
+        else:
+            self._writer.flush()
+
+    def close(self) -> Dict[str, Any]:
+        try:
+            self._writer.close()
+        finally:
+            self._file.close()
+        index = {
+            'segment': self.path.name,
+            'frames': self.frames,
+            'first_ts': self.first_ts,
+            'last_ts': self.last_ts,
+            'bytes_raw': self.bytes_raw,
+            'bytes_compressed': self.path.stat().st_size,
+            'types': self.types,
+            'game_ids': sorted(self.game_ids),
+        }
+        index_path = self.path.with_name(self.path.name + INDEX_SUFFIX)
+        index_path.write_text(json.dumps(index, indent=2), encoding='utf-8')
+        return index
+
+
+class FrameArchive:
+    """Append-only, segment-rotated NDJSON archive written by a background thread"""
+
+    def __init__(
+        self,
+        directory: Path,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        segment_max_seconds: float = 3600.0,
+        compression: str = 'auto',
+        queue_size: int = 10000,
+        flush_interval: float = 5.0,
+        prefix: str = 'frames',
+    ):
+        self.directory = Path(directory)
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_seconds = segment_max_seconds
+        self.compression = resolve_compression(compression)
+        self.flush_interval = flush_interval
+        self.prefix = prefix
+
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=max(1, queue_size))
+        self._thread: Optional[threading.Thread] = None
+        self._segment: Optional[_Segment] = None
+        self._sequence = 0
+
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.segments_closed = 0
+        self.bytes_compressed = 0
+
+    def start(self) -> 'FrameArchive':
+        if self._thread is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._thread = threading.Thread(
+                target=self._run, name='frame-archive', daemon=True
+            )
+            self._thread.start()
+            logger.info(f"🗄️ Frame archive: {self.directory} ({self.compression})")
+        return self
+
+    def write(self, payload: Any, received_at: Optional[float] = None) -> bool:
+        """Queue a text frame for archiving (never blocks). Returns False if dropped."""
+        if self._thread is None:
+            return False
+        if isinstance(payload, (bytes, bytearray)):
+            try:
+                payload = bytes(payload).decode('utf-8')
+            except UnicodeDecodeError:
+                payload = None
+        if not isinstance(payload, str):
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait((received_at or time.time(), payload))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout: float = 10.0):
+        """Flush queued frames, close the open segment and stop the thread"""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("⚠️ Frame archive queue full on close; pending frames lost")
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._close_segment()
+                return
+
+            try:
+                if item is not None:
+                    self._write(*item)
+                now = time.monotonic()
+                segment = self._segment
+                if segment and now - segment.opened_at >= self.segment_max_seconds:
+                    self._close_segment()
+                elif segment and now - last_flush >= self.flush_interval:
+                    segment.flush()
+                    last_flush = now
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Frame archive write error: {e}")
+
+    def _write(self, ts: float, payload: str):
+        if self._segment is None:
+            self._segment = self._open_segment()
+        self._segment.write(ts, payload)
+        self.written += 1
+        if self._segment.bytes_compressed >= self.segment_max_bytes:
+            self._close_segment()
+
+    def _open_segment(self) -> _Segment:
+        self._sequence += 1
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')
+        suffix = '.ndjson.zst' if self.compression == 'zstd' else '.ndjson.gz'
+        path = self.directory / f"{self.prefix}-{stamp}-{self._sequence:04d}{suffix}"
+        return _Segment(path, self.compression)
+
+    def _close_segment(self):
+        segment, self._segment = self._segment, None
+        if segment is None:
+            return
+        try:
+            index = segment.close()
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Frame archive error closing {segment.path.name}: {e}")
+            return
+        self.segments_closed += 1
+        self.bytes_compressed += index['bytes_compressed']
+        logger.info(
+            f"🗄️ Segment {index['segment']}: {index['frames']} frames, "
+            f"{index['bytes_raw'] / 1024:.0f} KB → {index['bytes_compressed'] / 1024:.0f} KB"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'written': self.written,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'pending': self._queue.qsize(),
+            'segments_closed': self.segments_closed,
+            'bytes_compressed': self.bytes_compressed,
+        }
+
+
+def build_archive(settings) -> Optional[FrameArchive]:
+    """FrameArchive from config (None when FRAME_ARCHIVE_ENABLED is off)"""
+    if not settings.FRAME_ARCHIVE_ENABLED:
+        return None
+    return FrameArchive(
+        settings.FRAME_ARCHIVE_DIR,
+        segment_max_bytes=settings.FRAME_ARCHIVE_SEGMENT_MB * 1024 * 1024,
+        segment_max_seconds=settings.FRAME_ARCHIVE_SEGMENT_MINUTES * 60,
+        compression=settings.FRAME_ARCHIVE_COMPRESSION,
+    )
@@ -0,0 +1,95 @@
+"""
+De-duplication of Evolution frames across WebSocket connections
+
+After reconnects or iframe reloads the same Evolution message can arrive on
+more than one socket. FrameDeduper sits in the frame callback, before the
+ingestion queue and any parsing, and drops frames already seen within a
+time window:
+- by top-level message "id" (e.g. "1771030447391-230")
+- by gameId + type for messages sent once per game (newGame, resolved, ...)
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+from src.ws_protocol import sniff_field
+
+# cardDealt, roads, etc. repeat for the same game, so they are keyed by id only
+ONCE_PER_GAME_TYPES = frozenset({
+    'baccarat.newGame',
+    'baccarat.resolved',
+    'baccarat.gameWinners',
+})
+
+
+class FrameDeduper:
+    """Bounded LRU of recently seen frame keys with a time window"""
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        window_seconds: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._seen: 'OrderedDict[tuple, float]' = OrderedDict()
+
+        self.checked = 0
+        self.duplicates = 0
+
+    def is_duplicate(self, payload: Any) -> bool:
+        """Record the frame and return True if it was already seen in the window"""
+        self.checked += 1
+        msg_id = sniff_field(payload, 'id', top_level=True)
+        msg_type = sniff_field(payload, 'type', top_level=True)
+        if msg_id is None and msg_type not in ONCE_PER_GAME_TYPES:
+            return False
+
+        now = self._clock()
+        self._expire(now)
+
+        keys = []
+        if msg_id is not None:
+            keys.append(('id', msg_id))
+        if msg_type in ONCE_PER_GAME_TYPES:
+            game_id = sniff_field(payload, 'gameId')
+            if game_id:
+                keys.append(('game', game_id, msg_type))
+
+        seen = self._seen
+        if any(key in seen for key in keys):
+            self.duplicates += 1
+            return True
+
+        for key in keys:
+            seen[key] = now
+        while len(seen) > self.max_entries:
+            seen.popitem(last=False)
+        return False
+
+    def _expire(self, now: float):
+        seen = self._seen
+        cutoff = now - self.window_seconds
+        while seen:
+            key, seen_at = next(iter(seen.items()))
+            if seen_at >= cutoff:
+                break
+            del seen[key]
+
+    def clear(self):
+        self._seen.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        return self.duplicates / self.checked if self.checked else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'checked': self.checked,
+            'duplicates': self.duplicates,
+            'hit_rate': round(self.hit_rate, 4),
+            'entries': len(self._seen),
+        }
+
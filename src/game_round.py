@@ -0,0 +1,177 @@
+"""
+Per-round state assembled from Evolution baccarat.* messages
+
+A round is built from several frames (newGame, cardDealt,
+potentialMultipliers, resolved, gameWinners) that all carry the same gameId.
+RoundAssembler keeps the last few rounds keyed by gameId, so a frame that
+arrives late for an already-resolved game is attached to that game instead
+of leaking into the next one.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class GameRound:
+    """State of a single game (one slot per field, no per-round dict)"""
+
+    __slots__ = (
+        'game_id', 'game_number', 'shoe_cards_out',
+        'player_cards', 'banker_cards', 'player_score', 'banker_score',
+        'lightning_multipliers', 'total_winners', 'total_amount',
+        'winner', 'player_pair', 'banker_pair', 'natural',
+        'winning_spots', 'with_lightning', 'resolved',
+    )
+
+    def __init__(self, game_id: Optional[str] = None, game_number: Optional[str] = None,
+                 shoe_cards_out: Optional[int] = None):
+        self.game_id = game_id
+        self.game_number = game_number
+        self.shoe_cards_out = shoe_cards_out
+        self.player_cards = ()
+        self.banker_cards = ()
+        self.player_score = None
+        self.banker_score = None
+        self.lightning_multipliers = None
+        self.total_winners = None
+        self.total_amount = None
+        self.winner = None
+        self.player_pair = False
+        self.banker_pair = False
+        self.natural = False
+        self.winning_spots = ()
+        self.with_lightning = False
+        self.resolved = False
+
+    def apply_card_dealt(self, msg):
+        self.player_cards = msg.player_cards
+        self.banker_cards = msg.banker_cards
+        self.player_score = msg.player_score
+        self.banker_score = msg.banker_score
+
+    def apply_multipliers(self, msg):
+        self.lightning_multipliers = msg.multipliers
+
+    def apply_winners(self, msg):
+        self.total_winners = msg.total_winners
+        self.total_amount = msg.total_amount
+
+    def apply_resolved(self, msg):
+        if msg.game_number:
+            self.game_number = msg.game_number
+        self.winner = msg.winner
+        self.player_score = msg.player_score
+        self.banker_score = msg.banker_score
+        self.player_pair = msg.player_pair
+        self.banker_pair = msg.banker_pair
+        self.natural = msg.natural
+        self.winning_spots = msg.winning_spots
+        self.with_lightning = msg.with_lightning
+        self.resolved = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Round in the dict shape expected by the save_round() implementations"""
+        return {
+            'game_id': self.game_id,
+            'game_number': self.game_number,
+            'winner': self.winner,
+            'player_score': self.player_score,
+            'banker_score': self.banker_score,
+            'player_pair': self.player_pair,
+            'banker_pair': self.banker_pair,
+            'is_natural': self.natural,
+            'winning_spots': list(self.winning_spots),
+            'with_lightning': self.with_lightning,
+            'shoe_cards_out': self.shoe_cards_out,
+            'total_winners': self.total_winners,
+            'total_amount': self.total_amount,
+            'player_cards': list(self.player_cards),
+            'banker_cards': list(self.banker_cards),
+            'lightning_multipliers': self.lightning_multipliers or {},
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"GameRound(game_id={self.game_id!r}, game_number={self.game_number!r}, "
+            f"winner={self.winner!r}, resolved={self.resolved})"
+        )
+
+
+class RoundAssembler:
+    """
+    Tracks recent rounds by gameId
+
+    `current` is the round opened by the latest newGame. Frames whose gameId
+    matches an older round (late cardDealt/gameWinners) update that round;
+    frames without a gameId go to the current round.
+    """
+
+    def __init__(self, keep: int = 8):
+        self.keep = max(1, keep)
+        self.rounds: 'OrderedDict[str, GameRound]' = OrderedDict()
+        self.current: Optional[GameRound] = None
+        self.late_frames = 0
+
+    def start(self, msg) -> GameRound:
+        """baccarat.newGame: open (or reopen) the round and make it current"""
+        game_round = self.rounds.get(msg.game_id) if msg.game_id else None
+        if game_round is None:
+            game_round = GameRound(msg.game_id, msg.game_number, msg.shoe_cards_out)
+            self._remember(game_round)
+        else:
+            game_round.game_number = msg.game_number
+            game_round.shoe_cards_out = msg.shoe_cards_out
+        self.current = game_round
+        return game_round
+
+    @property
+    def open_round(self) -> Optional[GameRound]:
+        """Current round if it has an id and is not resolved yet"""
+        current = self.current
+        if current is not None and current.game_id and not current.resolved:
+            return current
+        return None
+
+    def round_for(self, msg, create: bool = True) -> Optional[GameRound]:
+        """
+        Round a cardDealt/potentialMultipliers/gameWinners/resolved frame belongs to
+
+        Unknown gameIds (e.g. connected mid-round) open a new current round,
+        unless create is False.
+        """
+        game_id = getattr(msg, 'game_id', None)
+        if not game_id:
+            if self.current is None and create:
+                self.current = GameRound()
+            return self.current
+
+        game_round = self.rounds.get(game_id)
+        if game_round is None:
+            if not create:
+                return None
+            if self.current is not None and self.current.game_id is None:
+                # Round opened without an id: adopt this one
+                game_round = self.current
+                game_round.game_id = game_id
+            else:
+                game_round = GameRound(game_id)
+                self.current = game_round
+            self._remember(game_round)
+        elif game_round.resolved and msg.type != 'baccarat.resolved':
+            self.late_frames += 1
+        return game_round
+
+    def resolve(self, msg) -> GameRound:
+        """baccarat.resolved: complete the round the result belongs to"""
+        game_round = self.round_for(msg)
+        game_round.apply_resolved(msg)
+        return game_round
+
+    def _remember(self, game_round: GameRound):
+        if game_round.game_id:
+            self.rounds[game_round.game_id] = game_round
+            while len(self.rounds) > self.keep:
+                self.rounds.popitem(last=False)
+
+    def reset(self):
+        self.rounds.clear()
+        self.current = None
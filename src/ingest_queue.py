@@ -0,0 +1,167 @@
+"""
+Bounded, ordered ingestion queue for WebSocket frames
+
+Playwright delivers frames through synchronous callbacks. Instead of spawning
+one task per frame (unbounded, and frames race each other), each connection
+gets a FrameQueue: callbacks enqueue, a single consumer task processes frames
+strictly in arrival order.
+
+Time spent waiting in the queue and in the handler is recorded per message
+type (src/latency.py), and the handler runs with the frame's receipt time
+set so later stages can measure end-to-end latency.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from src.latency import latency, mark_frame_received
+from src.ws_protocol import sniff_type
+
+logger = logging.getLogger(__name__)
+
+# Frames a round is assembled from: never evicted from a queue
+ROUND_TYPES = frozenset({'baccarat.newGame', 'baccarat.cardDealt', 'baccarat.resolved'})
+
+
+def _frame_type(payload: Any) -> str:
+    """Best-effort message type of a raw frame, without decoding it"""
+    return sniff_type(payload) or 'unknown'
+
+
+class FrameQueue:
+    """
+    Per-connection bounded FIFO with a single ordered consumer
+
+    Backpressure policy when the queue is full:
+    - low-value frames (drop_types, or anything outside baccarat.*) are dropped
+    - other frames evict the oldest queued low-value frame
+    - if there is none, round frames (ROUND_TYPES) go into a bounded overflow
+      of `overflow` extra slots (default maxsize); other frames are refused
+    Queued frames other than low-value ones are never evicted. A round frame
+    refused because the overflow is full too is counted in `round_dropped`.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[Any]],
+        maxsize: int = 1000,
+        drop_types: Optional[Iterable[str]] = None,
+        name: str = 'ws',
+        overflow: Optional[int] = None,
+    ):
+        self.handler = handler
+        self.maxsize = max(1, maxsize)
+        self.overflow = self.maxsize if overflow is None else max(0, overflow)
+        self.drop_types = set(drop_types or ())
+        self.name = name
+
+        self._frames: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+        self.processed = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.dropped: Dict[str, int] = {}
+        self.round_dropped = 0
+
+    def is_low_value(self, msg_type: str) -> bool:
+        return msg_type in self.drop_types or not msg_type.startswith('baccarat.')
+
+    @property
+    def depth(self) -> int:
+        return len(self._frames)
+
+    def start(self) -> 'FrameQueue':
+        """Start the consumer task (must be called from the event loop)"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._consume())
+        return self
+
+    def put(self, payload: Any) -> bool:
+        """Enqueue a frame from a sync callback. Returns False if it was dropped."""
+        if self._closed:
+            return False
+
+        msg_type = _frame_type(payload)
+
+        if len(self._frames) >= self.maxsize:
+            if self.is_low_value(msg_type) or not self._make_room(msg_type):
+                self._count_drop(msg_type)
+                return False
+
+        self._frames.append((msg_type, payload, time.perf_counter()))
+        if len(self._frames) > self.max_depth:
+            self.max_depth = len(self._frames)
+        self._wakeup.set()
+        return True
+
+    def _make_room(self, msg_type: str) -> bool:
+        """Evict a queued low-value frame or use the round overflow; False to refuse"""
+        for index, (queued_type, _, _) in enumerate(self._frames):
+            if self.is_low_value(queued_type):
+                del self._frames[index]
+                self._count_drop(queued_type)
+                return True
+        if msg_type not in ROUND_TYPES:
+            logger.warning(f"⚠️ Frame queue {self.name} full, refused {msg_type}")
+            return False
+        if len(self._frames) < self.maxsize + self.overflow:
+            return True
+        self.round_dropped += 1
+        logger.error(f"❌ Frame queue {self.name} overflow full, lost round frame {msg_type}")
+        return False
+
+    def _count_drop(self, msg_type: str):
+        self.dropped[msg_type] = self.dropped.get(msg_type, 0) + 1
+
+    async def _consume(self):
+        while True:
+            while not self._frames:
+                if self._closed:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            msg_type, payload, received_at = self._frames.popleft()
+            started = time.perf_counter()
+            latency.record('queue_wait', msg_type, (started - received_at) * 1000)
+            mark_frame_received(received_at)
+            try:
+                await self.handler(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Frame queue {self.name} handler error on {msg_type}: {e}")
+            latency.record('handle', msg_type, (time.perf_counter() - started) * 1000)
+            self.processed += 1
+
+    def close(self):
+        """Stop accepting frames; the consumer drains what is queued and exits"""
+        self._closed = True
+        self._wakeup.set()
+
+    async def join(self, timeout: Optional[float] = None):
+        """Close and wait for queued frames to be processed"""
+        self.close()
+        if self._task:
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'depth': len(self._frames),
+            'max_depth': self.max_depth,
+            'processed': self.processed,
+            'errors': self.errors,
+            'dropped': dict(self.dropped),
+            'dropped_total': sum(self.dropped.values()),
+            'round_dropped': self.round_dropped,
+        }
@@ -0,0 +1,157 @@
+"""
+In-process latency histograms for the round pipeline
+
+Each pipeline stage (queue wait, decode, handler, prediction, DB writes,
+Telegram send, end-to-end) records its duration per message type into a
+fixed-bucket histogram: one bisect and two increments per sample, no sample
+list kept, so it can stay on in production.
+
+Frame age: FrameQueue marks when the frame being handled was received
+(a contextvar, local to each consumer task), so any stage can record time
+since receipt with since_frame_ms().
+
+Snapshot: GET /api/metrics/latency, or the periodic summary in the log.
+
+Always import it as `src.latency` (src/ modules included): under a second
+module name the process would get a second, empty recorder.
+"""
+import contextvars
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in ms, ~12% apart, from 10 µs to ~2 min
+_BUCKET_BOUNDS: List[float] = []
+_bound = 0.01
+while _bound < 120_000:
+    _BUCKET_BOUNDS.append(round(_bound, 4))
+    _bound *= 1.12
+
+_frame_received_at: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    'frame_received_at', default=None
+)
+
+
+class LatencyHistogram:
+    """Fixed log-spaced buckets; percentiles are bucket upper bounds"""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms: float):
+        self.counts[bisect_left(_BUCKET_BOUNDS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = pct / 100.0 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                bound = _BUCKET_BOUNDS[index] if index < len(_BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 3) if self.count else 0.0,
+            'p50': round(self.percentile(50), 3),
+            'p95': round(self.percentile(95), 3),
+            'p99': round(self.percentile(99), 3),
+            'max': round(self.max, 3),
+        }
+
+
+class LatencyRecorder:
+    """Histograms keyed by (stage, message type)"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._started_at = time.time()
+        self._last_log = time.monotonic()
+
+    def record(self, stage: str, msg_type: Optional[str], ms: float):
+        if not self.enabled:
+            return
+        key = (stage, msg_type or 'unknown')
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = LatencyHistogram()
+        histogram.record(ms)
+
+    @contextmanager
+    def span(self, stage: str, msg_type: Optional[str] = None) -> Iterator[None]:
+        """Time the enclosed block (sync or containing awaits)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, msg_type, (time.perf_counter() - start) * 1000)
+
+    def record_since_frame(self, stage: str, msg_type: Optional[str]):
+        """Record the age of the frame being handled (no-op outside a FrameQueue)"""
+        age = since_frame_ms()
+        if age is not None:
+            self.record(stage, msg_type, age)
+
+    def snapshot(self) -> Dict[str, Any]:
+        stages: Dict[str, Dict[str, Any]] = {}
+        for (stage, msg_type), histogram in sorted(self._histograms.items()):
+            stages.setdefault(stage, {})[msg_type] = histogram.summary()
+        return {
+            'enabled': self.enabled,
+            'since': self._started_at,
+            'stages': stages,
+        }
+
+    def reset(self):
+        self._histograms.clear()
+        self._started_at = time.time()
+
+    def log_summary(self, log: logging.Logger):
+        for stage, by_type in self.snapshot()['stages'].items():
+            for msg_type, s in by_type.items():
+                log.info(
+                    f"⏱️ {stage} [{msg_type}] n={s['count']} p50 {s['p50']:.2f} ms | "
+                    f"p95 {s['p95']:.2f} ms | p99 {s['p99']:.2f} ms | max {s['max']:.2f} ms"
+                )
+
+    def log_if_due(self, log: logging.Logger, interval_seconds: float) -> bool:
+        """Log the summary at most once per interval (called from periodic loops)"""
+        if not self.enabled or interval_seconds <= 0 or not self._histograms:
+            return False
+        now = time.monotonic()
+        if now - self._last_log < interval_seconds:
+            return False
+        self._last_log = now
+        self.log_summary(log)
+        return True
+
+
+def mark_frame_received(received_at: float):
+    """Set the receipt time (perf_counter) of the frame handled in this task"""
+    _frame_received_at.set(received_at)
+
+
+def since_frame_ms() -> Optional[float]:
+    received_at = _frame_received_at.get()
+    if received_at is None:
+        return None
+    return (time.perf_counter() - received_at) * 1000
+
+
+latency = LatencyRecorder()
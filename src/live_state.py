@@ -0,0 +1,182 @@
+"""
+Live per-table round state kept in memory
+
+Updated on every stored result (O(1) per round) so the hot read paths - the
+current streak, the current shoe's P/B/T and pair counters, the last N
+results - are served without querying the database. Each database class
+rehydrates it from its most recent rows on connect.
+
+Streaks follow the Big Road convention of the old SQL query: ties neither
+extend nor break a streak. Shoe counters reset whenever the shoe_id of a
+table changes (results without a shoe_id share one open-ended shoe).
+"""
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional
+
+RESULT_CODES = {'P': 'P', 'B': 'B', 'T': 'T', 'PLAYER': 'P', 'BANKER': 'B', 'TIE': 'T'}
+SIDE_NAMES = {'P': 'Player', 'B': 'Banker'}
+_COUNT_KEYS = (('P', 'player'), ('B', 'banker'), ('T', 'tie'))
+
+
+def result_code(result: Any) -> Optional[str]:
+    """'P'/'B'/'T' from a result code or winner name ('Player', 'banker', ...)"""
+    if not result:
+        return None
+    return RESULT_CODES.get(str(result).upper())
+
+
+def is_pair(cards: Optional[Iterable[str]]) -> bool:
+    """First two cards of the same rank ('6D', '6H')"""
+    cards = list(cards or [])
+    return len(cards) >= 2 and cards[0][:-1] == cards[1][:-1]
+
+
+class TableTally:
+    """Streak, current-shoe counters and a sliding window of one table"""
+
+    __slots__ = (
+        'table_id', 'rounds', 'last_result', 'last_round_id', 'streak_side',
+        'streak_length', 'shoe_id', 'shoe', 'recent', 'recent_counts',
+    )
+
+    def __init__(self, table_id: str, window: int):
+        self.table_id = table_id
+        self.rounds = 0
+        self.last_result: Optional[str] = None
+        self.last_round_id: Optional[str] = None
+        self.streak_side: Optional[str] = None
+        self.streak_length = 0
+        self.shoe_id: Optional[str] = None
+        self.shoe = self._empty_shoe()
+        self.recent: Deque[str] = deque(maxlen=max(1, window))
+        self.recent_counts = {'P': 0, 'B': 0, 'T': 0}
+
+    @staticmethod
+    def _empty_shoe() -> Dict[str, int]:
+        return {'P': 0, 'B': 0, 'T': 0, 'player_pairs': 0, 'banker_pairs': 0}
+
+    def apply(self, code: str, shoe_id: Optional[str] = None, player_pair: bool = False,
+              banker_pair: bool = False, round_id: Optional[str] = None):
+        if shoe_id != self.shoe_id:
+            self.shoe_id = shoe_id
+            self.shoe = self._empty_shoe()
+        self.shoe[code] += 1
+        self.shoe['player_pairs'] += 1 if player_pair else 0
+        self.shoe['banker_pairs'] += 1 if banker_pair else 0
+
+        if len(self.recent) == self.recent.maxlen:
+            self.recent_counts[self.recent[0]] -= 1
+        self.recent.append(code)
+        self.recent_counts[code] += 1
+
+        if code != 'T':
+            if code == self.streak_side:
+                self.streak_length += 1
+            else:
+                self.streak_side = code
+                self.streak_length = 1
+
+        self.rounds += 1
+        self.last_result = code
+        self.last_round_id = round_id
+
+    def streak(self) -> Dict[str, Any]:
+        if self.streak_side is None:
+            return {'side': None, 'length': 0}
+        return {
+            'side': SIDE_NAMES[self.streak_side],
+            'side_code': self.streak_side,
+            'length': self.streak_length,
+        }
+
+    def counts(self, limit: int) -> Optional[Dict[str, int]]:
+        """P/B/T counts of the last `limit` results (None if beyond the window)"""
+        if limit > self.recent.maxlen:
+            return None
+        if limit >= len(self.recent):
+            counts = self.recent_counts
+        else:
+            counts = {'P': 0, 'B': 0, 'T': 0}
+            for i in range(len(self.recent) - limit, len(self.recent)):
+                counts[self.recent[i]] += 1
+        return {name: counts[code] for code, name in _COUNT_KEYS}
+
+    def shoe_stats(self) -> Dict[str, Any]:
+        return {
+            'shoe_id': self.shoe_id,
+            'player': self.shoe['P'],
+            'banker': self.shoe['B'],
+            'tie': self.shoe['T'],
+            'player_pairs': self.shoe['player_pairs'],
+            'banker_pairs': self.shoe['banker_pairs'],
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'table_id': self.table_id,
+            'rounds': self.rounds,
+            'last_result': self.last_result,
+            'last_round_id': self.last_round_id,
+            'streak': self.streak(),
+            'shoe': self.shoe_stats(),
+            'recent': self.counts(len(self.recent)),
+        }
+
+
+class LiveState:
+    """TableTally per table plus one across all tables (for table_id=None reads)"""
+
+    def __init__(self, window: int = 100):
+        self.window = window
+        self.tables: Dict[str, TableTally] = {}
+        self.all = TableTally('*', window)
+
+    def apply(self, table_id: Optional[str], result: Any, shoe_id: Optional[str] = None,
+              player_pair: bool = False, banker_pair: bool = False,
+              round_id: Optional[str] = None) -> bool:
+        """Count a newly stored result; returns False for an unknown result code"""
+        code = result_code(result)
+        if code is None:
+            return False
+        key = table_id or ''
+        tally = self.tables.get(key)
+        if tally is None:
+            tally = self.tables[key] = TableTally(key, self.window)
+        tally.apply(code, shoe_id, player_pair, banker_pair, round_id)
+        # Shoes are per table: the aggregate only keeps streak and window
+        self.all.apply(code, None, player_pair, banker_pair, round_id)
+        return True
+
+    def clear(self):
+        self.tables.clear()
+        self.all = TableTally('*', self.window)
+
+    def _tally(self, table_id: Optional[str]) -> Optional[TableTally]:
+        if table_id is None:
+            return self.all
+        return self.tables.get(table_id)
+
+    def streak(self, table_id: Optional[str] = None) -> Dict[str, Any]:
+        tally = self._tally(table_id)
+        return tally.streak() if tally else {'side': None, 'length': 0}
+
+    def counts(self, limit: int, table_id: Optional[str] = None) -> Optional[Dict[str, int]]:
+        tally = self._tally(table_id)
+        if tally is None:
+            return {'player': 0, 'banker': 0, 'tie': 0} if limit <= self.window else None
+        return tally.counts(limit)
+
+    def shoe_stats(self, table_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Current shoe of a table (table_id=None: the only table, if there is one)"""
+        if table_id is None and len(self.tables) == 1:
+            table_id = next(iter(self.tables))
+        tally = self.tables.get(table_id) if table_id is not None else None
+        return tally.shoe_stats() if tally else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'window': self.window,
+            'streak': self.all.streak(),
+            'last_result': self.all.last_result,
+            'tables': {key: tally.snapshot() for key, tally in sorted(self.tables.items())},
+        }
@@ -0,0 +1,229 @@
+"""
+Secondary indexes of the Postgres bot schema, and an EXPLAIN-based advisor
+
+The hot statements of the query catalog (src/queries.py) resolve the pending
+prediction and strategy votes of a game_id (actual_winner IS NULL) and
+aggregate the resolved ones (actual_winner IS NOT NULL). Partial indexes
+match those two halves: the pending one stays tiny however large the tables
+grow, and the resolved ones carry the aggregated columns so counts are
+answered from the index alone. ensure_indexes() builds them CONCURRENTLY
+(writers are not blocked on large tables) and drops the full-table indexes
+they replace.
+
+Advisor: EXPLAIN every catalog statement against a database initialized by
+the bot and flag sequential scans. Sequential scans are disabled for the
+check, so a Seq Scan in the plan means no index can serve the statement -
+independent of how many rows the local tables hold:
+
+    python -m src.pg_indexes [--dsn postgresql://localhost/dragon_bot]
+                             [--apply] [--generic] [--allow-seqscan]
+
+Exits with status 1 when a statement is flagged or fails to plan.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import asyncpg
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from queries import QUERIES, round_params
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, str] = {
+    # resolve_predictions / resolve_round: pending prediction of a game_id
+    'idx_predictions_unresolved':
+        'ON ml_predictions (game_id) WHERE actual_winner IS NULL',
+    # prediction_totals / resolve_round totals: index-only count
+    'idx_predictions_resolved':
+        'ON ml_predictions (was_correct) WHERE actual_winner IS NOT NULL',
+    # resolve_votes / resolve_round: pending votes of a game_id
+    'idx_votes_unresolved':
+        'ON strategy_votes (game_id) WHERE actual_winner IS NULL',
+    # strategy_accuracy ledger rebuild and ad hoc reports: grouped in index order
+    'idx_votes_resolved':
+        'ON strategy_votes (strategy_name) INCLUDE (was_correct) '
+        'WHERE actual_winner IS NOT NULL',
+}
+
+# Full-table indexes replaced by the partial ones above
+SUPERSEDED_INDEXES = ('idx_strategy_votes_game_id', 'idx_strategy_votes_name')
+
+_SAMPLE_ROUND = {
+    'game_id': 'index-advisor',
+    'game_number': '1',
+    'winner': 'Banker',
+    'player_score': 5,
+    'banker_score': 8,
+    'table_id': 'main',
+}
+
+# Representative parameters per catalog statement (EXPLAIN needs values)
+SAMPLE_ARGS: Dict[str, Tuple[Any, ...]] = {
+    'insert_round': round_params(_SAMPLE_ROUND),
+    'resolve_round': round_params(_SAMPLE_ROUND) + (True, 'middle', 100),
+    'insert_prediction': ('index-advisor', 'Banker', 55.0),
+    'resolve_predictions': ('index-advisor', 'Banker'),
+    'prediction_totals': (),
+    'insert_votes': ('index-advisor', ['trend'], ['Banker']),
+    'resolve_votes': ('index-advisor', 'Banker', 'middle', 100),
+    'strategy_accuracy': (3,),
+    'ledger_needs_rebuild': (),
+    'rebuild_strategy_accuracy': (100,),
+    'recent_rounds': (100,),
+    'recent_rounds_by_table': (100, 'main'),
+    'recent_winners': (81,),
+    'recent_winners_by_table': (81, 'main'),
+    'live_state_rows': (2000,),
+    'live_state_since': (0, 2000),
+    'upsert_roads': ('index-advisor', '[]', '[]', '[]', '[]', '[]'),
+    'upsert_shoe_stats': ('index-advisor', 1, 0, 1, 0, 0, 0, '[]'),
+    'insert_roadmap': ('index-advisor', '[]', '[]', '[]', '[]', '[]'),
+}
+
+
+async def ensure_indexes(conn) -> List[str]:
+    """
+    Build missing (or invalid) INDEXES concurrently; returns the names built
+
+    Postgres has no CONCURRENTLY for partitioned tables (src/pg_partitions.py):
+    there the index is built on the parent, which locks only the partitions
+    being indexed.
+    """
+    rows = await conn.fetch('''
+        SELECT c.relname, i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = ANY($1::text[]) AND c.relnamespace = current_schema()::regnamespace
+    ''', list(INDEXES))
+    valid = {r['relname']: r['indisvalid'] for r in rows}
+    tables = {definition.split()[1] for definition in INDEXES.values()}
+    partitioned = {r['relname'] for r in await conn.fetch('''
+        SELECT relname FROM pg_class
+        WHERE relkind = 'p' AND relname = ANY($1::text[])
+          AND relnamespace = current_schema()::regnamespace
+    ''', sorted(tables))}
+
+    built = []
+    for name, definition in INDEXES.items():
+        if valid.get(name):
+            continue
+        concurrently = '' if definition.split()[1] in partitioned else ' CONCURRENTLY'
+        if name in valid:
+            # Left INVALID by an interrupted CREATE INDEX CONCURRENTLY
+            await conn.execute(f'DROP INDEX{concurrently} IF EXISTS {name}')
+        # One statement per execute: CONCURRENTLY cannot run in a transaction
+        await conn.execute(f'CREATE INDEX{concurrently} IF NOT EXISTS {name} {definition}')
+        built.append(name)
+    # Superseded indexes only exist on unpartitioned strategy_votes tables
+    concurrently = '' if 'strategy_votes' in partitioned else ' CONCURRENTLY'
+    for name in SUPERSEDED_INDEXES:
+        await conn.execute(f'DROP INDEX{concurrently} IF EXISTS {name}')
+    return built
+
+
+def iter_plan_nodes(plan: Mapping[str, Any]) -> Iterator[Mapping[str, Any]]:
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from iter_plan_nodes(child)
+
+
+def seq_scans(plan: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """Sequential scans in an EXPLAIN (FORMAT JSON) plan tree"""
+    return [
+        {
+            'relation': node.get('Relation Name'),
+            'rows': node.get('Plan Rows'),
+            'filter': node.get('Filter'),
+        }
+        for node in iter_plan_nodes(plan)
+        if node.get('Node Type') == 'Seq Scan'
+    ]
+
+
+async def explain_statement(conn, sql: str, args: Tuple[Any, ...],
+                            generic: bool = False) -> Dict[str, Any]:
+    """Plan tree of a statement (never executed: no ANALYZE)"""
+    if generic:
+        # PostgreSQL 16+: the plan reused once a prepared statement goes generic
+        raw = await conn.fetchval(f'EXPLAIN (FORMAT JSON, GENERIC_PLAN) {sql}')
+    else:
+        raw = await conn.fetchval(f'EXPLAIN (FORMAT JSON) {sql}', *args)
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    return raw[0]['Plan']
+
+
+async def advise(conn, statements: Optional[Mapping[str, str]] = None, generic: bool = False,
+                 allow_seqscan: bool = False) -> Dict[str, Dict[str, Any]]:
+    """EXPLAIN each statement; per name: status ok|seqscan|missing|error and details"""
+    statements = QUERIES if statements is None else statements
+    report: Dict[str, Dict[str, Any]] = {}
+    for name, sql in statements.items():
+        try:
+            async with conn.transaction():
+                if not allow_seqscan:
+                    await conn.execute('SET LOCAL enable_seqscan = off')
+                plan = await explain_statement(conn, sql, SAMPLE_ARGS.get(name, ()), generic)
+        except Exception as e:
+            # Tables of another bot (shoe_statistics, roadmaps) may not exist here
+            status = 'missing' if isinstance(e, asyncpg.UndefinedTableError) else 'error'
+            report[name] = {'status': status, 'error': str(e)}
+            continue
+        scans = seq_scans(plan)
+        report[name] = {
+            'status': 'seqscan' if scans else 'ok',
+            'seq_scans': scans,
+            'cost': plan.get('Total Cost'),
+        }
+    return report
+
+
+def _print_report(report: Mapping[str, Mapping[str, Any]]):
+    for name, entry in report.items():
+        status = entry['status']
+        if status == 'ok':
+            print(f"  ok       {name} (cost {entry['cost']})")
+        elif status == 'seqscan':
+            for scan in entry['seq_scans']:
+                detail = f" filter {scan['filter']}" if scan['filter'] else ''
+                print(f"  SEQSCAN  {name}: {scan['relation']} (~{scan['rows']} rows){detail}")
+        else:
+            print(f"  {status:<8} {name}: {entry['error']}")
+
+
+async def _main(args) -> int:
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        if args.apply:
+            built = await ensure_indexes(conn)
+            print(f"Built indexes: {', '.join(built) or 'none (all present)'}")
+        report = await advise(conn, generic=args.generic, allow_seqscan=args.allow_seqscan)
+    finally:
+        await conn.close()
+    _print_report(report)
+    flagged = [n for n, e in report.items() if e['status'] in ('seqscan', 'error')]
+    print(f"{len(report)} statements, {len(flagged)} flagged")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Postgres indexes and EXPLAIN advisor")
+    parser.add_argument("--dsn", default=os.getenv("DB_URL", "postgresql://localhost/dragon_bot"))
+    parser.add_argument("--apply", action="store_true",
+                        help="build missing indexes (CONCURRENTLY) before explaining")
+    parser.add_argument("--generic", action="store_true",
+                        help="explain generic plans (PostgreSQL 16+)")
+    parser.add_argument("--allow-seqscan", action="store_true",
+                        help="keep enable_seqscan on (plans as on the current data)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(args)))
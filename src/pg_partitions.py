@@ -0,0 +1,482 @@
+"""
+Monthly partitions of the Postgres bot tables, retention and export
+
+baccarat_rounds ("timestamp"), ml_predictions ("timestamp") and
+strategy_votes (created_at) are PARTITION BY RANGE on their time column,
+one partition per calendar month (<table>_pYYYY_MM) plus <table>_default,
+which only catches rows of a month whose partition does not exist yet. The
+bot creates the tables and the partitions of the current month and
+PG_PARTITIONS_AHEAD months ahead at startup and again when the server's
+month changes. A month that already has rows in the default partition is
+left to the offline `maintain` command, which moves them out (a DELETE and
+re-insert under lock, not something to run next to the live writer).
+
+Recent-window queries (ORDER BY timestamp DESC LIMIT n) need no change:
+every partition carries the timestamp indexes, so the planner reads the
+partitions newest first (ordered Append) and stops as soon as the LIMIT is
+met - older months are never read, however many are kept.
+
+Deduplication: a unique constraint on a partitioned table must include the
+partition key, so baccarat_rounds cannot keep game_id UNIQUE. round_ids
+(game_id PRIMARY KEY) claims each game_id and insert_round only inserts the
+round when the claim succeeds (src/queries.py). round_ids is never pruned:
+a round that was archived and dropped is not inserted again by a replay or a
+backfill. Foreign keys to a round's game_id reference round_ids. While
+baccarat_rounds is still unpartitioned (not migrated yet) it keeps its UNIQUE
+game_id, insert_round falls back on it (ON CONFLICT DO NOTHING) and startup
+claims the rounds stored since the newest claim, so round_ids is complete by
+the time the table is migrated.
+
+Retention: partitions that ended more than --retain-months ago are exported
+(COPY, CSV with header, zstd when `zstandard` is installed, gzip otherwise),
+checked against their row count, detached and dropped. Counts read from the
+tables (prediction totals, a strategy_accuracy --rebuild) then cover the
+retained months only; the strategy_accuracy ledger itself keeps its totals.
+
+    python -m src.pg_partitions status
+    python -m src.pg_partitions maintain [--ahead 3]
+                                [--retain-months 12 --export-dir data/pg_archive]
+    python -m src.pg_partitions migrate     # existing unpartitioned tables, bot stopped
+
+migrate converts each table in one transaction (rows are copied, secondary
+indexes recreated, foreign keys moved to round_ids): take a backup first.
+"""
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from frame_archive import resolve_compression
+from queries import affected_rows
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional, gzip is used instead
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> time column (partition key)
+PARTITIONED_TABLES: Dict[str, str] = {
+    'baccarat_rounds': 'timestamp',
+    'ml_predictions': 'timestamp',
+    'strategy_votes': 'created_at',
+}
+
+# Months created ahead of the current one
+PARTITIONS_AHEAD = 3
+
+_COLUMNS: Dict[str, str] = {
+    'baccarat_rounds': '''
+        id SERIAL,
+        game_id VARCHAR(100),
+        game_number VARCHAR(50),
+        timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
+        winner VARCHAR(20),
+        player_score INT,
+        banker_score INT,
+        player_pair BOOLEAN,
+        banker_pair BOOLEAN,
+        is_natural BOOLEAN,
+        player_cards JSONB,
+        banker_cards JSONB,
+        lightning_multipliers JSONB,
+        winning_spots JSONB,
+        with_lightning BOOLEAN,
+        shoe_cards_out INT,
+        total_winners INT,
+        total_amount NUMERIC,
+        captured_at TIMESTAMP DEFAULT NOW(),
+        table_id VARCHAR(100),
+    ''',
+    'ml_predictions': '''
+        id SERIAL,
+        game_id VARCHAR(100),
+        predicted_winner VARCHAR(20),
+        confidence NUMERIC,
+        actual_winner VARCHAR(20),
+        was_correct BOOLEAN,
+        timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
+    ''',
+    'strategy_votes': '''
+        id SERIAL,
+        game_id VARCHAR(100) NOT NULL,
+        strategy_name VARCHAR(80) NOT NULL,
+        predicted_winner VARCHAR(20) NOT NULL,
+        actual_winner VARCHAR(20),
+        was_correct BOOLEAN,
+        created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    ''',
+}
+
+ROUND_IDS_DDL = '''
+    CREATE TABLE IF NOT EXISTS round_ids (
+        game_id VARCHAR(100) PRIMARY KEY,
+        claimed_at TIMESTAMP NOT NULL DEFAULT NOW()
+    )
+'''
+
+# Rounds stored in an unpartitioned baccarat_rounds since the newest claim
+# (all of them the first time; idx_timestamp keeps the later runs short)
+_CLAIM_STORED_ROUNDS = '''
+    INSERT INTO round_ids (game_id, claimed_at)
+    SELECT game_id, COALESCE("timestamp", NOW()) FROM baccarat_rounds
+    WHERE game_id IS NOT NULL
+      AND ("timestamp" >= (SELECT MAX(claimed_at) FROM round_ids)
+           OR NOT EXISTS (SELECT 1 FROM round_ids))
+    ON CONFLICT DO NOTHING
+'''
+
+_LIST_PARTITIONS = '''
+    SELECT c.relname, c.reltuples::bigint AS estimated_rows
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = $1::regclass
+    ORDER BY c.relname
+'''
+
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f'{table}_p{month:%Y_%m}'
+
+
+def partition_month(table: str, name: str) -> Optional[datetime]:
+    """Month of a <table>_pYYYY_MM partition (None for the default partition)"""
+    prefix = f'{table}_p'
+    if not name.startswith(prefix):
+        return None
+    try:
+        return datetime.strptime(name[len(prefix):], '%Y_%m')
+    except ValueError:
+        return None
+
+
+def create_table_sql(table: str) -> str:
+    key = PARTITIONED_TABLES[table]
+    return (
+        f'CREATE TABLE IF NOT EXISTS {table} ('
+        f'{_COLUMNS[table]}    PRIMARY KEY (id, "{key}")\n'
+        f') PARTITION BY RANGE ("{key}")'
+    )
+
+
+async def server_now(conn) -> datetime:
+    # Month boundaries follow the server clock that fills DEFAULT NOW()
+    return await conn.fetchval('SELECT LOCALTIMESTAMP')
+
+
+async def table_kind(conn, table: str) -> Optional[str]:
+    """'partitioned', 'table' (unpartitioned) or None when missing"""
+    # relkind is a "char": asyncpg would return it as bytes
+    relkind = await conn.fetchval(
+        'SELECT relkind::text FROM pg_class WHERE oid = to_regclass($1)', table
+    )
+    return {'p': 'partitioned', 'r': 'table'}.get(relkind)
+
+
+async def _column_names(conn, table: str) -> List[str]:
+    return [r['column_name'] for r in await conn.fetch('''
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = $1
+        ORDER BY ordinal_position
+    ''', table)]
+
+
+async def list_partitions(conn, table: str) -> List[str]:
+    return [r['relname'] for r in await conn.fetch(_LIST_PARTITIONS, table)]
+
+
+async def create_partitioned_table(conn, table: str):
+    await conn.execute(create_table_sql(table))
+    await conn.execute(
+        f'CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT'
+    )
+
+
+async def create_partition(conn, table: str, month: datetime,
+                           move_stray: bool = False) -> Optional[str]:
+    """
+    Partition of one month; returns its name, or None when rows of that month
+    already sit in the default partition and move_stray is off (Postgres
+    refuses the partition until they are moved; only the offline maintain
+    command moves them)
+    """
+    key = PARTITIONED_TABLES[table]
+    name = partition_name(table, month)
+    lower, upper = month, add_months(month, 1)
+    in_range = f'"{key}" >= $1 AND "{key}" < $2'
+    async with conn.transaction():
+        stray = await conn.fetchval(
+            f'SELECT COUNT(*) FROM {table}_default WHERE {in_range}', lower, upper
+        )
+        if stray and not move_stray:
+            logger.warning(
+                f"{name}: {stray} rows in {table}_default, "
+                f"run 'python -m src.pg_partitions maintain' to move them"
+            )
+            return None
+        if stray:
+            # Postgres refuses the new partition while the default one holds its rows
+            await conn.execute(f'CREATE TEMP TABLE stray_{name} (LIKE {table}) ON COMMIT DROP')
+            await conn.execute(f'''
+                WITH moved AS (
+                    DELETE FROM {table}_default WHERE {in_range} RETURNING *
+                )
+                INSERT INTO stray_{name} SELECT * FROM moved
+            ''', lower, upper)
+        await conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{lower:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+        )
+        if stray:
+            await conn.execute(f'INSERT INTO {table} SELECT * FROM stray_{name}')
+            logger.info(f"{name}: moved {stray} rows out of {table}_default")
+    return name
+
+
+async def ensure_partitions(conn, table: str, ahead: int = PARTITIONS_AHEAD,
+                            now: Optional[datetime] = None,
+                            move_stray: bool = False) -> List[str]:
+    """Partitions of the current month and `ahead` months after it; returns those created"""
+    now = now or await server_now(conn)
+    existing = set(await list_partitions(conn, table))
+    created = []
+    for offset in range(ahead + 1):
+        month = add_months(month_start(now), offset)
+        if partition_name(table, month) not in existing:
+            name = await create_partition(conn, table, month, move_stray)
+            if name:
+                created.append(name)
+    return created
+
+
+async def ensure_tables(conn, ahead: int = PARTITIONS_AHEAD, now: Optional[datetime] = None,
+                        move_stray: bool = False) -> Dict[str, List[str]]:
+    """
+    Create round_ids and the missing tables (partitioned), then the partitions
+    up to `ahead` months; returns {'created': partitions, 'unpartitioned': tables}.
+    Existing unpartitioned tables are left alone (see migrate_table), except
+    that the rounds of an unpartitioned baccarat_rounds are claimed in round_ids.
+    """
+    await conn.execute(ROUND_IDS_DDL)
+    now = now or await server_now(conn)
+    report: Dict[str, List[str]] = {'created': [], 'unpartitioned': []}
+    for table in PARTITIONED_TABLES:
+        kind = await table_kind(conn, table)
+        if kind == 'table':
+            if table == 'baccarat_rounds':
+                await conn.execute(_CLAIM_STORED_ROUNDS)
+            report['unpartitioned'].append(table)
+            continue
+        if kind is None:
+            await create_partitioned_table(conn, table)
+        report['created'] += await ensure_partitions(conn, table, ahead, now, move_stray)
+    return report
+
+
+def _open_export(path: Path, compression: str):
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'))
+    return gzip.open(path, 'wb', compresslevel=6)
+
+
+async def export_partition(conn, name: str, export_dir: Path,
+                           compression: str = 'auto') -> Dict[str, Any]:
+    """COPY a partition to <export_dir>/<name>.csv.gz|.csv.zst; the row count is checked"""
+    compression = resolve_compression(compression)
+    export_dir = Path(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    path = export_dir / f"{name}.csv.{'zst' if compression == 'zstd' else 'gz'}"
+    partial = path.with_name(path.name + '.part')
+
+    expected = await conn.fetchval(f'SELECT COUNT(*) FROM {name}')
+    with _open_export(partial, compression) as out:
+        status = await conn.copy_from_table(name, output=out, format='csv', header=True)
+    rows = affected_rows(status)
+    if rows != expected:
+        partial.unlink()
+        raise RuntimeError(f"{name}: exported {rows} rows, expected {expected}")
+    partial.replace(path)
+    return {'rows': rows, 'path': str(path), 'bytes': path.stat().st_size}
+
+
+async def expire_partitions(conn, retain_months: int, export_dir: Optional[Path] = None,
+                            drop: bool = True, compression: str = 'auto',
+                            now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Export (when export_dir is given), detach and drop the partitions that
+    ended before the first day of the month `retain_months` months ago.
+    drop=False keeps them as standalone tables. A failed export stops the run
+    before anything is dropped.
+    """
+    now = now or await server_now(conn)
+    cutoff = add_months(month_start(now), -retain_months)
+    expired = []
+    for table in PARTITIONED_TABLES:
+        if await table_kind(conn, table) != 'partitioned':
+            continue
+        for name in await list_partitions(conn, table):
+            month = partition_month(table, name)
+            if month is None or add_months(month, 1) > cutoff:
+                continue
+            entry: Dict[str, Any] = {'partition': name, 'month': f'{month:%Y-%m}'}
+            if export_dir is not None:
+                entry.update(await export_partition(conn, name, export_dir, compression))
+            await conn.execute(f'ALTER TABLE {table} DETACH PARTITION {name}')
+            if drop:
+                await conn.execute(f'DROP TABLE {name}')
+            entry['dropped'] = drop
+            expired.append(entry)
+    return expired
+
+
+async def migrate_table(conn, table: str, ahead: int = PARTITIONS_AHEAD,
+                        now: Optional[datetime] = None) -> int:
+    """
+    Convert an unpartitioned table to monthly partitions in one transaction;
+    returns the rows copied (0 when the table is missing or already partitioned)
+    """
+    if await table_kind(conn, table) != 'table':
+        return 0
+    key = PARTITIONED_TABLES[table]
+    legacy = f'{table}_unpartitioned'
+    now = now or await server_now(conn)
+    async with conn.transaction():
+        await conn.execute(f'LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE')
+        if table == 'baccarat_rounds':
+            await conn.execute(ROUND_IDS_DDL)
+            await conn.execute(f'''
+                INSERT INTO round_ids (game_id, claimed_at)
+                SELECT game_id, COALESCE("timestamp", NOW()) FROM {table}
+                WHERE game_id IS NOT NULL
+                ON CONFLICT DO NOTHING
+            ''')
+        # Secondary indexes (not the PK / UNIQUE ones) come back on the partitioned table
+        index_defs = [r['indexdef'] for r in await conn.fetch('''
+            SELECT indexdef FROM pg_indexes
+            WHERE schemaname = current_schema() AND tablename = $1
+              AND indexname NOT IN (SELECT conname FROM pg_constraint
+                                    WHERE conrelid = $1::regclass)
+        ''', table)]
+        foreign_keys = await conn.fetch('''
+            SELECT conname, conrelid::regclass::text AS referencing,
+                   pg_get_constraintdef(oid) AS definition
+            FROM pg_constraint
+            WHERE contype = 'f' AND confrelid = $1::regclass
+        ''', table)
+        old_columns = await _column_names(conn, table)
+        first = await conn.fetchval(f'SELECT MIN("{key}") FROM {table}')
+
+        await conn.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+        await create_partitioned_table(conn, table)
+        month, last = month_start(first or now), add_months(month_start(now), ahead)
+        while month <= last:
+            await create_partition(conn, table, month)
+            month = add_months(month, 1)
+
+        new_columns = set(await _column_names(conn, table))
+        columns = [c for c in old_columns if c in new_columns]
+        quoted = [f'"{c}"' for c in columns]
+        select = [f'COALESCE("{c}", NOW())' if c == key else f'"{c}"' for c in columns]
+        status = await conn.execute(
+            f'INSERT INTO {table} ({", ".join(quoted)}) '
+            f'SELECT {", ".join(select)} FROM {legacy}'
+        )
+        await conn.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE(MAX(id), 0) + 1, false) FROM {table}"
+        )
+        for fk in foreign_keys:
+            await conn.execute(f"ALTER TABLE {fk['referencing']} DROP CONSTRAINT {fk['conname']}")
+        await conn.execute(f'DROP TABLE {legacy}')
+        for definition in index_defs:
+            await conn.execute(definition)
+        for fk in foreign_keys:
+            definition = fk['definition'].replace(f'REFERENCES {table}(', 'REFERENCES round_ids(')
+            await conn.execute(
+                f"ALTER TABLE {fk['referencing']} ADD CONSTRAINT {fk['conname']} {definition}"
+            )
+    rows = affected_rows(status)
+    logger.info(f"{table}: {rows} rows moved to monthly partitions")
+    return rows
+
+
+async def _print_status(conn):
+    for table in PARTITIONED_TABLES:
+        kind = await table_kind(conn, table)
+        print(f"{table}: {kind or 'missing'}")
+        if kind != 'partitioned':
+            continue
+        for row in await conn.fetch(_LIST_PARTITIONS, table):
+            print(f"  {row['relname']:<32} ~{max(row['estimated_rows'], 0)} rows")
+
+
+async def _main(args) -> int:
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        if args.command == 'status':
+            await _print_status(conn)
+            return 0
+        if args.command == 'migrate':
+            for table in PARTITIONED_TABLES:
+                rows = await migrate_table(conn, table, args.ahead)
+                print(f"{table}: {rows} rows migrated")
+        # Offline: months with rows waiting in the default partition get them moved
+        report = await ensure_tables(conn, args.ahead, move_stray=True)
+        print(f"Created partitions: {', '.join(report['created']) or 'none'}")
+        for table in report['unpartitioned']:
+            print(f"{table} is not partitioned: run 'migrate' with the bot stopped")
+        if args.retain_months is not None:
+            expired = await expire_partitions(
+                conn, args.retain_months, args.export_dir, drop=not args.keep_detached,
+                compression=args.compression,
+            )
+            for entry in expired:
+                action = 'dropped' if entry['dropped'] else 'detached'
+                exported = f" -> {entry['path']} ({entry['rows']} rows)" if 'path' in entry else ''
+                print(f"  {action} {entry['partition']}{exported}")
+            print(f"{len(expired)} partitions expired")
+    finally:
+        await conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monthly partitions of the Postgres bot tables")
+    parser.add_argument("command", choices=("status", "maintain", "migrate"))
+    parser.add_argument("--dsn", default=os.getenv("DB_URL", "postgresql://localhost/dragon_bot"))
+    parser.add_argument("--ahead", type=int, default=PARTITIONS_AHEAD,
+                        help="months created ahead of the current one")
+    parser.add_argument("--retain-months", type=int,
+                        help="expire partitions that ended more than N months ago")
+    parser.add_argument("--export-dir", type=Path,
+                        help="export expired partitions here before dropping them")
+    parser.add_argument("--no-export", action="store_true",
+                        help="expire without exporting")
+    parser.add_argument("--keep-detached", action="store_true",
+                        help="detach expired partitions but keep them as tables")
+    parser.add_argument("--compression", default="auto", choices=("auto", "zstd", "gzip"))
+    args = parser.parse_args()
+    if args.retain_months is not None and args.export_dir is None and not args.no_export:
+        parser.error("--retain-months needs --export-dir (or --no-export)")
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(args)))
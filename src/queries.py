@@ -0,0 +1,453 @@
+"""
+Catalog of the SQL statements of the Postgres bots
+
+dragon_bot_ml.py, dragon_bot_advanced.py and test_ml_predictor.py write the
+same baccarat_rounds / ml_predictions rows; their statements live here, once,
+by name, and run through a QueryCatalog.
+
+Prepared statements: the catalog always runs statements with bind parameters
+through asyncpg's extended protocol, so each statement is parsed and planned
+the first time it runs on a pooled connection and reused from that
+connection's statement cache afterwards (only Bind/Execute go over the wire).
+asyncpg invalidates PreparedStatement objects when a connection goes back to
+the pool, so the connection's cache - not conn.prepare() - is what outlives
+an acquire. pool_options() keeps idle connections (and their statements)
+open and sizes the cache for the whole catalog.
+
+Every call records its latency under the statement name: count, errors,
+p50/p95/p99 and total time, sorted so the statement that dominates comes
+first (snapshot() / log_summary()).
+"""
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.latency import LatencyHistogram
+from strategy_ledger import EARLY_LIMIT, MIDDLE_LIMIT, PHASES, SHOE_CARDS
+
+# A round is inserted only when its game_id is claimed in round_ids: the
+# partitioned baccarat_rounds (src/pg_partitions.py) cannot keep game_id UNIQUE
+_CLAIM_ROUND = '''claimed AS (
+        INSERT INTO round_ids (game_id) VALUES ($1::varchar)
+        ON CONFLICT DO NOTHING
+        RETURNING game_id
+    )'''
+
+_INSERT_CLAIMED_ROUND = '''
+    INSERT INTO baccarat_rounds
+    (game_id, game_number, winner, player_score, banker_score,
+     player_pair, banker_pair, is_natural, player_cards, banker_cards,
+     lightning_multipliers, winning_spots, with_lightning,
+     shoe_cards_out, total_winners, total_amount, table_id)
+    SELECT game_id, $2::varchar, $3::varchar, $4::int, $5::int,
+           $6::bool, $7::bool, $8::bool, $9::jsonb, $10::jsonb,
+           $11::jsonb, $12::jsonb, $13::bool,
+           $14::int, $15::int, $16::numeric, $17::varchar
+    FROM claimed
+    ON CONFLICT DO NOTHING
+'''
+
+INSERT_ROUND = f'''
+    WITH {_CLAIM_ROUND}
+    {_INSERT_CLAIMED_ROUND.strip()}
+'''
+
+_PHASE_COUNTS = ''.join(
+    f"""
+           CASE WHEN {{phase}} = '{phase}' THEN COUNT(*) ELSE 0 END,
+           CASE WHEN {{phase}} = '{phase}' THEN COUNT(*) FILTER (WHERE was_correct) ELSE 0 END,"""
+    for phase in PHASES
+)
+
+# Add the votes just resolved (CTE "votes": id, strategy_name, was_correct) to
+# the strategy_accuracy ledger (src/strategy_ledger.py)
+_LEDGER_UPSERT = f'''
+    INSERT INTO strategy_accuracy AS a
+        (strategy_name, total, correct, ties, tie_correct, early_total, early_correct,
+         middle_total, middle_correct, late_total, late_correct, recent)
+    SELECT strategy_name,
+           COUNT(*),
+           COUNT(*) FILTER (WHERE was_correct),
+           CASE WHEN {{winner}} = 'Tie' THEN COUNT(*) ELSE 0 END,
+           CASE WHEN {{winner}} = 'Tie'
+                THEN COUNT(*) FILTER (WHERE was_correct) ELSE 0 END,{_PHASE_COUNTS}
+           right(string_agg(CASE WHEN was_correct THEN '1' ELSE '0' END, '' ORDER BY id),
+                 {{window}})
+    FROM votes
+    GROUP BY strategy_name
+    ON CONFLICT (strategy_name) DO UPDATE SET
+        total = a.total + EXCLUDED.total,
+        correct = a.correct + EXCLUDED.correct,
+        ties = a.ties + EXCLUDED.ties,
+        tie_correct = a.tie_correct + EXCLUDED.tie_correct,
+        early_total = a.early_total + EXCLUDED.early_total,
+        early_correct = a.early_correct + EXCLUDED.early_correct,
+        middle_total = a.middle_total + EXCLUDED.middle_total,
+        middle_correct = a.middle_correct + EXCLUDED.middle_correct,
+        late_total = a.late_total + EXCLUDED.late_total,
+        late_correct = a.late_correct + EXCLUDED.late_correct,
+        recent = right(a.recent || EXCLUDED.recent, {{window}}),
+        updated_at = NOW()
+    RETURNING 1
+'''
+
+
+def _ledger_upsert(winner: str, phase: str, window: str) -> str:
+    return _LEDGER_UPSERT.format(
+        winner=f'{winner}::varchar', phase=f'{phase}::varchar', window=f'{window}::int'
+    ).strip()
+
+
+# One statement (one round trip): insert the round, resolve the prediction and
+# strategy votes of its game_id and add the votes to the ledger ($19 shoe phase,
+# $20 window). CTEs see the snapshot from before the UPDATEs, so the totals
+# ($18) add what this round resolves to what was already resolved.
+RESOLVE_ROUND = f'''
+    WITH {_CLAIM_ROUND}, new_round AS (
+        {_INSERT_CLAIMED_ROUND.strip()}
+        RETURNING 1
+    ), predictions AS (
+        UPDATE ml_predictions
+        SET actual_winner = $3::varchar,
+            was_correct = (predicted_winner = $3::varchar)
+        WHERE game_id = $1::varchar AND actual_winner IS NULL
+        RETURNING was_correct
+    ), votes AS (
+        UPDATE strategy_votes
+        SET actual_winner = $3::varchar, was_correct = (predicted_winner = $3::varchar)
+        WHERE game_id = $1::varchar AND actual_winner IS NULL
+        RETURNING id, strategy_name, was_correct
+    ), ledger AS (
+        {_ledger_upsert(winner='$3', phase='$19', window='$20')}
+    )
+    SELECT
+        (SELECT COUNT(*) FROM new_round) AS inserted,
+        (SELECT COUNT(*) FROM predictions) AS predictions_updated,
+        (SELECT COUNT(*) FROM votes) AS votes_updated,
+        CASE WHEN $18::bool THEN
+            (SELECT COUNT(*) FROM ml_predictions WHERE actual_winner IS NOT NULL)
+            + (SELECT COUNT(*) FROM predictions)
+        END AS total,
+        CASE WHEN $18::bool THEN
+            (SELECT COUNT(*) FROM ml_predictions
+             WHERE actual_winner IS NOT NULL AND was_correct = true)
+            + (SELECT COUNT(*) FROM predictions WHERE was_correct)
+        END AS correct
+'''
+
+INSERT_PREDICTION = '''
+    INSERT INTO ml_predictions (game_id, predicted_winner, confidence)
+    VALUES ($1, $2, $3)
+'''
+
+RESOLVE_PREDICTIONS = '''
+    UPDATE ml_predictions
+    SET actual_winner = $2::varchar,
+        was_correct = (predicted_winner = $2::varchar)
+    WHERE game_id = $1::varchar AND actual_winner IS NULL
+'''
+
+PREDICTION_TOTALS = '''
+    SELECT
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE was_correct = true) AS correct
+    FROM ml_predictions
+    WHERE actual_winner IS NOT NULL
+'''
+
+INSERT_VOTES = '''
+    INSERT INTO strategy_votes (game_id, strategy_name, predicted_winner)
+    SELECT $1::varchar, v.name, v.predicted
+    FROM unnest($2::varchar[], $3::varchar[]) AS v(name, predicted)
+'''
+
+# Resolve the votes of a game_id ($3 shoe phase, $4 window); returns how many
+RESOLVE_VOTES = f'''
+    WITH votes AS (
+        UPDATE strategy_votes
+        SET actual_winner = $2::varchar, was_correct = (predicted_winner = $2::varchar)
+        WHERE game_id = $1::varchar AND actual_winner IS NULL
+        RETURNING id, strategy_name, was_correct
+    ), ledger AS (
+        {_ledger_upsert(winner='$2', phase='$3', window='$4')}
+    )
+    SELECT COUNT(*) FROM votes
+'''
+
+_LEDGER_COLUMNS = '''
+    strategy_name, total, correct, ties, tie_correct, early_total, early_correct,
+    middle_total, middle_correct, late_total, late_correct, recent
+'''
+
+STRATEGY_ACCURACY = f'''
+    SELECT {_LEDGER_COLUMNS.strip()}
+    FROM strategy_accuracy
+    WHERE total >= $1
+    ORDER BY correct::numeric / NULLIF(total, 0) DESC
+'''
+
+# Empty ledger with resolved votes, or rows from before tie_correct existed (NULL)
+LEDGER_NEEDS_REBUILD = '''
+    SELECT (NOT EXISTS (SELECT 1 FROM strategy_accuracy)
+            AND EXISTS (SELECT 1 FROM strategy_votes WHERE actual_winner IS NOT NULL))
+           OR EXISTS (SELECT 1 FROM strategy_accuracy WHERE tie_correct IS NULL)
+'''
+
+# Full recount from strategy_votes (run after TRUNCATE strategy_accuracy); the
+# shoe phase of old votes comes from their round's shoe_cards_out
+REBUILD_STRATEGY_ACCURACY = f'''
+    INSERT INTO strategy_accuracy ({_LEDGER_COLUMNS.strip()})
+    SELECT v.strategy_name,
+           COUNT(*),
+           COUNT(*) FILTER (WHERE v.was_correct),
+           COUNT(*) FILTER (WHERE v.actual_winner = 'Tie'),
+           COUNT(*) FILTER (WHERE v.actual_winner = 'Tie' AND v.was_correct),
+           COUNT(*) FILTER (WHERE p.phase = 'early'),
+           COUNT(*) FILTER (WHERE p.phase = 'early' AND v.was_correct),
+           COUNT(*) FILTER (WHERE p.phase = 'middle'),
+           COUNT(*) FILTER (WHERE p.phase = 'middle' AND v.was_correct),
+           COUNT(*) FILTER (WHERE p.phase = 'late'),
+           COUNT(*) FILTER (WHERE p.phase = 'late' AND v.was_correct),
+           right(string_agg(CASE WHEN v.was_correct THEN '1' ELSE '0' END, '' ORDER BY v.id),
+                 $1::int)
+    FROM strategy_votes v
+    LEFT JOIN baccarat_rounds r ON r.game_id = v.game_id
+    CROSS JOIN LATERAL (
+        SELECT CASE
+            WHEN COALESCE(r.shoe_cards_out, 0) <= 0 THEN NULL
+            WHEN r.shoe_cards_out::numeric / {SHOE_CARDS} < {EARLY_LIMIT} THEN 'early'
+            WHEN r.shoe_cards_out::numeric / {SHOE_CARDS} < {MIDDLE_LIMIT} THEN 'middle'
+            ELSE 'late'
+        END AS phase
+    ) p
+    WHERE v.actual_winner IS NOT NULL
+    GROUP BY v.strategy_name
+'''
+
+# All tables / one table as separate statements: a generic plan of
+# "$2 IS NULL OR table_id = $2" cannot use either timestamp index
+RECENT_ROUNDS = '''
+    SELECT winner, player_score, banker_score, player_pair, banker_pair, is_natural
+    FROM baccarat_rounds
+    ORDER BY timestamp DESC
+    LIMIT $1
+'''
+
+RECENT_ROUNDS_BY_TABLE = '''
+    SELECT winner, player_score, banker_score, player_pair, banker_pair, is_natural
+    FROM baccarat_rounds
+    WHERE table_id = $2::varchar
+    ORDER BY timestamp DESC
+    LIMIT $1
+'''
+
+RECENT_WINNERS = '''
+    SELECT winner
+    FROM baccarat_rounds
+    ORDER BY timestamp DESC
+    LIMIT $1
+'''
+
+RECENT_WINNERS_BY_TABLE = '''
+    SELECT winner
+    FROM baccarat_rounds
+    WHERE table_id = $2::varchar
+    ORDER BY timestamp DESC
+    LIMIT $1
+'''
+
+LIVE_STATE_ROWS = '''
+    SELECT id, game_id, winner, player_pair, banker_pair, table_id
+    FROM baccarat_rounds
+    ORDER BY id DESC
+    LIMIT $1
+'''
+
+# Rounds stored (by any process) after the newest one in the live state
+LIVE_STATE_SINCE = '''
+    SELECT id, game_id, winner, player_pair, banker_pair, table_id
+    FROM baccarat_rounds
+    WHERE id > $1
+    ORDER BY id
+    LIMIT $2
+'''
+
+UPSERT_ROADS = '''
+    INSERT INTO baccarat_roads
+    (game_id, big_road, big_eye_road, small_road, cockroach_road, bead_plate)
+    VALUES ($1, $2, $3, $4, $5, $6)
+    ON CONFLICT (game_id) DO UPDATE SET
+        big_road = EXCLUDED.big_road,
+        big_eye_road = EXCLUDED.big_eye_road,
+        small_road = EXCLUDED.small_road,
+        cockroach_road = EXCLUDED.cockroach_road,
+        bead_plate = EXCLUDED.bead_plate
+'''
+
+UPSERT_SHOE_STATS = '''
+    INSERT INTO shoe_statistics
+    (shoe_id, game_count, player_wins, banker_wins, ties,
+     player_pairs, banker_pairs, history_data)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+    ON CONFLICT (shoe_id, timestamp) DO UPDATE
+    SET game_count = EXCLUDED.game_count,
+        player_wins = EXCLUDED.player_wins,
+        banker_wins = EXCLUDED.banker_wins,
+        ties = EXCLUDED.ties,
+        player_pairs = EXCLUDED.player_pairs,
+        banker_pairs = EXCLUDED.banker_pairs,
+        history_data = EXCLUDED.history_data
+'''
+
+INSERT_ROADMAP = '''
+    INSERT INTO roadmaps
+    (game_id, big_road, bead_road, big_eye_boy, small_road, cockroach_road)
+    VALUES ($1, $2, $3, $4, $5, $6)
+'''
+
+QUERIES: Dict[str, str] = {
+    'insert_round': INSERT_ROUND,
+    'resolve_round': RESOLVE_ROUND,
+    'insert_prediction': INSERT_PREDICTION,
+    'resolve_predictions': RESOLVE_PREDICTIONS,
+    'prediction_totals': PREDICTION_TOTALS,
+    'insert_votes': INSERT_VOTES,
+    'resolve_votes': RESOLVE_VOTES,
+    'strategy_accuracy': STRATEGY_ACCURACY,
+    'ledger_needs_rebuild': LEDGER_NEEDS_REBUILD,
+    'rebuild_strategy_accuracy': REBUILD_STRATEGY_ACCURACY,
+    'recent_rounds': RECENT_ROUNDS,
+    'recent_rounds_by_table': RECENT_ROUNDS_BY_TABLE,
+    'recent_winners': RECENT_WINNERS,
+    'recent_winners_by_table': RECENT_WINNERS_BY_TABLE,
+    'live_state_rows': LIVE_STATE_ROWS,
+    'live_state_since': LIVE_STATE_SINCE,
+    'upsert_roads': UPSERT_ROADS,
+    'upsert_shoe_stats': UPSERT_SHOE_STATS,
+    'insert_roadmap': INSERT_ROADMAP,
+}
+
+
+def round_params(data: Mapping[str, Any]) -> Tuple[Any, ...]:
+    """Parameters $1..$17 of insert_round for a decoded round"""
+    return (
+        str(data['game_id']),
+        str(data.get('game_number', '')),
+        str(data['winner']),
+        data.get('player_score'),
+        data.get('banker_score'),
+        data.get('player_pair', False),
+        data.get('banker_pair', False),
+        data.get('is_natural', False),
+        json.dumps(data.get('player_cards', [])),
+        json.dumps(data.get('banker_cards', [])),
+        json.dumps(data.get('lightning_multipliers', {})),
+        json.dumps(data.get('winning_spots', [])),
+        data.get('with_lightning', False),
+        data.get('shoe_cards_out'),
+        data.get('total_winners'),
+        data.get('total_amount'),
+        data.get('table_id'),
+    )
+
+
+def affected_rows(status: Optional[str]) -> int:
+    """Row count of a command status ('INSERT 0 1', 'UPDATE 3')"""
+    if not status:
+        return 0
+    try:
+        return int(status.split()[-1])
+    except ValueError:
+        return 0
+
+
+class StatementStats:
+    """Calls, errors and latency histogram of one statement"""
+
+    __slots__ = ('name', 'errors', 'histogram')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.errors = 0
+        self.histogram = LatencyHistogram()
+
+    def summary(self) -> Dict[str, Any]:
+        summary = self.histogram.summary()
+        summary['errors'] = self.errors
+        summary['total_ms'] = round(self.histogram.total, 3)
+        return summary
+
+
+class QueryCatalog:
+    """Runs catalog statements by name on asyncpg connections and times them"""
+
+    def __init__(self, statements: Optional[Mapping[str, str]] = None):
+        self.statements: Dict[str, str] = dict(QUERIES if statements is None else statements)
+        self._stats: Dict[str, StatementStats] = {}
+        self._started_at = time.time()
+
+    def sql(self, name: str) -> str:
+        try:
+            return self.statements[name]
+        except KeyError:
+            raise KeyError(f"Unknown statement: {name!r}") from None
+
+    def pool_options(self) -> Dict[str, Any]:
+        """asyncpg.create_pool() options that keep prepared statements alive"""
+        return {
+            # Statements are prepared per connection: closing idle ones drops them
+            'max_inactive_connection_lifetime': 0,
+            'statement_cache_size': max(100, 2 * len(self.statements)),
+        }
+
+    async def _run(self, conn, method: str, name: str, args: Tuple[Any, ...]):
+        sql = self.sql(name)
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = StatementStats(name)
+        start = time.perf_counter()
+        try:
+            return await getattr(conn, method)(sql, *args)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.histogram.record((time.perf_counter() - start) * 1000)
+
+    async def execute(self, conn, name: str, *args) -> str:
+        """Command status ('INSERT 0 1'); statements without parameters are not prepared"""
+        return await self._run(conn, 'execute', name, args)
+
+    async def fetch(self, conn, name: str, *args) -> List[Any]:
+        return await self._run(conn, 'fetch', name, args)
+
+    async def fetchrow(self, conn, name: str, *args) -> Optional[Any]:
+        return await self._run(conn, 'fetchrow', name, args)
+
+    async def fetchval(self, conn, name: str, *args) -> Any:
+        return await self._run(conn, 'fetchval', name, args)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-statement summaries, the most total time first"""
+        ranked = sorted(self._stats.values(), key=lambda s: s.histogram.total, reverse=True)
+        return {
+            'since': self._started_at,
+            'statements': {s.name: s.summary() for s in ranked},
+        }
+
+    def reset(self):
+        self._stats.clear()
+        self._started_at = time.time()
+
+    def log_summary(self, log: logging.Logger, top: int = 5):
+        for name, s in list(self.snapshot()['statements'].items())[:top]:
+            log.info(
+                f"🗄️ sql {name} n={s['count']} total {s['total_ms']:.0f} ms | "
+                f"p50 {s['p50']:.2f} ms | p95 {s['p95']:.2f} ms | errors {s['errors']}"
+            )
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+"""
+Offline WebSocket replay for Evolution Gaming frames
+
+Feeds recorded frames (ws_samples/*.json, ws_capture.py / capture_with_auth.py
+dumps, ws_messages_authenticated.json, src/frame_archive.py segments) straight
+into DragonBot.process_message or EvolutionScraper._on_ws_message without
+Playwright.
+
+Usage:
+  python -m src.replay ws_samples --target bot --speed 0
+  python -m src.replay ws_messages_authenticated.json --target scraper --speed 10
+  python -m src.replay data/frames --target bot --speed 0
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from frame_archive import SEGMENT_SUFFIXES, open_segment
+from queries import QueryCatalog
+from round_arrays import COLUMNS, RoundArrays
+from src.latency import latency
+from strategy_ledger import StrategyLedger
+
+logger = logging.getLogger(__name__)
+
+FrameHandler = Callable[[str], Awaitable[Any]]
+
+
+class ReplayFrame:
+    """A single recorded WebSocket frame"""
+
+    def __init__(self, payload: str, msg_type: str, recorded_at: Optional[float] = None):
+        self.payload = payload
+        self.msg_type = msg_type
+        # Seconds since epoch when the frame was captured (None if unknown)
+        self.recorded_at = recorded_at
+
+
+def _parse_timestamp(value: Any) -> Optional[float]:
+    """Convert an Evolution 'time' (ms) or ISO capture timestamp to seconds"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        # Evolution sends epoch milliseconds
+        return value / 1000.0 if value > 1e11 else float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def _frame_from_record(record: Any) -> Optional[ReplayFrame]:
+    """Build a frame from a raw message or a capture-script wrapper"""
+    if not isinstance(record, dict):
+        return None
+
+    # FrameArchive segments keep the frame exactly as received
+    if isinstance(record.get('raw'), str):
+        return ReplayFrame(record['raw'], str(record.get('type') or 'unknown'), record.get('ts'))
+
+    # ws_capture.py / capture_with_auth.py wrap the message in 'data'
+    message = record.get('data') if isinstance(record.get('data'), dict) else record
+    if not isinstance(message, dict):
+        return None
+
+    msg_type = message.get('type') or message.get('mt') or 'unknown'
+    recorded_at = _parse_timestamp(message.get('time'))
+    if recorded_at is None:
+        recorded_at = _parse_timestamp(record.get('timestamp'))
+
+    return ReplayFrame(json.dumps(message), str(msg_type), recorded_at)
+
+
+def _is_segment(path: Path) -> bool:
+    return path.name.endswith(SEGMENT_SUFFIXES)
+
+
+def _records_from_segment(path: Path) -> Iterable[Any]:
+    """Yield records from a compressed archive segment (tolerates a truncated tail)"""
+    with open_segment(path) as f:
+        try:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Last line cut short by a crash mid-write
+                    logger.warning(f"Skipping truncated record in {path.name}")
+        except EOFError:
+            logger.warning(f"Segment {path.name} ends early (not closed cleanly)")
+
+
+def _records_from_file(path: Path) -> Iterable[Any]:
+    """Yield raw records from a .json / .ndjson capture file or an archive segment"""
+    if _is_segment(path):
+        yield from _records_from_segment(path)
+        return
+
+    text = path.read_text(encoding='utf-8')
+    if path.suffix == '.ndjson':
+        for line in text.splitlines():
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+        return
+
+    data = json.loads(text)
+    if isinstance(data, list):
+        yield from data
+    elif isinstance(data, dict) and isinstance(data.get('messages'), list):
+        yield from data['messages']
+    else:
+        yield data
+
+
+def load_frames(*paths: Path) -> List[ReplayFrame]:
+    """
+    Load recorded frames from files or directories
+
+    Directories are expanded to their *.json / *.ndjson files and archive
+    segments (*.ndjson.gz / *.ndjson.zst). When every frame
+    carries a capture time, frames are replayed in chronological order.
+    """
+    files: List[Path] = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            files.extend(sorted(
+                p for p in path.iterdir()
+                if p.suffix in ('.json', '.ndjson') or _is_segment(p)
+            ))
+        else:
+            files.append(path)
+
+    frames: List[ReplayFrame] = []
+    for file_path in files:
+        for record in _records_from_file(file_path):
+            frame = _frame_from_record(record)
+            if frame:
+                frames.append(frame)
+
+    if frames and all(f.recorded_at is not None for f in frames):
+        frames.sort(key=lambda f: f.recorded_at)
+
+    return frames
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class ReplayStats:
+    """Throughput and per-message-type handler latency for a replay run"""
+
+    def __init__(self):
+        self.frames = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self.latencies: Dict[str, List[float]] = {}
+
+    def record(self, msg_type: str, seconds: float):
+        self.frames += 1
+        self.latencies.setdefault(msg_type, []).append(seconds)
+
+    def report(self) -> Dict[str, Any]:
+        by_type = {}
+        for msg_type, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            by_type[msg_type] = {
+                'count': len(ordered),
+                'p50_ms': round(_percentile(ordered, 50) * 1000, 3),
+                'p95_ms': round(_percentile(ordered, 95) * 1000, 3),
+                'max_ms': round(ordered[-1] * 1000, 3),
+                'total_ms': round(sum(ordered) * 1000, 3),
+            }
+
+        return {
+            'frames': self.frames,
+            'errors': self.errors,
+            'elapsed_s': round(self.elapsed, 4),
+            'frames_per_sec': round(self.frames / self.elapsed, 1) if self.elapsed else 0.0,
+            'by_type': by_type,
+        }
+
+
+class FrameReplayer:
+    """
+    Replays frames into an async handler with configurable pacing
+
+    speed=1.0 reproduces the recorded timing, speed=N replays N times faster
+    and speed=0 feeds frames back-to-back as fast as the handler allows.
+    """
+
+    def __init__(self, frames: List[ReplayFrame], speed: float = 0.0, loops: int = 1):
+        self.frames = frames
+        self.speed = speed
+        self.loops = max(1, loops)
+
+    async def run(self, handler: FrameHandler) -> ReplayStats:
+        stats = ReplayStats()
+        started = time.perf_counter()
+
+        for _ in range(self.loops):
+            loop_started = time.perf_counter()
+            first_at = self.frames[0].recorded_at if self.frames else None
+
+            for frame in self.frames:
+                if self.speed > 0 and first_at is not None and frame.recorded_at is not None:
+                    due = loop_started + (frame.recorded_at - first_at) / self.speed
+                    delay = due - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                t0 = time.perf_counter()
+                try:
+                    await handler(frame.payload)
+                except Exception as e:
+                    stats.errors += 1
+                    logger.warning(f"Replay handler error on {frame.msg_type}: {e}")
+                stats.record(frame.msg_type, time.perf_counter() - t0)
+
+        stats.elapsed = time.perf_counter() - started
+        return stats
+
+
+# ============== Local stand-ins ==============
+
+
+class ReplayTelegram:
+    """Telegram stand-in that records every send_* call instead of sending it"""
+
+    def __init__(self):
+        self.sent: List[tuple] = []
+
+    def __getattr__(self, name: str):
+        if not name.startswith('send_'):
+            raise AttributeError(name)
+
+        async def _record(*args, **kwargs):
+            self.sent.append((name, args[0] if args else kwargs))
+            return True
+
+        return _record
+
+
+class ReplayBotDB:
+    """In-memory stand-in for dragon_bot_ml.DragonBotDB"""
+
+    def __init__(self):
+        self.pool = None
+        self.rounds: Dict[str, Dict[str, Any]] = {}
+        self.predictions: List[Dict[str, Any]] = []
+        self.strategy_votes: List[Dict[str, Any]] = []
+        self.roads: Dict[str, Dict[str, Any]] = {}
+        self.strategy_accuracy = StrategyLedger()
+        # Same interface as DragonBotDB; nothing runs through it offline
+        self.queries = QueryCatalog()
+
+    async def init(self):
+        return None
+
+    async def save_round(self, data):
+        if not data.get('game_id') or not data.get('winner'):
+            return False
+        if str(data['game_id']) in self.rounds:
+            return False
+        self.rounds[str(data['game_id'])] = {**data, 'timestamp': datetime.utcnow()}
+        return True
+
+    async def resolve_round(self, data, include_totals=False, include_accuracy=False,
+                            min_votes=3):
+        resolved = {
+            'inserted': False,
+            'predictions_updated': 0,
+            'votes_updated': 0,
+            'total_stats': None,
+            'strategy_accuracy': None,
+        }
+        if not data.get('game_id') or not data.get('winner'):
+            return resolved
+        game_id, winner = data['game_id'], data['winner']
+        resolved['inserted'] = await self.save_round(data)
+        resolved['predictions_updated'] = await self.update_prediction_result(game_id, winner)
+        resolved['votes_updated'] = await self.update_strategy_votes_result(
+            game_id, winner, data.get('shoe_cards_out')
+        )
+        if include_totals:
+            resolved['total_stats'] = await self.get_total_prediction_stats()
+        if include_accuracy:
+            resolved['strategy_accuracy'] = await self.get_strategy_accuracy(min_votes)
+        return resolved
+
+    async def save_roads(self, game_id, roads_data):
+        self.roads[str(game_id)] = roads_data
+
+    async def save_prediction(self, game_id, predicted, confidence):
+        if not game_id or not predicted:
+            return
+        self.predictions.append({
+            'game_id': str(game_id),
+            'predicted_winner': str(predicted),
+            'confidence': float(confidence),
+            'actual_winner': None,
+            'was_correct': None,
+        })
+
+    @staticmethod
+    def _resolve(rows, game_id, actual_winner):
+        resolved = []
+        for row in rows:
+            if row['game_id'] == str(game_id) and row['actual_winner'] is None:
+                row['actual_winner'] = str(actual_winner)
+                row['was_correct'] = row['predicted_winner'] == str(actual_winner)
+                resolved.append(row)
+        return resolved
+
+    async def update_prediction_result(self, game_id, actual_winner):
+        if not game_id or not actual_winner:
+            return 0
+        return len(self._resolve(self.predictions, game_id, actual_winner))
+
+    async def save_strategy_votes(self, game_id, strategies_list):
+        if not game_id or not strategies_list:
+            return
+        await self.save_strategy_votes_many([(game_id, strategies_list)])
+
+    async def save_strategy_votes_many(self, votes):
+        written = 0
+        for game_id, strategies_list in votes:
+            if not game_id:
+                continue
+            for s in strategies_list or []:
+                name = s.get('strategy') or s.get('type') or 'unknown'
+                pred = s.get('predicted') or s.get('prediction')
+                if not name or not pred:
+                    continue
+                self.strategy_votes.append({
+                    'game_id': str(game_id),
+                    'strategy_name': str(name),
+                    'predicted_winner': str(pred),
+                    'actual_winner': None,
+                    'was_correct': None,
+                })
+                written += 1
+        return written
+
+    async def update_strategy_votes_result(self, game_id, actual_winner, shoe_cards_out=None):
+        if not game_id or not actual_winner:
+            return 0
+        votes = self._resolve(self.strategy_votes, game_id, actual_winner)
+        for vote in votes:
+            self.strategy_accuracy.apply(
+                vote['strategy_name'], vote['was_correct'], vote['actual_winner'], shoe_cards_out
+            )
+        return len(votes)
+
+    async def get_strategy_accuracy(self, min_votes=5):
+        return self.strategy_accuracy.accuracy(min_votes)
+
+    async def get_total_prediction_stats(self):
+        resolved = [p for p in self.predictions if p['actual_winner'] is not None]
+        return {
+            'total': len(resolved),
+            'correct': sum(1 for p in resolved if p['was_correct']),
+        }
+
+    async def get_global_accuracy(self):
+        return await self.get_total_prediction_stats()
+
+    def _table_rounds(self, table_id=None):
+        rows = list(self.rounds.values())
+        if table_id is None:
+            return rows
+        return [r for r in rows if r.get('table_id') == table_id]
+
+    async def get_round_arrays(self, limit=100, table_id=None):
+        rows = self._table_rounds(table_id)[-limit:]
+        return RoundArrays.from_rows([{c: r.get(c) for c in COLUMNS} for r in rows])
+
+    async def get_recent_stats(self, limit=81, table_id=None):
+        stats = {'player': 0, 'banker': 0, 'tie': 0}
+        for row in self._table_rounds(table_id)[-limit:]:
+            winner = str(row['winner']).lower()
+            if winner in stats:
+                stats[winner] += 1
+        return stats
+
+
+# ============== Targets ==============
+
+
+def build_bot_target():
+    """Create a DragonBot wired to in-memory DB and Telegram stand-ins"""
+    from dragon_bot_ml import DragonBot
+
+    bot = DragonBot(ReplayBotDB(), 'replay://', telegram=ReplayTelegram())
+    return bot.process_message, bot
+
+
+async def build_scraper_target(db_path: str = ':memory:'):
+    """Create an EvolutionScraper whose results go to a throwaway SQLite database"""
+    from src import scraper as scraper_module
+
+    database = scraper_module.db.__class__(db_path=Path(db_path))
+    await database.connect()
+    scraper_module.db = database
+    scraper = scraper_module.EvolutionScraper()
+
+    async def handler(payload: str):
+        await scraper._on_ws_message('replay://', payload)
+
+    return handler, scraper
+
+
+async def replay(
+    paths: List[Path],
+    target: str = 'bot',
+    speed: float = 0.0,
+    loops: int = 1,
+) -> Dict[str, Any]:
+    """Replay recorded frames into the bot or scraper and return the report"""
+    frames = load_frames(*paths)
+    logger.info(f"▶️ Replaying {len(frames)} frames into {target} (speed={speed or 'max'})")
+    latency.reset()
+
+    if target != 'scraper':
+        handler, bot = build_bot_target()
+        report = (await FrameReplayer(frames, speed=speed, loops=loops).run(handler)).report()
+        report['target'] = target
+        report['rounds_saved'] = len(bot.db.rounds)
+        report['telegram_messages'] = len(bot.telegram.sent)
+        latencies = sorted(bot.newgame_latency_ms)
+        report['newgame_to_telegram_ms'] = {
+            'count': len(latencies),
+            'p50': round(_percentile(latencies, 50), 3),
+            'p95': round(_percentile(latencies, 95), 3),
+            'max': round(latencies[-1], 3) if latencies else 0.0,
+        }
+        report['stages_ms'] = latency.snapshot()['stages']
+        return report
+
+    from src import scraper as scraper_module
+
+    original_db = scraper_module.db
+    try:
+        handler, _ = await build_scraper_target()
+        report = (await FrameReplayer(frames, speed=speed, loops=loops).run(handler)).report()
+        report['target'] = target
+        report['rounds_saved'] = scraper_module.db.rounds_captured
+        report['stages_ms'] = latency.snapshot()['stages']
+        await scraper_module.db.close()
+    finally:
+        scraper_module.db = original_db
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay recorded Evolution WebSocket frames offline",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python -m src.replay ws_samples                        # As fast as possible into DragonBot
+  python -m src.replay capture.json --speed 1            # Real-time pacing
+  python -m src.replay capture.json --speed 20 --target scraper
+        """
+    )
+    parser.add_argument("paths", nargs='+', type=Path, help="Capture files or directories")
+    parser.add_argument(
+        "--target", choices=['bot', 'scraper'], default='bot',
+        help="Consumer to drive (default: bot)"
+    )
+    parser.add_argument(
+        "--speed", type=float, default=0.0,
+        help="Pacing multiplier: 1 = real time, N = N× faster, 0 = as fast as possible"
+    )
+    parser.add_argument(
+        "--loops", type=int, default=1,
+        help="Replay the capture this many times (useful for throughput runs)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    report = asyncio.run(replay(args.paths, args.target, args.speed, args.loops))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Columnar round history for model training and strategy warm-up
+
+RoundArrays keeps the last N rounds as one small NumPy array per column
+instead of a DataFrame of Python objects:
+
+    winner         int8    index in WINNERS (Banker 0, Player 1, Tie 2), -1 unknown
+    player_score   uint8
+    banker_score   uint8
+    player_pair    bool
+    banker_pair    bool
+    is_natural     bool
+
+That is 6 bytes per round. WINNERS is in LabelEncoder order, so the winner
+column doubles as the training labels. Rows are kept oldest first, the order
+in which predictors and strategies consume history; the fetch methods
+(DragonBotDB / Database.get_round_arrays) reverse the newest-first LIMIT
+query before building the arrays.
+"""
+from typing import Any, Iterable, Iterator, Mapping, Sequence, Tuple
+
+import numpy as np
+
+WINNERS = ('Banker', 'Player', 'Tie')
+
+WINNER_CODES = {name: code for code, name in enumerate(WINNERS)}
+# sqlite baccarat_results stores the result letter
+WINNER_CODES.update({name[0]: code for code, name in enumerate(WINNERS)})
+
+COLUMNS = ('winner', 'player_score', 'banker_score', 'player_pair', 'banker_pair', 'is_natural')
+
+# Code -> name; -1 (unknown) picks the trailing None
+_NAMES = np.array(WINNERS + (None,), dtype=object)
+
+
+class RoundArrays:
+    """Round columns as NumPy arrays, oldest round first"""
+
+    __slots__ = COLUMNS
+
+    def __init__(self, winner: np.ndarray, player_score: np.ndarray, banker_score: np.ndarray,
+                 player_pair: np.ndarray, banker_pair: np.ndarray, is_natural: np.ndarray):
+        self.winner = winner
+        self.player_score = player_score
+        self.banker_score = banker_score
+        self.player_pair = player_pair
+        self.banker_pair = banker_pair
+        self.is_natural = is_natural
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Mapping[str, Any]]) -> 'RoundArrays':
+        """
+        Arrays from rows in the given order
+
+        Rows are mappings with the COLUMNS keys (asyncpg Record, sqlite3.Row,
+        dict). NULL scores become 0 and NULL flags False, as the DataFrame
+        path did.
+        """
+        count = len(rows)
+
+        def column(name: str, dtype, convert) -> np.ndarray:
+            return np.fromiter((convert(r[name]) for r in rows), dtype=dtype, count=count)
+
+        return cls(
+            column('winner', np.int8, lambda w: WINNER_CODES.get(w, -1)),
+            column('player_score', np.uint8, lambda s: s or 0),
+            column('banker_score', np.uint8, lambda s: s or 0),
+            column('player_pair', np.bool_, bool),
+            column('banker_pair', np.bool_, bool),
+            column('is_natural', np.bool_, bool),
+        )
+
+    def __len__(self) -> int:
+        return len(self.winner)
+
+    def tail(self, n: int) -> 'RoundArrays':
+        """The last n rounds (views, no copy)"""
+        start = max(len(self) - n, 0)
+        return RoundArrays(*(getattr(self, name)[start:] for name in COLUMNS))
+
+    def winners(self) -> list:
+        """Winner names ('Banker' / 'Player' / 'Tie', None if unknown)"""
+        return _NAMES[self.winner].tolist()
+
+    def scores(self) -> list:
+        """(player_score, banker_score) tuples"""
+        return list(zip(self.player_score.tolist(), self.banker_score.tolist()))
+
+    def iter_rounds(self) -> Iterator[Tuple[Any, ...]]:
+        """Plain-Python rows: (winner, player_score, banker_score, player_pair,
+        banker_pair, is_natural)"""
+        return zip(self.winners(), *(getattr(self, name).tolist() for name in COLUMNS[1:]))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in COLUMNS)
+
+
+def round_arrays(rows: Iterable[Mapping[str, Any]]) -> RoundArrays:
+    """RoundArrays from newest-first rows (as returned by the LIMIT queries)"""
+    return RoundArrays.from_rows(list(rows)[::-1])
@@ -20,7 +20,7 @@ import zlib
 from datetime import datetime
 from logging.handlers import TimedRotatingFileHandler
 from pathlib import Path
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 import aiohttp
 from playwright.async_api import BrowserContext, Page, Request, Route, WebSocket, async_playwright
@@ -30,6 +30,13 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from config import config
 from database import db
+from frame_archive import build_archive
+from frame_dedupe import FrameDeduper
+from ingest_queue import FrameQueue
+from src.latency import latency
+from src.ws_messages import Resolved, decode
+from src.ws_protocol import extract_json_object, sniff_type
+from table_state import TableState, build_tables
 
 Path(config.LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
 
@@ -48,6 +55,12 @@ logger = logging.getLogger(__name__)
 # Patterns that indicate a request is related to Evolution Gaming
 _EVOLUTION_URL_KEYWORDS = ('evolution', 'evo-', '/game/', '/round/', '/result/')
 
+# Evolution winner names -> stored result codes
+_WINNER_CODES = {'PLAYER': 'P', 'BANKER': 'B', 'TIE': 'T', 'P': 'P', 'B': 'B', 'T': 'T'}
+
+# A table page without WS frames for this long is reconnected
+_STALE_SECONDS = 180
+
 
 class EvolutionScraper:
     """
@@ -67,12 +80,32 @@ class EvolutionScraper:
         self.page: Optional[Page] = None
         self.running = False
         self.rounds_captured = 0
-        self.last_round_id: Optional[str] = None
         self.websocket_connections: list = []
+        self.frame_queues: Dict[WebSocket, FrameQueue] = {}
         self.on_result_callback: Optional[Callable] = None
-        self.last_frame_at: Optional[datetime] = None
         self.last_session_refresh_at: Optional[datetime] = None
         self.black_screen_consecutive_hits = 0
+        # Typed Evolution frames are routed by "type"; anything not listed is dropped undecoded
+        self._ws_dispatch: Dict[str, Callable[[str], Awaitable[None]]] = {
+            'baccarat.newGame': self._on_round_frame,
+            'baccarat.cardDealt': self._on_round_frame,
+            'baccarat.potentialMultipliers': self._on_round_frame,
+            'baccarat.resolved': self._on_resolved_frame,
+        }
+        # One page per watched table in the same context; the first one is self.page
+        self.tables: Dict[str, TableState] = build_tables(
+            config.GAME_TABLES, config.GAME_TABLE_ID, config.GAME_URL
+        )
+        self.main_table: TableState = next(iter(self.tables.values()))
+        # Shared by every connection: drops frames already received on another socket
+        self.deduper = FrameDeduper(
+            max_entries=config.WS_DEDUPE_MAX_ENTRIES,
+            window_seconds=config.WS_DEDUPE_WINDOW_SECONDS,
+        )
+        self.ws_frame_counts: Dict[str, int] = {'dispatched': 0, 'ignored': 0, 'untyped': 0}
+        # Raw frames to compressed NDJSON segments (background thread, None if disabled)
+        self.archive = build_archive(config)
+        latency.enabled = config.LATENCY_METRICS_ENABLED
 
     def _build_context_kwargs(self) -> Dict[str, Any]:
         """Build browser context args, avoiding bot-signature UA patterns."""
@@ -184,11 +217,14 @@ class EvolutionScraper:
         logger.info("=" * 60)
         logger.info("🎰 EVOLUTION GAMING BACCARAT SCRAPER")
         logger.info("=" * 60)
-        logger.info(f"Target: {config.GAME_URL}")
+        for table in self.tables.values():
+            logger.info(f"Target [{table.table_id}]: {table.url}")
         logger.info(f"Headless: {config.HEADLESS}")
 
         # Connect to database
         await db.connect()
+        if self.archive:
+            self.archive.start()
 
         # Launch browser
         self.playwright = await async_playwright().start()
@@ -202,6 +238,7 @@ class EvolutionScraper:
         await self.context.add_init_script(self._stealth_init_script())
 
         self.page = await self.context.new_page()
+        self.main_table.page = self.page
 
         # Setup interceptors
         await self._setup_interceptors()
@@ -225,48 +262,74 @@ class EvolutionScraper:
 
         if not self.page or self.page.is_closed():
             self.page = await self.context.new_page()
+            self.main_table.page = self.page
             await self._setup_interceptors()
             logger.info("✅ Browser page recreated")
 
-    async def _setup_interceptors(self):
-        """Setup WebSocket and XHR interceptors"""
+    async def _setup_interceptors(self, page: Optional[Page] = None,
+                                  table: Optional[TableState] = None):
+        """Setup WebSocket and XHR interceptors (frames are routed to the page's table)"""
+        page = page or self.page
+        table = table or self.main_table
 
         # Intercept WebSocket connections
-        self.page.on('websocket', self._on_websocket)
+        page.on('websocket', lambda ws: self._on_websocket(ws, table))
 
         # Intercept XHR/Fetch requests
-        await self.page.route('**/*', self._on_request)
+        await page.route('**/*', lambda route, request: self._on_request(route, request, table))
 
         # Log console messages for debugging
-        self.page.on('console', lambda msg: logger.debug(f"[CONSOLE] {msg.text}"))
+        page.on('console', lambda msg: logger.debug(f"[CONSOLE] {msg.text}"))
 
         logger.info("✅ Interceptors configured")
 
-    def _on_websocket(self, ws: WebSocket):
+    def _on_websocket(self, ws: WebSocket, table: Optional[TableState] = None):
         """Handle new WebSocket connection"""
-        logger.info(f"🔌 WebSocket connected: {ws.url}")
+        table = table or self.main_table
+        logger.info(f"🔌 WebSocket connected [{table.table_id}]: {ws.url}")
         self.websocket_connections.append(ws)
+        table.sockets += 1
+
+        # One ordered consumer per connection instead of a task per frame
+        queue = FrameQueue(
+            lambda payload: self._on_ws_message(ws.url, payload, table),
+            maxsize=config.WS_QUEUE_MAXSIZE,
+            drop_types=config.WS_QUEUE_DROP_TYPES,
+            name=ws.url[:80],
+        ).start()
+        self.frame_queues[ws] = queue
 
         def _handle_frame(payload):
             try:
-                asyncio.create_task(self._on_ws_message(ws.url, payload))
+                # Same message seen on another socket (reconnect / iframe reload)
+                if self.deduper.is_duplicate(payload):
+                    return
+                if self.archive:
+                    self.archive.write(payload)
+                queue.put(payload)
             except Exception as exc:
-                logger.error(f"Failed to schedule WS message task: {exc}")
+                logger.error(f"Failed to enqueue WS frame: {exc}")
 
         # Listen for messages
         ws.on('framereceived', _handle_frame)
 
-        ws.on('close', lambda: self._on_ws_close(ws))
+        ws.on('close', lambda: self._on_ws_close(ws, table))
         ws.on(
             'socketerror',
             lambda err: logger.error(f"🔌 WebSocket error on {ws.url}: {err}"),
         )
 
-    def _on_ws_close(self, ws: WebSocket):
+    def _on_ws_close(self, ws: WebSocket, table: Optional[TableState] = None):
         """Handle WebSocket disconnection"""
-        logger.warning(f"🔌 WebSocket closed: {ws.url}")
+        table = table or self.main_table
+        logger.warning(f"🔌 WebSocket closed [{table.table_id}]: {ws.url}")
         if ws in self.websocket_connections:
             self.websocket_connections.remove(ws)
+            table.sockets -= 1
+        queue = self.frame_queues.pop(ws, None)
+        if queue:
+            queue.close()
+            logger.info(f"   Frame queue stats: {queue.stats()}")
         active = len(self.websocket_connections)
         logger.info(f"   Active WebSocket connections remaining: {active}")
         if active == 0:
@@ -275,52 +338,107 @@ class EvolutionScraper:
                 " — will attempt reconnect on next stale check"
             )
 
-    async def _on_ws_message(self, url: str, payload: dict):
-        """Process WebSocket message"""
-        try:
-            self.last_frame_at = datetime.utcnow()
-            db.last_frame_at = self.last_frame_at.isoformat()
-            # Robust handling for different payload types (str, bytes, dict, other)
+    @staticmethod
+    def _frame_text(payload: Any) -> str:
+        """Normalize a WS payload (str, bytes, dict, other) to text"""
+        if isinstance(payload, str):
+            return payload
+        if isinstance(payload, bytes):
             try:
-                payload_type = type(payload).__name__
-                logger.debug(f"WS payload type: {payload_type}")
+                return payload.decode('utf-8', errors='ignore')
             except Exception:
-                payload_type = str(type(payload))
+                return str(payload)
+        if isinstance(payload, dict):
+            return payload.get('payload', '') if payload.get('payload', None) is not None else str(payload)
+        try:
+            return str(payload)
+        except Exception:
+            return ''
 
-            if isinstance(payload, bytes):
-                try:
-                    data = payload.decode('utf-8', errors='ignore')
-                except Exception:
-                    data = str(payload)
-            elif isinstance(payload, str):
-                data = payload
-            elif isinstance(payload, dict):
-                data = payload.get('payload', '') if payload.get('payload', None) is not None else str(payload)
-            else:
-                # Fallback: stringify payload
-                try:
-                    data = str(payload)
-                except Exception:
-                    data = ''
-
-            # Try to parse as JSON
-            if isinstance(data, str):
-                # Evolution uses various message formats
-                # Look for game result patterns
-                data_lower = data.lower()
-                if any(keyword in data_lower for keyword in [
-                    'result', 'winner', 'player', 'banker', 'tie',
-                    'roundresult', 'gameresult', 'baccarat'
-                ]):
-                    logger.debug(f"📨 Potential result message: {data[:200]}...")
-                    await self._parse_evolution_message(data)
+    async def _on_ws_message(self, url: str, payload: Any, table: Optional[TableState] = None):
+        """Process WebSocket message"""
+        table = table or self.main_table
+        try:
+            table.last_frame_at = datetime.utcnow()
+            db.last_frame_at = table.last_frame_at.isoformat()
+            table.frames += 1
+
+            if isinstance(payload, dict):
+                payload = self._frame_text(payload)
+
+            # Fast path: route typed Evolution frames by the "type" prefix,
+            # dropping chat/balance/video noise before decoding it
+            msg_type = sniff_type(payload)
+            if msg_type is not None:
+                handler = self._ws_dispatch.get(msg_type)
+                if handler is None:
+                    self.ws_frame_counts['ignored'] += 1
+                    return
+                self.ws_frame_counts['dispatched'] += 1
+                await handler(self._frame_text(payload), table)
+                return
+
+            # Untyped frames: legacy keyword scan for other result formats
+            self.ws_frame_counts['untyped'] += 1
+            data = self._frame_text(payload)
+            data_lower = data.lower()
+            if any(keyword in data_lower for keyword in [
+                'result', 'winner', 'player', 'banker', 'tie',
+                'roundresult', 'gameresult', 'baccarat'
+            ]):
+                logger.debug(f"📨 Potential result message: {data[:200]}...")
+                await self._parse_evolution_message(data, table)
 
         except asyncio.CancelledError:
             raise
         except Exception as e:
             logger.error(f"Error processing WS message: {e}\n{traceback.format_exc()}")
 
-    async def _on_request(self, route: Route, request: Request):
+    async def _on_round_frame(self, data: str, table: TableState):
+        """newGame/cardDealt/potentialMultipliers: accumulate round state by gameId"""
+        msg = decode(data)
+        if msg is None:
+            return
+        if msg.type == 'baccarat.newGame':
+            table.rounds.start(msg)
+        elif msg.type == 'baccarat.cardDealt':
+            table.rounds.round_for(msg).apply_card_dealt(msg)
+        else:
+            table.rounds.round_for(msg).apply_multipliers(msg)
+
+    async def _on_resolved_frame(self, data: str, table: TableState):
+        """baccarat.resolved: the result is under args.result, the game id under args"""
+        msg = decode(data)
+        if msg is None:
+            return
+
+        result = self._result_from_resolved(msg, table)
+        await self._process_table_result(result, table)
+
+    async def _process_table_result(self, result: Optional[Dict[str, Any]], table: TableState):
+        """Process a result once per round of its table"""
+        if result and result.get('round_id') != table.last_round_id:
+            table.last_round_id = result['round_id']
+            result['table_id'] = table.table_id
+            await self._process_result(result)
+
+    def ingest_stats(self) -> Dict[str, Any]:
+        """Queue depth and drop counters for every open WebSocket"""
+        queues = [q.stats() for q in self.frame_queues.values()]
+        return {
+            'frames': dict(self.ws_frame_counts),
+            'dedupe': self.deduper.stats(),
+            'tables': [table.stats() for table in self.tables.values()],
+            'archive': self.archive.stats() if self.archive else None,
+            'connections': len(queues),
+            'depth': sum(q['depth'] for q in queues),
+            'dropped_total': sum(q['dropped_total'] for q in queues),
+            'round_dropped': sum(q['round_dropped'] for q in queues),
+            'queues': queues,
+        }
+
+    async def _on_request(self, route: Route, request: Request,
+                          table: Optional[TableState] = None):
         """Intercept HTTP requests without breaking provider iframe/media loading."""
         url = request.url
         url_lower = url.lower()
@@ -350,7 +468,7 @@ class EvolutionScraper:
                 
                 # Check if response contains game data
                 if response.ok and body:
-                    await self._parse_api_response(url, body)
+                    await self._parse_api_response(url, body, table)
             else:
                 # Skip binary responses (images, etc.)
                 logger.debug(f"Skipping binary response: {content_type}")
@@ -364,7 +482,7 @@ class EvolutionScraper:
             except Exception:
                 pass
 
-    async def _parse_evolution_message(self, data: str):
+    async def _parse_evolution_message(self, data: str, table: Optional[TableState] = None):
         """Parse Evolution Gaming message for results"""
         try:
             # Try JSON parse
@@ -372,31 +490,26 @@ class EvolutionScraper:
                 msg = json.loads(data)
             except (json.JSONDecodeError, ValueError):
                 # Try to extract JSON from message
-                json_match = re.search(r'\{.*\}', data, re.DOTALL)
-                if json_match:
-                    msg = json.loads(json_match.group())
+                json_text = extract_json_object(data)
+                if json_text:
+                    msg = json.loads(json_text)
                 else:
                     return
 
             # Look for result data in various Evolution message formats
             result = self._extract_baccarat_result(msg)
-
-            if result and result.get('round_id') != self.last_round_id:
-                self.last_round_id = result['round_id']
-                await self._process_result(result)
+            await self._process_table_result(result, table or self.main_table)
 
         except Exception as e:
             logger.debug(f"Could not parse message: {e}")
 
-    async def _parse_api_response(self, url: str, body: str):
+    async def _parse_api_response(self, url: str, body: str,
+                                  table: Optional[TableState] = None):
         """Parse API response for results"""
         try:
             data = json.loads(body)
             result = self._extract_baccarat_result(data)
-
-            if result and result.get('round_id') != self.last_round_id:
-                self.last_round_id = result['round_id']
-                await self._process_result(result)
+            await self._process_table_result(result, table or self.main_table)
 
         except Exception as e:
             logger.debug(f"Could not parse API response: {e}")
@@ -501,6 +614,39 @@ class EvolutionScraper:
             'raw_data': result_data
         }
 
+    def _result_from_resolved(self, msg: Resolved,
+                              table: Optional[TableState] = None) -> Optional[Dict[str, Any]]:
+        """Build a result from a typed baccarat.resolved message"""
+        winner = _WINNER_CODES.get(str(msg.winner).upper())
+        if not winner:
+            return None
+
+        table = table or self.main_table
+        game_round = table.rounds.resolve(msg)
+
+        player_score = msg.player_score
+        banker_score = msg.banker_score
+        is_natural = False
+        if player_score is not None and banker_score is not None:
+            is_natural = (player_score in [8, 9]) or (banker_score in [8, 9])
+
+        return {
+            'round_id': str(msg.game_id) if msg.game_id else f"evo_{datetime.now().timestamp()}",
+            'timestamp': datetime.utcnow().isoformat(),
+            'result': winner,
+            'player_score': player_score,
+            'banker_score': banker_score,
+            'player_cards': list(game_round.player_cards),
+            'banker_cards': list(game_round.banker_cards),
+            'player_pair': msg.player_pair,
+            'banker_pair': msg.banker_pair,
+            'lightning_cards': [],
+            'multipliers': game_round.lightning_multipliers or {},
+            'table_id': table.table_id,
+            'is_natural': is_natural,
+            'raw_data': {**msg.result, 'gameId': msg.game_id},
+        }
+
     def _validate_result(self, result: Dict[str, Any]) -> bool:
         if not result.get('round_id') or not result.get('result'):
             return False
@@ -514,6 +660,9 @@ class EvolutionScraper:
             logger.warning(f"⚠️ Invalid result skipped: {result}")
             return
         self.rounds_captured += 1
+        table = self.tables.get(result.get('table_id'))
+        if table:
+            table.rounds_captured += 1
 
         # Log result
         emoji = {'P': '🔵', 'B': '🔴', 'T': '🟢'}
@@ -524,7 +673,9 @@ class EvolutionScraper:
         )
 
         # Save to database
-        await db.insert_result(result)
+        with latency.span('db.insert_result', 'result'):
+            await db.insert_result(result)
+        latency.record_since_frame('frame_to_db', 'result')
 
         # Call callback if set
         if self.on_result_callback:
@@ -532,7 +683,8 @@ class EvolutionScraper:
 
         # Send webhook if enabled
         if config.WEBHOOK_ENABLED and config.WEBHOOK_URL:
-            await self._send_webhook(result)
+            with latency.span('webhook', 'result'):
+                await self._send_webhook(result)
 
     async def _send_webhook(self, result: Dict[str, Any]):
         """Send result to webhook URL"""
@@ -948,7 +1100,9 @@ class EvolutionScraper:
 
                 await self.page.goto(lobby_url, wait_until='domcontentloaded', timeout=60000)
                 await asyncio.sleep(2)
-                await self.page.goto(config.GAME_URL, wait_until='domcontentloaded', timeout=60000)
+                await self.page.goto(
+                    self.main_table.url, wait_until='domcontentloaded', timeout=60000
+                )
                 await asyncio.sleep(config.GAME_RENDER_WAIT_SECONDS)
                 await self._accept_cookie_bar_if_present()
                 await self.inspect_game_render_state()
@@ -1084,11 +1238,12 @@ class EvolutionScraper:
 
     async def navigate_to_game(self):
         """Navigate to the baccarat game"""
-        logger.info(f"🎮 Navigating to game: {config.GAME_URL}")
+        logger.info(f"🎮 Navigating to game: {self.main_table.url}")
 
         try:
             await self._ensure_page_available()
-            await self.page.goto(config.GAME_URL, wait_until='domcontentloaded', timeout=60000)
+            await self.page.goto(self.main_table.url, wait_until='domcontentloaded', timeout=60000)
+            self.main_table.loaded_at = datetime.utcnow()
             await asyncio.sleep(config.GAME_RENDER_WAIT_SECONDS)
             await self._accept_cookie_bar_if_present()
             logger.info("✅ Game URL loaded")
@@ -1170,14 +1325,46 @@ class EvolutionScraper:
             logger.error(f"Current URL: {current_url}")
             raise
 
+    async def _open_table_pages(self):
+        """
+        Multi-table mode: open every other table in its own page of the same context
+
+        The pages share the browser process, session cookies, database and
+        webhook; only the game stream differs. Pages already open are kept.
+        """
+        for table in self.tables.values():
+            if table is self.main_table:
+                continue
+            if table.page is not None and not table.page.is_closed():
+                continue
+            try:
+                page = await self.context.new_page()
+                await self._setup_interceptors(page, table)
+                table.page = page
+                logger.info(f"🎮 Opening table {table.table_id}: {table.url}")
+                await page.goto(table.url, wait_until='domcontentloaded', timeout=60000)
+                table.loaded_at = datetime.utcnow()
+            except Exception as e:
+                logger.warning(f"Could not open table {table.table_id}: {e}")
+
+    async def _reload_table_page(self, table: TableState):
+        """Reload the page of one secondary table (reopened if it was closed)"""
+        if table.page is None or table.page.is_closed():
+            await self._open_table_pages()
+            return
+        logger.info(f"🔄 Reloading table {table.table_id}")
+        await table.page.reload(wait_until='domcontentloaded', timeout=60000)
+        table.loaded_at = datetime.utcnow()
+
     async def run(self):
         """Main run loop"""
         try:
             await self.start()
             # Skip login for live-casino URLs as they may not require authentication
-            if 'live-casino' not in config.GAME_URL:
+            if 'live-casino' not in self.main_table.url:
                 await self.login()
             await self.navigate_to_game()
+            await self._open_table_pages()
         except Exception as e:
             logger.error(f"❌ Fatal error during startup: {e}\n{traceback.format_exc()}")
             await self.stop()
@@ -1207,18 +1394,24 @@ class EvolutionScraper:
                     _last_status_count = self.rounds_captured
                     try:
                         stats = await db.get_statistics(1)
+                        ingest = self.ingest_stats()
                         logger.info(
                             f"📊 Status: {self.rounds_captured} rounds | "
                             f"Last hour: P:{stats['player_wins']} "
-                            f"B:{stats['banker_wins']} T:{stats['ties']}"
+                            f"B:{stats['banker_wins']} T:{stats['ties']} | "
+                            f"Queue depth: {ingest['depth']} "
+                            f"dropped: {ingest['dropped_total']} "
+                            f"(round frames: {ingest['round_dropped']}) | "
+                            f"Dedupe hit rate: {ingest['dedupe']['hit_rate']:.1%}"
                         )
                     except Exception as e:
                         logger.warning(f"Could not fetch statistics: {e}")
 
-                # Reconnect if no frames recently
-                if self._is_stale():
-                    await self.inspect_game_render_state()
-                    await self._reconnect_with_backoff()
+                latency.log_if_due(logger, config.LATENCY_LOG_INTERVAL_SECONDS)
+
+                # Reconnect the pages that stopped receiving frames
+                for table in self._stale_tables():
+                    await self._reconnect_with_backoff(table)
 
         except asyncio.CancelledError:
             logger.info("Scraper cancelled")
@@ -1229,15 +1422,13 @@ class EvolutionScraper:
         finally:
             await self.stop()
 
-    def _is_stale(self) -> bool:
-        """Check if we haven't received WS frames in over 3 minutes (increased from 2)"""
-        if not self.last_frame_at:
-            return False
-        delta = datetime.utcnow() - self.last_frame_at
+    def _stale_tables(self) -> List[TableState]:
+        """Tables whose page got no WS frame in over 3 minutes (increased from 2)"""
+        now = datetime.utcnow()
         # Increased from 120s to 180s to reduce unnecessary reconnections
-        stale = delta.total_seconds() > 180
-        if stale:
-            logger.debug(f"Stale check: last frame {delta.total_seconds():.0f}s ago")
+        stale = [table for table in self.tables.values() if table.is_stale(now, _STALE_SECONDS)]
+        for table in stale:
+            logger.debug(f"Stale check: no frame on {table.table_id} for {_STALE_SECONDS}s")
         return stale
 
     def _should_refresh_session(self) -> bool:
@@ -1256,13 +1447,18 @@ class EvolutionScraper:
         except Exception as e:
             logger.warning(f"Session refresh failed: {e}")
 
-    async def _reconnect_with_backoff(self):
-        active = len(self.websocket_connections)
+    async def _reconnect_with_backoff(self, table: Optional[TableState] = None):
+        """
+        Reload the page of a stale table; the main table navigates again (and
+        reopens closed secondary pages), the other tables only reload their page
+        """
+        table = table or self.main_table
         logger.warning(
-            f"⚠️ No WS frames recently (active connections: {active})"
-            f", attempting reconnect..."
+            f"⚠️ No WS frames recently on {table.table_id} "
+            f"(active connections: {table.sockets}), attempting reconnect..."
         )
-        await self.inspect_game_render_state()
+        if table is self.main_table:
+            await self.inspect_game_render_state()
         for attempt in range(1, config.MAX_RECONNECT_ATTEMPTS + 1):
             delay = min(5 * attempt, 30)
             logger.info(
@@ -1271,15 +1467,18 @@ class EvolutionScraper:
             )
             try:
                 await asyncio.sleep(delay)
-                await self.navigate_to_game()
+                if table is self.main_table:
+                    await self.navigate_to_game()
+                    await self._open_table_pages()
+                else:
+                    await self._reload_table_page(table)
                 # Give the page a moment to establish WS connections
                 await asyncio.sleep(5)
-                self.last_frame_at = datetime.utcnow()  # Reset stale timer after navigation
-                if self.websocket_connections:
-                    ws_count = len(self.websocket_connections)
+                table.loaded_at = datetime.utcnow()  # Reset stale timer after navigation
+                if table.sockets:
                     logger.info(
-                        f"✅ Reconnected successfully"
-                        f" ({ws_count} WS connections)"
+                        f"✅ Reconnected {table.table_id} successfully"
+                        f" ({table.sockets} WS connections)"
                     )
                     return
             except asyncio.CancelledError:
@@ -1295,10 +1494,15 @@ class EvolutionScraper:
         logger.info("🛑 Stopping scraper...")
         self.running = False
 
+        for queue in self.frame_queues.values():
+            queue.close()
+        self.frame_queues.clear()
+
         for resource_name, cleanup in [
             ("browser context", self._close_context),
             ("browser", self._close_browser),
             ("playwright", self._close_playwright),
+            ("frame archive", self._close_archive),
             ("database", self._close_db),
         ]:
             try:
@@ -1313,6 +1517,8 @@ class EvolutionScraper:
             await self.context.close()
             self.context = None
             self.page = None
+            for table in self.tables.values():
+                table.page = None
 
     async def _close_browser(self):
         if self.browser:
@@ -1324,6 +1530,11 @@ class EvolutionScraper:
             await self.playwright.stop()
             self.playwright = None
 
+    async def _close_archive(self):
+        if self.archive:
+            # Joins the writer thread after it drains the queue and closes the segment
+            await asyncio.to_thread(self.archive.close)
+
     async def _close_db(self):
         await db.close()
 
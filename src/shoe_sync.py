@@ -0,0 +1,89 @@
+"""
+Incremental sync of Evolution encodedShoeState history
+
+baccarat.encodedShoeState carries the whole history_v2 of the shoe, but
+between two frames it usually grows by a single round. ShoeHistorySync
+remembers the boundary of the last history it applied and tells the caller
+whether the new one is the same history plus N appended rounds (apply only
+the tail), unchanged, or diverged (full resync).
+"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DELTA = 'delta'
+UNCHANGED = 'unchanged'
+RESYNC = 'resync'
+
+
+class ShoeHistorySync:
+    """Detects appended rounds between consecutive history_v2 snapshots"""
+
+    def __init__(self):
+        self.reset()
+        self.deltas = 0
+        self.unchanged = 0
+        self.resyncs: Dict[str, int] = {}
+
+    def reset(self):
+        """Forget the applied history; the next snapshot triggers a full resync"""
+        self._length = 0
+        self._first: Optional[Dict[str, Any]] = None
+        self._last: Optional[Dict[str, Any]] = None
+
+    def diff(self, history: List[Dict[str, Any]],
+             new_shoe: bool = False) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Compare a history_v2 snapshot with the last applied one
+
+        Only the boundary is checked (first round, and the round at the old
+        tail position), so the cost does not grow with the shoe.
+
+        Args:
+            history: history_v2 list from encodedShoeState
+            new_shoe: caller detected a shoe change (forces a resync)
+
+        Returns:
+            (mode, rounds) where mode is DELTA (rounds = appended tail),
+            UNCHANGED (rounds = []) or RESYNC (rounds = the whole history)
+        """
+        reason = self._resync_reason(history, new_shoe)
+
+        if reason is None:
+            tail = history[self._length:]
+            self._remember(history)
+            if tail:
+                self.deltas += 1
+                return DELTA, tail
+            self.unchanged += 1
+            return UNCHANGED, []
+
+        self._remember(history)
+        self.resyncs[reason] = self.resyncs.get(reason, 0) + 1
+        logger.info(f"🔄 Resync completo del zapato ({reason}): {len(history)} rondas")
+        return RESYNC, history
+
+    def _resync_reason(self, history: List[Dict[str, Any]], new_shoe: bool) -> Optional[str]:
+        if self._first is None:
+            return 'initial'
+        if new_shoe:
+            return 'new_shoe'
+        if len(history) < self._length:
+            return 'shrunk'
+        if history[0] != self._first or history[self._length - 1] != self._last:
+            return 'diverged'
+        return None
+
+    def _remember(self, history: List[Dict[str, Any]]):
+        self._length = len(history)
+        self._first = history[0] if history else None
+        self._last = history[-1] if history else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'deltas': self.deltas,
+            'unchanged': self.unchanged,
+            'resyncs': dict(self.resyncs),
+            'resyncs_total': sum(self.resyncs.values()),
+        }
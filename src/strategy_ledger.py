@@ -0,0 +1,106 @@
+"""
+Per-strategy accuracy ledger
+
+Postgres keeps one strategy_accuracy row per strategy, updated by the same
+statement that resolves the strategy votes of a round (src/queries.py), so
+reading accuracy costs O(number of strategies) however long the vote history
+grows. Each row holds:
+
+- total / correct over all resolved votes, ties (votes resolved by a Tie) and
+  tie_correct (the Tie votes that were right), so accuracy can leave Tie
+  rounds out of both numerator and denominator
+- total / correct per shoe phase (early / middle / late, from the resolved
+  round's shoe_cards_out; rounds without it count in no phase)
+- recent: the outcomes of the last N votes as a '1'/'0' string, oldest first
+
+StrategyLedger is the in-memory equivalent, used by the replay stand-in.
+"""
+from typing import Any, Dict, List, Mapping, Optional
+
+# 8-deck shoe, same phase limits as BaccaratStrategies._get_shoe_phase
+SHOE_CARDS = 416
+EARLY_LIMIT = 0.35
+MIDDLE_LIMIT = 0.70
+PHASES = ('early', 'middle', 'late')
+
+# Votes kept per strategy for the rolling accuracy
+ACCURACY_WINDOW = 100
+
+
+def shoe_phase(shoe_cards_out: Optional[int]) -> Optional[str]:
+    """'early' / 'middle' / 'late' by cards dealt (None when unknown)"""
+    if not shoe_cards_out or shoe_cards_out <= 0:
+        return None
+    used = shoe_cards_out / SHOE_CARDS
+    if used < EARLY_LIMIT:
+        return 'early'
+    if used < MIDDLE_LIMIT:
+        return 'middle'
+    return 'late'
+
+
+def _pct(correct: int, total: int) -> float:
+    return round(correct / total * 100, 2) if total else 0
+
+
+def accuracy_rows(rows: List[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """Report dicts from ledger rows (strategy_accuracy columns)"""
+    report = []
+    for r in rows:
+        recent = r['recent'] or ''
+        recent_correct = recent.count('1')
+        report.append({
+            'strategy': r['strategy_name'],
+            'total': r['total'],
+            'correct': r['correct'],
+            'accuracy': _pct(r['correct'], r['total']),
+            'ties': r['ties'],
+            'tie_correct': r['tie_correct'],
+            'recent_total': len(recent),
+            'recent_correct': recent_correct,
+            'recent_accuracy': _pct(recent_correct, len(recent)),
+            'phases': {
+                phase: {
+                    'total': r[f'{phase}_total'],
+                    'correct': r[f'{phase}_correct'],
+                    'accuracy': _pct(r[f'{phase}_correct'], r[f'{phase}_total']),
+                }
+                for phase in PHASES
+            },
+        })
+    return report
+
+
+class StrategyLedger:
+    """strategy_accuracy rows kept in memory"""
+
+    def __init__(self, window: int = ACCURACY_WINDOW):
+        self.window = window
+        self.rows: Dict[str, Dict[str, Any]] = {}
+
+    def apply(self, strategy_name: str, was_correct: bool, actual_winner: str,
+              shoe_cards_out: Optional[int] = None):
+        row = self.rows.get(strategy_name)
+        if row is None:
+            row = self.rows[strategy_name] = {
+                'strategy_name': strategy_name, 'total': 0, 'correct': 0, 'ties': 0,
+                'tie_correct': 0, 'recent': '',
+                **{f'{phase}_{key}': 0 for phase in PHASES for key in ('total', 'correct')},
+            }
+        hit = 1 if was_correct else 0
+        row['total'] += 1
+        row['correct'] += hit
+        if actual_winner == 'Tie':
+            row['ties'] += 1
+            row['tie_correct'] += hit
+        phase = shoe_phase(shoe_cards_out)
+        if phase:
+            row[f'{phase}_total'] += 1
+            row[f'{phase}_correct'] += hit
+        row['recent'] = (row['recent'] + str(hit))[-self.window:]
+
+    def accuracy(self, min_votes: int = 5) -> List[Dict[str, Any]]:
+        """Same rows and order as the strategy_accuracy query"""
+        rows = [r for r in self.rows.values() if r['total'] >= min_votes]
+        rows.sort(key=lambda r: r['correct'] / r['total'] if r['total'] else 0, reverse=True)
+        return accuracy_rows(rows)
@@ -0,0 +1,64 @@
+"""
+Per-table ingestion state for multi-table mode
+
+Several game pages share one browser context, one database connection and
+one notification path; everything that depends on the game stream itself
+(round assembly, last processed round, frame timestamps) lives here, one
+TableState per watched table. Frames are routed to their table by the page
+whose WebSocket received them, so a page that stops receiving frames is
+detected (is_stale) and reloaded on its own.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.game_round import RoundAssembler
+
+
+class TableState:
+    """State of one watched table"""
+
+    __slots__ = (
+        'table_id', 'url', 'page', 'rounds', 'last_round_id',
+        'rounds_captured', 'frames', 'last_frame_at', 'loaded_at', 'sockets',
+    )
+
+    def __init__(self, table_id: str, url: str):
+        self.table_id = table_id
+        self.url = url
+        self.page = None
+        # Cards/multipliers of recent rounds by gameId, attached to the resolved result
+        self.rounds = RoundAssembler()
+        self.last_round_id: Optional[str] = None
+        self.rounds_captured = 0
+        self.frames = 0
+        self.last_frame_at: Optional[datetime] = None
+        # Last (re)load of the page: the stale timer of a page that never got a frame
+        self.loaded_at: Optional[datetime] = None
+        # Open WebSocket connections of the page
+        self.sockets = 0
+
+    def is_stale(self, now: datetime, seconds: float) -> bool:
+        """No frame for `seconds` since the last frame or page load (False before either)"""
+        since = max((t for t in (self.last_frame_at, self.loaded_at) if t), default=None)
+        return since is not None and (now - since).total_seconds() > seconds
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'table_id': self.table_id,
+            'rounds_captured': self.rounds_captured,
+            'frames': self.frames,
+            'last_frame_at': self.last_frame_at.isoformat() if self.last_frame_at else None,
+            'sockets': self.sockets,
+            'page_open': self.page is not None and not self.page.is_closed(),
+        }
+
+    def __repr__(self) -> str:
+        return f"TableState(table_id={self.table_id!r}, rounds_captured={self.rounds_captured})"
+
+
+def build_tables(tables: List[Tuple[str, str]], default_id: str,
+                 default_url: str) -> 'Dict[str, TableState]':
+    """TableState per configured (table_id, url); the first one is the main table"""
+    if not tables:
+        tables = [(default_id, default_url)]
+    return {table_id: TableState(table_id, url) for table_id, url in tables}
@@ -0,0 +1,343 @@
+"""
+Typed decoders for Evolution baccarat.* WebSocket messages
+
+One schema layer shared by DragonBot, the advanced bot and the scraper:
+frames are classified with sniff_type(), decoded with the fastest JSON
+backend available (orjson, msgspec, or the stdlib json module) and turned
+into small __slots__ structs, so handlers read attributes instead of
+chaining .get('args', {}).get(...) on every frame.
+
+Benchmark decode cost per frame:
+    python -m src.ws_messages ws_samples --loops 1000
+"""
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.latency import latency
+from src.ws_protocol import sniff_type
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional speedup
+    msgspec = None
+
+
+def _json_backends() -> Dict[str, Callable[[Any], Any]]:
+    backends: Dict[str, Callable[[Any], Any]] = {}
+    if orjson is not None:
+        backends['orjson'] = orjson.loads
+    if msgspec is not None:
+        backends['msgspec'] = msgspec.json.Decoder().decode
+    backends['json'] = json.loads
+    return backends
+
+
+JSON_BACKENDS = _json_backends()
+# What a malformed document raises: msgspec.DecodeError is not a ValueError
+DECODE_ERRORS = (ValueError,) + ((msgspec.DecodeError,) if msgspec is not None else ())
+JSON_BACKEND = next(iter(JSON_BACKENDS))
+_loads = JSON_BACKENDS[JSON_BACKEND]
+
+
+def set_json_backend(name: Optional[str] = None) -> str:
+    """
+    Select the JSON backend ('orjson', 'msgspec', 'json'); None picks the fastest installed
+
+    Raises:
+        ValueError: if the backend is not installed
+    """
+    global JSON_BACKEND, _loads
+    if name is None:
+        name = next(iter(JSON_BACKENDS))
+    if name not in JSON_BACKENDS:
+        raise ValueError(f"JSON backend '{name}' not available (installed: {list(JSON_BACKENDS)})")
+    JSON_BACKEND = name
+    _loads = JSON_BACKENDS[name]
+    return name
+
+
+def loads(data: Any) -> Any:
+    """Decode a JSON document with the active backend"""
+    if isinstance(data, str) and JSON_BACKEND == 'msgspec':
+        data = data.encode('utf-8')
+    return _loads(data)
+
+
+def _dict(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+def _list(value: Any) -> List[Any]:
+    return value if isinstance(value, list) else []
+
+
+class Message:
+    """Common envelope of every Evolution frame"""
+
+    __slots__ = ('id', 'type', 'time', 'args')
+
+    def __init__(self, frame: Dict[str, Any]):
+        self.id = frame.get('id')
+        self.type = frame.get('type')
+        self.time = frame.get('time')
+        self.args = _dict(frame.get('args'))
+
+    def __repr__(self) -> str:
+        fields = ', '.join(
+            f"{name}={getattr(self, name)!r}"
+            for name in self.__slots__ if name != 'args'
+        )
+        return f"{type(self).__name__}(id={self.id!r}, {fields})"
+
+
+class NewGame(Message):
+    __slots__ = ('game_id', 'game_number', 'shoe_cards_out')
+
+    def __init__(self, frame: Dict[str, Any]):
+        super().__init__(frame)
+        args = self.args
+        self.game_id = args.get('gameId')
+        self.game_number = args.get('gameNumber')
+        self.shoe_cards_out = args.get('shoeCardsOut')
+
+
+class CardDealt(Message):
+    __slots__ = ('game_id', 'player_cards', 'banker_cards', 'player_score', 'banker_score')
+
+    def __init__(self, frame: Dict[str, Any]):
+        super().__init__(frame)
+        args = self.args
+        game_data = _dict(args.get('gameData'))
+        player_hand = _dict(game_data.get('playerHand'))
+        banker_hand = _dict(game_data.get('bankerHand'))
+        self.game_id = args.get('gameId')
+        self.player_cards = _list(player_hand.get('cards'))
+        self.banker_cards = _list(banker_hand.get('cards'))
+        self.player_score = player_hand.get('score')
+        self.banker_score = banker_hand.get('score')
+
+
+class PotentialMultipliers(Message):
+    __slots__ = ('game_id', 'multipliers')
+
+    def __init__(self, frame: Dict[str, Any]):
+        super().__init__(frame)
+        self.game_id = self.args.get('gameId')
+        self.multipliers = _dict(self.args.get('multipliers'))
+
+
+class Resolved(Message):
+    __slots__ = (
+        'game_id', 'game_number', 'result', 'winner', 'player_score', 'banker_score',
+        'player_pair', 'banker_pair', 'natural', 'winning_spots', 'with_lightning',
+    )
+
+    def __init__(self, frame: Dict[str, Any]):
+        super().__init__(frame)
+        args = self.args
+        result = _dict(args.get('result'))
+        self.game_id = args.get('gameId')
+        self.game_number = args.get('gameNumber')
+        self.result = result
+        self.winner = result.get('winner')
+        self.player_score = result.get('playerScore')
+        self.banker_score = result.get('bankerScore')
+        self.player_pair = result.get('playerPair', False)
+        self.banker_pair = result.get('bankerPair', False)
+        self.natural = result.get('natural', False)
+        self.winning_spots = _list(args.get('winningSpots'))
+        self.with_lightning = args.get('withLightning', False)
+
+
+class EncodedShoeState(Message):
+    __slots__ = (
+        'stats', 'history', 'game_count', 'player_wins', 'banker_wins', 'ties',
+        'player_pairs', 'banker_pairs', 'table_id',
+    )
+
+    def __init__(self, frame: Dict[str, Any]):
+        super().__init__(frame)
+        args = self.args
+        stats = _dict(args.get('stats'))
+        self.stats = stats
+        self.history = _list(args.get('history_v2'))
+        self.game_count = stats.get('gameCount', 0)
+        self.player_wins = stats.get('playerWins', 0)
+        self.banker_wins = stats.get('bankerWins', 0)
+        self.ties = stats.get('ties', 0)
+        self.player_pairs = stats.get('playerPairs', 0)
+        self.banker_pairs = stats.get('bankerPairs', 0)
+        self.table_id = args.get('tableId')
+
+
+class GameWinners(Message):
+    __slots__ = ('game_id', 'total_winners', 'total_amount')
+
+    def __init__(self, frame: Dict[str, Any]):
+        super().__init__(frame)
+        self.game_id = self.args.get('gameId')
+        self.total_winners = self.args.get('totalWinners')
+        self.total_amount = self.args.get('totalAmount')
+
+
+class Roads(Message):
+    """baccarat.roads carries the roads in args; baccarat.gameHistory under args.roads"""
+
+    __slots__ = ('roads',)
+
+    def __init__(self, frame: Dict[str, Any]):
+        super().__init__(frame)
+        if self.type == 'baccarat.gameHistory':
+            self.roads = _dict(self.args.get('roads'))
+        else:
+            self.roads = self.args
+
+
+MESSAGE_TYPES: Dict[str, type] = {
+    'baccarat.newGame': NewGame,
+    'baccarat.cardDealt': CardDealt,
+    'baccarat.potentialMultipliers': PotentialMultipliers,
+    'baccarat.resolved': Resolved,
+    'baccarat.encodedShoeState': EncodedShoeState,
+    'baccarat.gameWinners': GameWinners,
+    'baccarat.roads': Roads,
+    'baccarat.gameHistory': Roads,
+}
+
+
+class DecodeStats:
+    """Per-type decode counters (frames, errors, total/avg microseconds)"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.by_type: Dict[str, List[float]] = {}
+        self.errors = 0
+        self.cache_hits = 0
+
+    def record(self, msg_type: str, elapsed_s: float):
+        entry = self.by_type.setdefault(msg_type, [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed_s
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'backend': JSON_BACKEND,
+            'errors': self.errors,
+            'cache_hits': self.cache_hits,
+            'by_type': {
+                msg_type: {
+                    'frames': count,
+                    'total_us': round(total * 1e6, 1),
+                    'avg_us': round(total * 1e6 / count, 2) if count else 0.0,
+                }
+                for msg_type, (count, total) in sorted(self.by_type.items())
+            },
+        }
+
+
+decode_stats = DecodeStats()
+
+# The same raw frame is often handed to more than one consumer in a process
+# (bot + archive, replay fan-out); keep the last decode so it is done once
+_last_payload: Any = None
+_last_message: Optional[Message] = None
+
+
+def decode(payload: Any) -> Optional[Message]:
+    """
+    Decode a raw baccarat.* frame into its typed message
+
+    Args:
+        payload: Raw frame (str or bytes)
+
+    Returns:
+        The typed message, or None for unhandled types and malformed frames
+    """
+    global _last_payload, _last_message
+
+    if payload is _last_payload and _last_message is not None:
+        decode_stats.cache_hits += 1
+        return _last_message
+
+    msg_type = sniff_type(payload)
+    cls = MESSAGE_TYPES.get(msg_type)
+    if cls is None:
+        return None
+
+    start = time.perf_counter()
+    try:
+        frame = loads(payload)
+    except DECODE_ERRORS:
+        decode_stats.errors += 1
+        return None
+    if not isinstance(frame, dict):
+        decode_stats.errors += 1
+        return None
+    message = cls(frame)
+    elapsed = time.perf_counter() - start
+    decode_stats.record(msg_type, elapsed)
+    latency.record('decode', msg_type, elapsed * 1000)
+
+    _last_payload, _last_message = payload, message
+    return message
+
+
+def decode_frame(frame: Dict[str, Any]) -> Optional[Message]:
+    """Build the typed message for an already-decoded frame dict"""
+    cls = MESSAGE_TYPES.get(frame.get('type')) if isinstance(frame, dict) else None
+    return cls(frame) if cls else None
+
+
+def benchmark(payloads: List[str], loops: int = 100) -> Dict[str, Any]:
+    """Decode every payload `loops` times with each installed backend"""
+    global _last_payload, _last_message
+    active = JSON_BACKEND
+    recording = latency.enabled
+    latency.enabled = False
+    results = {}
+    try:
+        for name in JSON_BACKENDS:
+            set_json_backend(name)
+            decode_stats.reset()
+            for _ in range(loops):
+                for payload in payloads:
+                    _last_payload = _last_message = None
+                    decode(payload)
+            results[name] = decode_stats.report()
+    finally:
+        set_json_backend(active)
+        decode_stats.reset()
+        latency.enabled = recording
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    from replay import load_frames
+
+    parser = argparse.ArgumentParser(description="Benchmark baccarat.* frame decoding")
+    parser.add_argument('paths', nargs='+', help="Capture files or directories (.json/.ndjson)")
+    parser.add_argument('--loops', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    payloads = [f.payload for f in load_frames(*args.paths) if f.msg_type in MESSAGE_TYPES]
+    if not payloads:
+        print("No baccarat.* frames found")
+        return 1
+
+    print(json.dumps(benchmark(payloads, args.loops), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Evolution Gaming WebSocket protocol helpers
+
+Evolution frames are JSON objects whose first key is "type"
+(e.g. {"id": "...", "type": "baccarat.resolved", "args": {...}}).
+Most frames on the socket are noise (chat, balance, video stats), so the
+message type is read from the head of the raw frame before any decoding.
+"""
+import json
+from typing import Any, Optional
+
+# Only the head of the frame is inspected; "type"/"id" always come within the first keys
+SNIFF_CHARS = 256
+_MAX_TYPE_LEN = 64
+
+
+def sniff_field(payload: Any, key: str, top_level: bool = False) -> Optional[str]:
+    """
+    Return a string field from the head of a raw frame without decoding it
+
+    Args:
+        payload: Raw frame (str or bytes)
+        key: Field name, e.g. "type", "id" or "gameId"
+        top_level: Only match the key of the outer object, not one nested in
+            "args". If the head has the key only nested, the frame is decoded.
+
+    Returns:
+        The field value, or None if the head of the frame has no such string field
+    """
+    if isinstance(payload, (bytes, bytearray)):
+        frame = payload
+        payload = bytes(payload[:SNIFF_CHARS]).decode('utf-8', errors='ignore')
+    elif isinstance(payload, str):
+        frame = payload
+    else:
+        return None
+
+    quoted = f'"{key}"'
+    start = payload.find(quoted, 0, SNIFF_CHARS)
+    nested = False
+    while top_level and start >= 0 and _depth_at(payload, start) != 1:
+        nested = True
+        start = payload.find(quoted, start + 1, SNIFF_CHARS)
+    if start < 0:
+        return _decoded_field(frame, key) if nested else None
+
+    pos = start + len(quoted)
+    end = min(len(payload), SNIFF_CHARS + _MAX_TYPE_LEN)
+    while pos < end and payload[pos] in ' \t\r\n':
+        pos += 1
+    if pos >= end or payload[pos] != ':':
+        return None
+    pos += 1
+    while pos < end and payload[pos] in ' \t\r\n':
+        pos += 1
+    if pos >= end or payload[pos] != '"':
+        return None
+
+    close = payload.find('"', pos + 1, pos + 2 + _MAX_TYPE_LEN)
+    if close < 0:
+        return None
+    return payload[pos + 1:close]
+
+
+def _depth_at(payload: str, index: int) -> int:
+    """Object/array nesting depth at payload[index]; -1 inside a string"""
+    depth = 0
+    in_string = False
+    escaped = False
+    for char in payload[:index]:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+    return -1 if in_string else depth
+
+
+def _decoded_field(frame: Any, key: str) -> Optional[str]:
+    """Top-level string field of a fully decoded frame"""
+    try:
+        value = json.loads(frame).get(key)
+    except (ValueError, AttributeError):
+        return None
+    return value if isinstance(value, str) else None
+
+
+def sniff_type(payload: Any) -> Optional[str]:
+    """Return the "type" field of a raw Evolution frame without decoding it"""
+    return sniff_field(payload, 'type')
+
+
+def extract_json_object(data: str) -> Optional[str]:
+    """
+    Slice the outermost {...} out of a frame with a non-JSON prefix/suffix
+
+    Equivalent to a greedy re.search(r'\\{.*\\}', data, re.DOTALL) without
+    running the regex engine over the whole payload.
+    """
+    start = data.find('{')
+    if start < 0:
+        return None
+    end = data.rfind('}')
+    if end < start:
+        return None
+    return data[start:end + 1]
@@ -11,6 +11,8 @@ import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
 from collections import deque
+from src.pg_partitions import ensure_tables
+from src.queries import QueryCatalog, round_params
 
 logging.basicConfig(
     level=logging.INFO,
@@ -130,43 +132,18 @@ class DragonBotDB:
     def __init__(self, dsn):
         self.dsn = dsn
         self.pool = None
+        self.queries = QueryCatalog()
     
     async def init(self):
-        self.pool = await asyncpg.create_pool(self.dsn, min_size=2, max_size=10)
+        self.pool = await asyncpg.create_pool(
+            self.dsn, min_size=2, max_size=10, **self.queries.pool_options()
+        )
         async with self.pool.acquire() as conn:
+            # baccarat_rounds / ml_predictions con particiones mensuales (src/pg_partitions.py)
+            await ensure_tables(conn)
             await conn.execute('''
-                CREATE TABLE IF NOT EXISTS baccarat_rounds (
-                    id SERIAL PRIMARY KEY,
-                    game_id VARCHAR(100) UNIQUE,
-                    game_number VARCHAR(50),
-                    timestamp TIMESTAMP DEFAULT NOW(),
-                    winner VARCHAR(20),
-                    player_score INT,
-                    banker_score INT,
-                    player_pair BOOLEAN,
-                    banker_pair BOOLEAN,
-                    is_natural BOOLEAN,
-                    player_cards JSONB,
-                    banker_cards JSONB,
-                    lightning_multipliers JSONB,
-                    winning_spots JSONB,
-                    with_lightning BOOLEAN,
-                    shoe_cards_out INT,
-                    total_winners INT,
-                    total_amount NUMERIC,
-                    captured_at TIMESTAMP DEFAULT NOW()
-                );
-                
-                CREATE TABLE IF NOT EXISTS ml_predictions (
-                    id SERIAL PRIMARY KEY,
-                    game_id VARCHAR(100),
-                    predicted_winner VARCHAR(20),
-                    confidence NUMERIC,
-                    actual_winner VARCHAR(20),
-                    was_correct BOOLEAN,
-                    timestamp TIMESTAMP DEFAULT NOW()
-                );
-                
+                ALTER TABLE baccarat_rounds ADD COLUMN IF NOT EXISTS table_id VARCHAR(100);
+
                 CREATE INDEX IF NOT EXISTS idx_game_id ON baccarat_rounds(game_id);
                 CREATE INDEX IF NOT EXISTS idx_timestamp ON baccarat_rounds(timestamp DESC);
             ''')
@@ -180,32 +157,7 @@ class DragonBotDB:
             
         async with self.pool.acquire() as conn:
             try:
-                await conn.execute('''
-                    INSERT INTO baccarat_rounds 
-                    (game_id, game_number, winner, player_score, banker_score,
-                     player_pair, banker_pair, is_natural, player_cards, banker_cards,
-                     lightning_multipliers, winning_spots, with_lightning, 
-                     shoe_cards_out, total_winners, total_amount)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16)
-                    ON CONFLICT (game_id) DO NOTHING
-                ''',
-                    str(data.get('game_id')),
-                    str(data.get('game_number', '')),
-                    str(data.get('winner')),
-                    data.get('player_score'),
-                    data.get('banker_score'),
-                    data.get('player_pair', False),
-                    data.get('banker_pair', False),
-                    data.get('is_natural', False),
-                    json.dumps(data.get('player_cards', [])),
-                    json.dumps(data.get('banker_cards', [])),
-                    json.dumps(data.get('lightning_multipliers', {})), 
-                    json.dumps(data.get('winning_spots', [])),
-                    data.get('with_lightning', False),
-                    data.get('shoe_cards_out'),
-                    data.get('total_winners'),
-                    data.get('total_amount')
-                )
+                await self.queries.execute(conn, 'insert_round', *round_params(data))
                 logger.info(f"✅ Guardada ronda {data.get('game_number')}: {data.get('winner')} ({data.get('banker_score')}-{data.get('player_score')})")
             except Exception as e:
                 pass  # Silenciar errores de duplicados
@@ -216,10 +168,9 @@ class DragonBotDB:
             
         async with self.pool.acquire() as conn:
             try:
-                await conn.execute('''
-                    INSERT INTO ml_predictions (game_id, predicted_winner, confidence)
-                    VALUES ($1, $2, $3)
-                ''', str(game_id), str(predicted), float(confidence))
+                await self.queries.execute(
+                    conn, 'insert_prediction', str(game_id), str(predicted), float(confidence)
+                )
             except Exception as e:
                 pass  # Silenciar errores
     
@@ -229,24 +180,16 @@ class DragonBotDB:
             
         async with self.pool.acquire() as conn:
             try:
-                await conn.execute('''
-                    UPDATE ml_predictions
-                    SET actual_winner = $2,
-                        was_correct = (predicted_winner = $2)
-                    WHERE game_id = $1
-                ''', str(game_id), str(actual_winner))
+                await self.queries.execute(
+                    conn, 'resolve_predictions', str(game_id), str(actual_winner)
+                )
             except Exception as e:
                 pass  # Silenciar errores
     
     async def get_recent_rounds(self, limit=100):
         async with self.pool.acquire() as conn:
-            rows = await conn.fetch('''
-                SELECT winner, player_score, banker_score, is_natural, timestamp
-                FROM baccarat_rounds
-                ORDER BY timestamp DESC
-                LIMIT $1
-            ''', limit)
-            return pd.DataFrame(rows, columns=['winner', 'player_score', 'banker_score', 'is_natural', 'timestamp'])
+            rows = await self.queries.fetch(conn, 'recent_rounds', limit)
+            return pd.DataFrame(rows, columns=['winner', 'player_score', 'banker_score', 'player_pair', 'banker_pair', 'is_natural'])
 
 class DragonBot:
     def __init__(self, db, target_url):
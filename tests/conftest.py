@@ -0,0 +1,89 @@
+"""Shared fixtures: a scripted asyncpg connection and an event loop for sync tests."""
+
+import asyncio
+import inspect
+from contextlib import asynccontextmanager
+
+import pytest
+
+
+class FakeConnection:
+    """Stands in for an asyncpg connection: records every call, answers from rules.
+
+    conn.on('fetchval', 'LOCALTIMESTAMP', now) answers fetchval calls whose SQL
+    contains the marker ('' matches any). The first matching rule wins, else
+    DEFAULTS. A callable result is called with (sql, *args) and awaited if it
+    returns a coroutine; an exception instance is raised.
+    """
+
+    DEFAULTS = {'execute': 'OK', 'fetch': [], 'fetchrow': None, 'fetchval': None,
+                'copy_from_table': 'COPY 0'}
+
+    def __init__(self):
+        self.calls = []
+        self.rules = {method: [] for method in self.DEFAULTS}
+
+    def on(self, method, marker, result):
+        self.rules[method].append((marker, result))
+        return self
+
+    @property
+    def executed(self):
+        """execute() statements in order, whitespace collapsed"""
+        return [' '.join(sql.split()) for method, sql, _ in self.calls if method == 'execute']
+
+    def ran(self, prefix):
+        return [sql for sql in self.executed if sql.startswith(prefix)]
+
+    async def _answer(self, method, sql, args):
+        self.calls.append((method, sql, args))
+        for marker, result in self.rules[method]:
+            if marker in sql:
+                break
+        else:
+            result = self.DEFAULTS[method]
+        if isinstance(result, BaseException):
+            raise result
+        if callable(result):
+            result = result(sql, *args)
+            if inspect.isawaitable(result):
+                result = await result
+        return result
+
+    async def execute(self, sql, *args):
+        return await self._answer('execute', sql, args)
+
+    async def fetch(self, sql, *args):
+        return await self._answer('fetch', sql, args)
+
+    async def fetchrow(self, sql, *args):
+        return await self._answer('fetchrow', sql, args)
+
+    async def fetchval(self, sql, *args):
+        return await self._answer('fetchval', sql, args)
+
+    async def copy_from_table(self, name, output, **kwargs):
+        return await self._answer('copy_from_table', name, (output,))
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+@pytest.fixture
+def fake_conn():
+    return FakeConnection()
+
+
+@pytest.fixture(autouse=True)
+def _sync_event_loop(request):
+    """Sync tests drive coroutines through asyncio.get_event_loop(); an async
+    test run before them leaves no current loop, so each gets its own."""
+    if inspect.iscoroutinefunction(request.function):
+        yield
+        return
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield
+    loop.close()
+    asyncio.set_event_loop(None)
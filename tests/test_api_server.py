@@ -126,6 +126,18 @@ class TestResults:
             assert resp.status_code == 200
             assert len(resp.json()) == 3
 
+    def test_get_results_before_id(self, _patch_db):
+        db = _patch_db
+        with TestClient(app) as client:
+            for i in range(5):
+                asyncio.get_event_loop().run_until_complete(
+                    _insert(db, _make_sample(round_id=f"round_{i}"))
+                )
+            page = client.get("/api/results?limit=2").json()
+            assert page[0]["id"] > page[1]["id"]
+            older = client.get(f"/api/results?limit=10&before_id={page[-1]['id']}").json()
+            assert [r["round_id"] for r in older] == ["round_2", "round_1", "round_0"]
+
     def test_get_results_limit_validation(self):
         with TestClient(app) as client:
             resp = client.get("/api/results?limit=0")
@@ -149,6 +161,10 @@ class TestResults:
             assert len(data) == 1
             assert data[0]["round_id"] == "r1"
 
+            # Filtered before LIMIT: the newest table_b row does not empty the page
+            resp = client.get("/api/results?table_id=table_a&limit=1")
+            assert [r["round_id"] for r in resp.json()] == ["r1"]
+
     def test_get_results_filter_table_id_no_match(self, _patch_db):
         db = _patch_db
         with TestClient(app) as client:
@@ -309,6 +325,19 @@ class TestStreak:
             assert body["side_code"] == "B"
             assert body["length"] >= 1
 
+    def test_live_state(self, _patch_db):
+        db = _patch_db
+        with TestClient(app) as client:
+            for i, r in enumerate(["P", "B", "B"]):
+                asyncio.get_event_loop().run_until_complete(
+                    _insert(db, _make_sample(round_id=f"state_{i}", result=r))
+                )
+            body = client.get("/api/state").json()
+            table = body["tables"]["xxxtremelightningbaccarat"]
+            assert table["streak"]["length"] == 2
+            assert table["shoe"]["player"] == 1 and table["shoe"]["banker"] == 2
+            assert table["last_round_id"] == "state_2"
+
 
 # ---------------------------------------------------------------------------
 # Pattern
@@ -408,6 +437,21 @@ class TestRoads:
 # ---------------------------------------------------------------------------
 
 
+class TestLatencyMetrics:
+    def test_latency_snapshot(self):
+        from src.latency import latency
+
+        latency.reset()
+        latency.record("decode", "baccarat.resolved", 0.2)
+        with TestClient(app) as client:
+            resp = client.get("/api/metrics/latency")
+            assert resp.status_code == 200
+            body = resp.json()
+            assert body["stages"]["decode"]["baccarat.resolved"]["count"] == 1
+            assert set(body["stages"]["decode"]["baccarat.resolved"]) >= {"p50", "p95", "p99"}
+        latency.reset()
+
+
 class TestCORS:
     def test_cors_headers_present(self):
         with TestClient(app) as client:
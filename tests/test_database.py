@@ -226,6 +226,57 @@ class TestGetRecentResults:
         timestamps = [r["timestamp"] for r in results]
         assert timestamps == sorted(timestamps, reverse=True)
 
+    def test_before_id_pages_back(self, db):
+        loop = asyncio.get_event_loop()
+        for i in range(7):
+            loop.run_until_complete(db.insert_result(_make_result(round_id=f"page_{i}")))
+        first = loop.run_until_complete(db.get_recent_results(3))
+        second = loop.run_until_complete(db.get_recent_results(3, before_id=first[-1]["id"]))
+        third = loop.run_until_complete(db.get_recent_results(3, before_id=second[-1]["id"]))
+        ids = [r["id"] for r in first + second + third]
+        assert ids == sorted(ids, reverse=True) and len(set(ids)) == 7
+        assert third[-1]["round_id"] == "page_0"
+
+    def test_table_id_filters_before_limit(self, db):
+        loop = asyncio.get_event_loop()
+        for i in range(6):
+            table = "table_a" if i % 3 == 0 else "table_b"
+            loop.run_until_complete(db.insert_result(
+                _make_result(round_id=f"tbl_{i}", table_id=table)
+            ))
+        first = loop.run_until_complete(db.get_recent_results(1, table_id="table_a"))
+        assert [r["round_id"] for r in first] == ["tbl_3"]
+        # Full pages of the table, paged with before_id
+        older = loop.run_until_complete(
+            db.get_recent_results(5, before_id=first[-1]["id"], table_id="table_a")
+        )
+        assert [r["round_id"] for r in older] == ["tbl_0"]
+        assert len(loop.run_until_complete(db.get_recent_results(3, table_id="table_b"))) == 3
+
+    def test_since_id_returns_next_rows_newest_first(self, db):
+        loop = asyncio.get_event_loop()
+        for i in range(6):
+            loop.run_until_complete(db.insert_result(_make_result(round_id=f"since_{i}")))
+        oldest = loop.run_until_complete(db.get_recent_results(6))[-1]["id"]
+        results = loop.run_until_complete(db.get_recent_results(2, since_id=oldest))
+        assert [r["round_id"] for r in results] == ["since_2", "since_1"]
+
+    def test_fields_projection(self, db):
+        sample = _make_result(round_id="proj")
+        sample["raw_data"] = {"key": "value"}
+        asyncio.get_event_loop().run_until_complete(db.insert_result(sample))
+        [r] = asyncio.get_event_loop().run_until_complete(
+            db.get_recent_results(1, fields=["result", "player_cards"])
+        )
+        assert set(r) == {"id", "result", "player_cards"}
+        assert r["player_cards"] == ["SA", "H5"]
+
+    def test_unknown_field_rejected(self, db):
+        with pytest.raises(ValueError):
+            asyncio.get_event_loop().run_until_complete(
+                db.get_recent_results(1, fields=["result; DROP TABLE shoes"])
+            )
+
     def test_json_fields_are_parsed(self, db):
         sample = _make_result(round_id="parse_json")
         sample["lightning_cards"] = ["S5"]
@@ -240,6 +291,39 @@ class TestGetRecentResults:
         assert isinstance(r["raw_data"], dict)
 
 
+# ---------------------------------------------------------------------------
+# get_round_arrays
+# ---------------------------------------------------------------------------
+
+
+class TestGetRoundArrays:
+    def test_oldest_first_with_codes_and_flags(self, db):
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(db.insert_result(_make_result("r1", "B", 3, 8, is_natural=True)))
+        paired = _make_result("r2", "P", 7, 2)
+        paired["player_pair"] = True
+        loop.run_until_complete(db.insert_result(paired))
+        loop.run_until_complete(db.insert_result(_make_result("r3", "T", 5, 5)))
+
+        rounds = loop.run_until_complete(db.get_round_arrays(10))
+        assert rounds.winners() == ["Banker", "Player", "Tie"]
+        assert rounds.winner.dtype.name == "int8"
+        assert rounds.scores() == [(3, 8), (7, 2), (5, 5)]
+        assert rounds.player_pair.tolist() == [False, True, False]
+        assert rounds.is_natural.tolist() == [True, False, False]
+
+    def test_limit_keeps_newest_and_filters_table(self, db):
+        loop = asyncio.get_event_loop()
+        for i, table in enumerate(["t1", "t2", "t1", "t1"]):
+            loop.run_until_complete(db.insert_result(
+                _make_result(f"r{i}", "PBPB"[i], i, 0, table_id=table)
+            ))
+
+        assert loop.run_until_complete(db.get_round_arrays(2)).player_score.tolist() == [2, 3]
+        rounds = loop.run_until_complete(db.get_round_arrays(10, table_id="t2"))
+        assert rounds.winners() == ["Banker"]
+
+
 # ---------------------------------------------------------------------------
 # get_statistics
 # ---------------------------------------------------------------------------
@@ -312,6 +396,116 @@ class TestGetStatistics:
         assert stats_72h["total_rounds"] >= stats_1h["total_rounds"]
 
 
+    def test_statistics_per_table(self, db):
+        now = datetime.utcnow().isoformat()
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(db.insert_result(
+            _make_result(round_id="ta", result="P", table_id="a", timestamp=now)
+        ))
+        loop.run_until_complete(db.insert_result(
+            _make_result(round_id="tb", result="B", table_id="b", timestamp=now)
+        ))
+        stats = loop.run_until_complete(db.get_statistics(24, table_id="a"))
+        assert stats["total_rounds"] == 1 and stats["player_wins"] == 1
+
+    def test_statistics_queries_use_hourly_indexes(self, db):
+        from src.database import _STATISTICS_SQL
+
+        loop = asyncio.get_event_loop()
+        plans = {}
+        for name, table, params in (("all", "", ("-24 hours",)),
+                                    ("one", " AND table_id = ?", ("-24 hours", "a"))):
+            cursor = loop.run_until_complete(db._connection.execute(
+                "EXPLAIN QUERY PLAN " + _STATISTICS_SQL.format(table=table), params
+            ))
+            plans[name] = " ".join(r["detail"] for r in loop.run_until_complete(cursor.fetchall()))
+        assert "idx_hourly_stats_hour" in plans["all"]
+        assert "PRIMARY KEY (table_id=?" in plans["one"]
+
+    def test_duplicate_not_counted_in_rollup(self, db):
+        now = datetime.utcnow().isoformat()
+        loop = asyncio.get_event_loop()
+        for _ in range(2):
+            loop.run_until_complete(db.insert_result(_make_result(round_id="dup", timestamp=now)))
+        assert loop.run_until_complete(db.get_statistics(24))["total_rounds"] == 1
+
+
+class TestHourlyRollup:
+    def _rollup(self, db):
+        loop = asyncio.get_event_loop()
+        cursor = loop.run_until_complete(db._connection.execute(
+            "SELECT * FROM hourly_stats ORDER BY table_id, hour"
+        ))
+        return [dict(r) for r in loop.run_until_complete(cursor.fetchall())]
+
+    def test_rollup_buckets_by_hour(self, db):
+        loop = asyncio.get_event_loop()
+        for i, ts in enumerate(
+            ["2026-01-01T10:05:00", "2026-01-01T10:55:00Z", "2026-01-01T11:00:00"]
+        ):
+            loop.run_until_complete(db.insert_result(
+                _make_result(round_id=f"h{i}", result="B", timestamp=ts, is_natural=i == 0)
+            ))
+        rows = self._rollup(db)
+        assert [(r["hour"], r["total"]) for r in rows] == [
+            ("2026-01-01 10:00:00", 2), ("2026-01-01 11:00:00", 1),
+        ]
+        assert rows[0]["banker_wins"] == 2 and rows[0]["naturals"] == 1
+        assert rows[0]["player_score_sum"] == 12 and rows[0]["player_score_count"] == 2
+
+    def test_rebuild_matches_incremental(self, db):
+        loop = asyncio.get_event_loop()
+        base = datetime(2026, 1, 1, 8, 0, 0)
+        for i in range(30):
+            sample = _make_result(
+                round_id=f"rb_{i}", result="PBT"[i % 3],
+                table_id="ab"[i % 2], timestamp=(base + timedelta(minutes=17 * i)).isoformat(),
+            )
+            if i % 5 == 0:
+                sample["banker_score"] = None
+            loop.run_until_complete(db.insert_result(sample))
+        incremental = self._rollup(db)
+        assert loop.run_until_complete(db.rebuild_rollups()) == len(incremental)
+        assert self._rollup(db) == incremental
+
+    def test_existing_database_backfilled_on_connect(self, tmp_path):
+        loop = asyncio.get_event_loop()
+        database = Database(db_path=tmp_path / "old.db")
+        loop.run_until_complete(database.connect())
+        loop.run_until_complete(database.insert_result(
+            _make_result(round_id="legacy", timestamp=datetime.utcnow().isoformat())
+        ))
+        loop.run_until_complete(database._connection.execute("DELETE FROM hourly_stats"))
+        loop.run_until_complete(database._connection.commit())
+        loop.run_until_complete(database.close())
+
+        reopened = Database(db_path=tmp_path / "old.db")
+        loop.run_until_complete(reopened.connect())
+        try:
+            assert loop.run_until_complete(reopened.get_statistics(24))["total_rounds"] == 1
+        finally:
+            loop.run_until_complete(reopened.close())
+
+    def test_failed_rollup_leaves_no_result_behind(self, db, monkeypatch):
+        import src.database as db_mod
+
+        loop = asyncio.get_event_loop()
+        now = datetime.utcnow().isoformat()
+        monkeypatch.setattr(db_mod, "_ROLLUP_UPSERT", "INSERT INTO missing VALUES (:result)")
+        with pytest.raises(Exception):
+            loop.run_until_complete(db.insert_result(_make_result(round_id="bad", timestamp=now)))
+        monkeypatch.undo()
+        loop.run_until_complete(db.insert_result(_make_result(round_id="good", timestamp=now)))
+
+        results = loop.run_until_complete(db.get_recent_results(10))
+        assert [r["round_id"] for r in results] == ["good"]
+        assert loop.run_until_complete(db.get_statistics(24))["total_rounds"] == 1
+        cursor = loop.run_until_complete(
+            db._connection.execute("SELECT round_id FROM result_payloads")
+        )
+        assert [r[0] for r in loop.run_until_complete(cursor.fetchall())] == ["good"]
+
+
 # ---------------------------------------------------------------------------
 # get_current_streak
 # ---------------------------------------------------------------------------
@@ -407,6 +601,281 @@ class TestLoadInitialStats:
         asyncio.get_event_loop().run_until_complete(db2.close())
 
 
+# ---------------------------------------------------------------------------
+# Write-behind (group commit)
+# ---------------------------------------------------------------------------
+
+
+def _committed_count(db_path):
+    import sqlite3
+
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM baccarat_results").fetchone()[0]
+
+
+class TestWriteBehind:
+    def _db(self, tmp_path, **kwargs):
+        database = Database(db_path=tmp_path / "wb.db", write_behind=True, **kwargs)
+        asyncio.get_event_loop().run_until_complete(database.connect())
+        return database
+
+    def test_commits_every_batch_rows(self, tmp_path):
+        db = self._db(tmp_path, batch_rows=5, batch_ms=60_000)
+        loop = asyncio.get_event_loop()
+        for i in range(12):
+            loop.run_until_complete(db.insert_result(_make_result(round_id=f"wb_{i}")))
+        assert db.rounds_captured == 12
+        assert db.pending_rows == 2
+        assert _committed_count(tmp_path / "wb.db") == 10
+        # Pooled readers only see committed batches
+        assert len(loop.run_until_complete(db.get_recent_results(20))) == 10
+        loop.run_until_complete(db.close())
+        assert _committed_count(tmp_path / "wb.db") == 12
+
+    def test_duplicates_not_counted(self, tmp_path):
+        db = self._db(tmp_path, batch_rows=10, batch_ms=60_000)
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(db.insert_result(_make_result(round_id="dup")))
+        assert loop.run_until_complete(db.insert_result(_make_result(round_id="dup"))) == 0
+        assert db.rounds_captured == 1
+        loop.run_until_complete(db.close())
+
+    def test_commits_after_batch_ms(self, tmp_path):
+        db = self._db(tmp_path, batch_rows=100, batch_ms=20)
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(db.insert_result(_make_result(round_id="timed")))
+        assert _committed_count(tmp_path / "wb.db") == 0
+        loop.run_until_complete(asyncio.sleep(0.1))
+        assert _committed_count(tmp_path / "wb.db") == 1
+        assert db.commits >= 1
+        loop.run_until_complete(db.close())
+
+    def test_failed_insert_rolled_back_inside_the_batch(self, tmp_path, monkeypatch):
+        import src.database as db_mod
+
+        db = self._db(tmp_path, batch_rows=10, batch_ms=60_000)
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(db.insert_result(_make_result(round_id="kept")))
+        monkeypatch.setattr(db_mod, "_ROLLUP_UPSERT", "INSERT INTO missing VALUES (:result)")
+        with pytest.raises(Exception):
+            loop.run_until_complete(db.insert_result(_make_result(round_id="bad")))
+        monkeypatch.undo()
+        assert _committed_count(tmp_path / "wb.db") == 0
+
+        loop.run_until_complete(db.close())
+        assert _committed_count(tmp_path / "wb.db") == 1
+
+    def test_invalid_synchronous_rejected(self, tmp_path):
+        with pytest.raises(ValueError):
+            Database(db_path=tmp_path / "x.db", synchronous="sometimes")
+
+
+class TestReadPool:
+    @pytest.fixture
+    def open_db(self, tmp_path):
+        opened = []
+
+        def _open(**kwargs):
+            database = Database(db_path=tmp_path / "pool.db", **kwargs)
+            asyncio.get_event_loop().run_until_complete(database.connect())
+            opened.append(database)
+            return database
+
+        yield _open
+        for database in opened:
+            asyncio.get_event_loop().run_until_complete(database.close())
+
+    def test_wal_journal_mode(self, open_db):
+        db = open_db(wal=True, read_pool_size=2)
+        loop = asyncio.get_event_loop()
+        cursor = loop.run_until_complete(db._connection.execute("PRAGMA journal_mode"))
+        assert loop.run_until_complete(cursor.fetchone())[0] == "wal"
+        assert len(db._readers) == 2
+        loop.run_until_complete(db.close())
+        assert db._readers == []
+
+    def test_reads_while_writer_holds_transaction(self, open_db):
+        db = open_db(wal=True, read_pool_size=1)
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(db.insert_result(_make_result(round_id="committed")))
+        # Open write transaction on the writer connection, never committed
+        loop.run_until_complete(db._connection.execute(
+            "INSERT INTO baccarat_results (round_id, timestamp, result) "
+            "VALUES ('open', '2026-01-01T00:00:00', 'B')"
+        ))
+        results = loop.run_until_complete(db.get_recent_results(10))
+        assert [r["round_id"] for r in results] == ["committed"]
+        loop.run_until_complete(db._connection.rollback())
+
+    def test_readers_are_read_only(self, open_db):
+        db = open_db(wal=True, read_pool_size=1)
+        loop = asyncio.get_event_loop()
+        with pytest.raises(Exception):
+            loop.run_until_complete(db._readers[0].execute("DELETE FROM baccarat_results"))
+
+    def test_no_pool_reads_on_writer(self, open_db):
+        db = open_db(wal=False, read_pool_size=2)
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(db.insert_result(_make_result(round_id="solo")))
+        assert db._readers == []
+        assert len(loop.run_until_complete(db.get_recent_results(10))) == 1
+
+
+class TestLiveState:
+    def test_streak_rehydrated_on_connect(self, tmp_path):
+        loop = asyncio.get_event_loop()
+        database = Database(db_path=tmp_path / "live.db")
+        loop.run_until_complete(database.connect())
+        for i, r in enumerate(["P", "B", "B", "T", "B"]):
+            loop.run_until_complete(database.insert_result(
+                _make_result(round_id=f"live_{i}", result=r, shoe_id="shoe_9")
+            ))
+        loop.run_until_complete(database.close())
+
+        reopened = Database(db_path=tmp_path / "live.db")
+        loop.run_until_complete(reopened.connect())
+        try:
+            streak = loop.run_until_complete(reopened.get_current_streak())
+            assert streak == {"side": "Banker", "side_code": "B", "length": 3}
+            shoe = reopened.live.shoe_stats("xxxtremelightningbaccarat")
+            assert (shoe["shoe_id"], shoe["player"], shoe["banker"], shoe["tie"]) == (
+                "shoe_9", 1, 3, 1
+            )
+        finally:
+            loop.run_until_complete(reopened.close())
+
+    def test_duplicate_not_applied(self, db):
+        loop = asyncio.get_event_loop()
+        for _ in range(3):
+            loop.run_until_complete(db.insert_result(_make_result(round_id="same", result="P")))
+        assert loop.run_until_complete(db.get_current_streak())["length"] == 1
+
+    def test_reader_process_sees_rows_of_the_writer(self, tmp_path):
+        loop = asyncio.get_event_loop()
+        writer = Database(db_path=tmp_path / "shared.db")
+        reader = Database(db_path=tmp_path / "shared.db")
+        loop.run_until_complete(writer.connect())
+        loop.run_until_complete(reader.connect())
+        try:
+            for i in range(2):
+                loop.run_until_complete(writer.insert_result(
+                    _make_result(round_id=f"w_{i}", result="B")
+                ))
+            streak = loop.run_until_complete(reader.get_current_streak())
+            assert streak["length"] == 2
+            state = loop.run_until_complete(reader.get_live_state())
+            assert state["tables"]["xxxtremelightningbaccarat"]["rounds"] == 2
+            # Counted once however often it is read
+            assert loop.run_until_complete(reader.get_current_streak())["length"] == 2
+        finally:
+            loop.run_until_complete(reader.close())
+            loop.run_until_complete(writer.close())
+
+    def test_writer_counts_rows_of_another_writer_in_order(self, tmp_path):
+        loop = asyncio.get_event_loop()
+        first = Database(db_path=tmp_path / "shared.db")
+        second = Database(db_path=tmp_path / "shared.db")
+        loop.run_until_complete(first.connect())
+        loop.run_until_complete(second.connect())
+        try:
+            loop.run_until_complete(first.insert_result(_make_result(round_id="a", result="P")))
+            loop.run_until_complete(second.insert_result(_make_result(round_id="b", result="B")))
+            loop.run_until_complete(first.insert_result(_make_result(round_id="c", result="B")))
+            streak = loop.run_until_complete(first.get_current_streak())
+            assert streak == {"side": "Banker", "side_code": "B", "length": 2}
+        finally:
+            loop.run_until_complete(second.close())
+            loop.run_until_complete(first.close())
+
+
+_LEGACY_SCHEMA = """
+    CREATE TABLE baccarat_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        round_id TEXT UNIQUE NOT NULL,
+        timestamp TEXT NOT NULL,
+        result TEXT NOT NULL CHECK(result IN ('P', 'B', 'T')),
+        player_score INTEGER,
+        banker_score INTEGER,
+        player_cards TEXT,
+        banker_cards TEXT,
+        player_third_card TEXT,
+        banker_third_card TEXT,
+        is_natural INTEGER DEFAULT 0,
+        lightning_cards TEXT,
+        multipliers TEXT,
+        table_id TEXT,
+        shoe_id TEXT,
+        raw_data TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX idx_timestamp ON baccarat_results(timestamp);
+"""
+
+
+class TestResultPayloads:
+    def test_payload_stored_outside_results_table(self, db):
+        sample = _make_result(round_id="payload")
+        sample["raw_data"] = {"gameId": "payload", "winner": "Player"}
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(db.insert_result(sample))
+        cursor = loop.run_until_complete(db._connection.execute(
+            "PRAGMA table_info(baccarat_results)"
+        ))
+        columns = {row["name"] for row in loop.run_until_complete(cursor.fetchall())}
+        assert "raw_data" not in columns and "player_cards" not in columns
+        [r] = loop.run_until_complete(db.get_recent_results(1))
+        assert r["raw_data"] == {"gameId": "payload", "winner": "Player"}
+        assert r["banker_cards"] == ["DK", "C4"]
+
+    def test_pair_flags_stored(self, db):
+        sample = _make_result(round_id="pairs")
+        sample["player_cards"] = ["6D", "6H"]
+        asyncio.get_event_loop().run_until_complete(db.insert_result(sample))
+        [r] = asyncio.get_event_loop().run_until_complete(
+            db.get_recent_results(1, fields=["player_pair", "banker_pair"])
+        )
+        assert (r["player_pair"], r["banker_pair"]) == (1, 0)
+
+    def test_legacy_database_migrated_losslessly(self, tmp_path):
+        import sqlite3
+
+        path = tmp_path / "legacy.db"
+        rows = [
+            ("l1", "P", '["6D", "6H"]', '["KC", "2S"]', '["S5"]', '{"S5": 8}', '{"a": 1}'),
+            ("l2", "B", "[]", '["9H", "9C"]', "[]", "{}", "not json"),
+            ("l3", "T", None, "", "[]", "{}", '{"nested": {"x": [1, 2]}}'),
+        ]
+        with sqlite3.connect(path) as conn:
+            conn.executescript(_LEGACY_SCHEMA)
+            conn.executemany(
+                "INSERT INTO baccarat_results (round_id, timestamp, result, player_cards, "
+                "banker_cards, lightning_cards, multipliers, raw_data, table_id, shoe_id) "
+                "VALUES (?, '2026-01-01T10:00:00', ?, ?, ?, ?, ?, ?, 'tbl', 's1')",
+                rows,
+            )
+
+        loop = asyncio.get_event_loop()
+        database = Database(db_path=path)
+        loop.run_until_complete(database.connect())
+        try:
+            results = loop.run_until_complete(database.get_recent_results(10))
+            by_id = {r["round_id"]: r for r in results}
+            assert by_id["l1"]["player_cards"] == ["6D", "6H"]
+            assert by_id["l1"]["multipliers"] == {"S5": 8}
+            assert by_id["l1"]["player_pair"] == 1
+            assert by_id["l2"]["raw_data"] == "not json"
+            assert by_id["l2"]["banker_pair"] == 1
+            assert by_id["l3"]["player_cards"] is None and by_id["l3"]["banker_cards"] == ""
+            assert by_id["l3"]["raw_data"] == {"nested": {"x": [1, 2]}}
+            assert database.rounds_captured == 3
+            assert database.live.shoe_stats("tbl")["player_pairs"] == 1
+            # New rows keep increasing ids after the table rebuild
+            loop.run_until_complete(database.insert_result(_make_result(round_id="after")))
+            assert loop.run_until_complete(database.get_recent_results(1))[0]["id"] == 4
+        finally:
+            loop.run_until_complete(database.close())
+
+
 # ---------------------------------------------------------------------------
 # Edge cases
 # ---------------------------------------------------------------------------
@@ -0,0 +1,77 @@
+"""Tests for cross-connection frame de-duplication (src/frame_dedupe.py)."""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.frame_dedupe import FrameDeduper
+
+SAMPLES_DIR = Path(__file__).parent.parent / "ws_samples"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _frame(msg_id, msg_type, game_id=None):
+    args = {"gameId": game_id} if game_id else {}
+    return json.dumps({"id": msg_id, "type": msg_type, "args": args})
+
+
+def test_same_message_id_dropped():
+    dedupe = FrameDeduper()
+    payload = (SAMPLES_DIR / "baccarat_encodedShoeState.json").read_text()
+    assert not dedupe.is_duplicate(payload)
+    assert dedupe.is_duplicate(payload)
+    assert dedupe.stats() == {"checked": 2, "duplicates": 1, "hit_rate": 0.5, "entries": 1}
+
+
+def test_once_per_game_types_keyed_by_game_id():
+    dedupe = FrameDeduper()
+    assert not dedupe.is_duplicate(_frame("1", "baccarat.resolved", "g1"))
+    # Re-sent with a new message id on another socket
+    assert dedupe.is_duplicate(_frame("2", "baccarat.resolved", "g1"))
+    assert not dedupe.is_duplicate(_frame("3", "baccarat.resolved", "g2"))
+    assert not dedupe.is_duplicate(_frame("4", "baccarat.newGame", "g2"))
+
+
+def test_repeating_types_only_keyed_by_id():
+    dedupe = FrameDeduper()
+    assert not dedupe.is_duplicate(_frame("1", "baccarat.cardDealt", "g1"))
+    assert not dedupe.is_duplicate(_frame("2", "baccarat.cardDealt", "g1"))
+    assert dedupe.is_duplicate(_frame("2", "baccarat.cardDealt", "g1"))
+
+
+def test_frames_without_id_pass_through():
+    dedupe = FrameDeduper()
+    assert not dedupe.is_duplicate('{"data": {"winner": "PLAYER"}}')
+    assert not dedupe.is_duplicate('{"data": {"winner": "PLAYER"}}')
+    assert not dedupe.is_duplicate(b"\x00binary")
+
+
+def test_time_window_and_size_bound():
+    clock = FakeClock()
+    dedupe = FrameDeduper(max_entries=2, window_seconds=10, clock=clock)
+    dedupe.is_duplicate(_frame("1", "baccarat.roads"))
+    clock.now = 11
+    assert not dedupe.is_duplicate(_frame("1", "baccarat.roads"))
+
+    dedupe.is_duplicate(_frame("2", "baccarat.roads"))
+    dedupe.is_duplicate(_frame("3", "baccarat.roads"))
+    assert dedupe.stats()["entries"] == 2
+    assert not dedupe.is_duplicate(_frame("1", "baccarat.roads"))
+
+
+def test_keyed_by_top_level_id_not_nested_one():
+    dedupe = FrameDeduper()
+    first = json.dumps({"args": {"id": "shared"}, "id": "m1", "type": "baccarat.cardDealt"})
+    second = json.dumps({"args": {"id": "shared"}, "id": "m2", "type": "baccarat.cardDealt"})
+    assert not dedupe.is_duplicate(first)
+    assert not dedupe.is_duplicate(second)
+    assert dedupe.is_duplicate(first)
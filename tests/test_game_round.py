@@ -0,0 +1,82 @@
+"""Tests for the per-round assembler (src/game_round.py)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.game_round import GameRound, RoundAssembler
+from src.ws_messages import decode_frame
+
+
+def _msg(msg_type, **args):
+    return decode_frame({"type": f"baccarat.{msg_type}", "args": args})
+
+
+def _cards(game_id, player, banker):
+    return _msg(
+        "cardDealt",
+        gameId=game_id,
+        gameData={"playerHand": {"cards": player, "score": 1}, "bankerHand": {"cards": banker}},
+    )
+
+
+def _resolved(game_id, winner="Banker"):
+    return _msg("resolved", gameId=game_id, gameNumber="n", result={"winner": winner})
+
+
+def test_round_assembled_across_frames():
+    rounds = RoundAssembler()
+    rounds.start(_msg("newGame", gameId="g1", gameNumber="00:01", shoeCardsOut=10))
+    cards = _cards("g1", ["6D"], ["4D"])
+    rounds.round_for(cards).apply_card_dealt(cards)
+    multipliers = _msg("potentialMultipliers", gameId="g1", multipliers={"player": 2})
+    rounds.round_for(multipliers).apply_multipliers(multipliers)
+
+    game_round = rounds.resolve(_resolved("g1"))
+    data = game_round.to_dict()
+    assert data["game_id"] == "g1" and data["winner"] == "Banker"
+    assert data["player_cards"] == ["6D"] and data["banker_cards"] == ["4D"]
+    assert data["lightning_multipliers"] == {"player": 2}
+    assert data["shoe_cards_out"] == 10
+    assert rounds.open_round is None
+
+
+def test_late_frames_attach_to_resolved_game():
+    rounds = RoundAssembler()
+    rounds.start(_msg("newGame", gameId="g1"))
+    rounds.resolve(_resolved("g1"))
+    rounds.start(_msg("newGame", gameId="g2"))
+
+    winners = _msg("gameWinners", gameId="g1", totalWinners=7, totalAmount=100.0)
+    rounds.round_for(winners, create=False).apply_winners(winners)
+    late_cards = _cards("g1", ["KS"], ["QS"])
+    rounds.round_for(late_cards).apply_card_dealt(late_cards)
+
+    g1 = rounds.rounds["g1"]
+    assert (g1.total_winners, g1.total_amount) == (7, 100.0)
+    assert g1.player_cards == ["KS"]
+    assert rounds.current.game_id == "g2"
+    assert rounds.current.total_winners is None and rounds.current.player_cards == ()
+    assert rounds.late_frames == 2
+
+
+def test_unknown_game_id_opens_round_unless_create_false():
+    rounds = RoundAssembler()
+    assert rounds.round_for(_msg("gameWinners", gameId="gx"), create=False) is None
+    game_round = rounds.round_for(_cards("g9", [], []))
+    assert game_round.game_id == "g9" and rounds.current is game_round
+
+
+def test_only_recent_rounds_are_kept():
+    rounds = RoundAssembler(keep=3)
+    for i in range(5):
+        rounds.start(_msg("newGame", gameId=f"g{i}"))
+    assert list(rounds.rounds) == ["g2", "g3", "g4"]
+
+
+def test_game_round_has_no_instance_dict():
+    with pytest.raises(AttributeError):
+        GameRound("g1").extra = 1
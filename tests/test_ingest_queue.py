@@ -0,0 +1,130 @@
+"""Tests for the bounded WebSocket ingestion queue (src/ingest_queue.py)."""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ingest_queue import FrameQueue, _frame_type
+
+
+def _frame(msg_type, n=0):
+    return json.dumps({"id": f"{n}", "type": msg_type, "args": {"n": n}})
+
+
+def test_frame_type_sniffing():
+    assert _frame_type(_frame("baccarat.resolved")) == "baccarat.resolved"
+    assert _frame_type(_frame("baccarat.newGame").encode()) == "baccarat.newGame"
+    assert _frame_type("not json") == "unknown"
+    assert _frame_type(None) == "unknown"
+
+
+def test_frames_processed_in_order():
+    seen = []
+
+    async def handler(payload):
+        # Yield to the loop so out-of-order scheduling would show up
+        await asyncio.sleep(0)
+        seen.append(json.loads(payload)["args"]["n"])
+
+    async def scenario():
+        queue = FrameQueue(handler).start()
+        for i in range(50):
+            queue.put(_frame("baccarat.cardDealt", i))
+        await queue.join(timeout=5)
+        return queue
+
+    queue = asyncio.get_event_loop().run_until_complete(scenario())
+    assert seen == list(range(50))
+    assert queue.processed == 50
+    assert queue.stats()["depth"] == 0
+
+
+def test_low_value_frames_dropped_when_full():
+    async def handler(payload):
+        return None
+
+    queue = FrameQueue(handler, maxsize=2, drop_types={"baccarat.roads"})
+    assert queue.put(_frame("baccarat.newGame", 1))
+    assert queue.put(_frame("baccarat.cardDealt", 2))
+    assert not queue.put(_frame("baccarat.roads", 3))
+    assert not queue.put(_frame("chat.message", 4))
+    stats = queue.stats()
+    assert stats["depth"] == 2
+    assert stats["dropped"] == {"baccarat.roads": 1, "chat.message": 1}
+
+
+def test_important_frame_evicts_low_value_first():
+    async def handler(payload):
+        return None
+
+    queue = FrameQueue(handler, maxsize=2, drop_types={"baccarat.roads"})
+    queue.put(_frame("baccarat.newGame", 1))
+    queue.put(_frame("baccarat.roads", 2))
+    assert queue.put(_frame("baccarat.resolved", 3))
+    assert [t for t, *_ in queue._frames] == ["baccarat.newGame", "baccarat.resolved"]
+    assert queue.dropped == {"baccarat.roads": 1}
+
+
+def test_round_frames_overflow_instead_of_evicting():
+    async def handler(payload):
+        return None
+
+    queue = FrameQueue(handler, maxsize=2, overflow=1)
+    queue.put(_frame("baccarat.newGame", 1))
+    queue.put(_frame("baccarat.cardDealt", 2))
+    assert queue.put(_frame("baccarat.resolved", 3))
+    assert [t for t, *_ in queue._frames] == [
+        "baccarat.newGame", "baccarat.cardDealt", "baccarat.resolved",
+    ]
+    assert queue.max_depth == 3
+    assert queue.stats()["dropped_total"] == 0
+
+
+def test_full_overflow_refuses_incoming_round_frame():
+    async def handler(payload):
+        return None
+
+    queue = FrameQueue(handler, maxsize=2, overflow=0)
+    queue.put(_frame("baccarat.newGame", 1))
+    queue.put(_frame("baccarat.cardDealt", 2))
+    assert not queue.put(_frame("baccarat.resolved", 3))
+    assert not queue.put(_frame("baccarat.gameWinners", 4))
+
+    # The queued round frames are kept, in order
+    assert [t for t, *_ in queue._frames] == ["baccarat.newGame", "baccarat.cardDealt"]
+    stats = queue.stats()
+    assert stats["round_dropped"] == 1
+    assert stats["dropped"] == {"baccarat.resolved": 1, "baccarat.gameWinners": 1}
+
+
+def test_handler_errors_do_not_stop_consumer():
+    seen = []
+
+    async def handler(payload):
+        n = json.loads(payload)["args"]["n"]
+        if n == 1:
+            raise RuntimeError("bad frame")
+        seen.append(n)
+
+    async def scenario():
+        queue = FrameQueue(handler).start()
+        for i in range(3):
+            queue.put(_frame("baccarat.cardDealt", i))
+        await queue.join(timeout=5)
+        return queue
+
+    queue = asyncio.get_event_loop().run_until_complete(scenario())
+    assert seen == [0, 2]
+    assert queue.errors == 1
+
+
+def test_closed_queue_rejects_frames():
+    async def handler(payload):
+        return None
+
+    queue = FrameQueue(handler)
+    queue.close()
+    assert not queue.put(_frame("baccarat.newGame"))
@@ -0,0 +1,92 @@
+"""Tests for the per-stage latency histograms (src/latency.py)."""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ingest_queue import FrameQueue
+from src.latency import LatencyHistogram, LatencyRecorder, latency, since_frame_ms
+
+
+def test_histogram_percentiles_within_bucket_error():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.record(float(ms))
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert summary["max"] == 100.0
+    assert 50 <= summary["p50"] <= 50 * 1.12
+    assert 95 <= summary["p95"] <= 100
+    assert 99 <= summary["p99"] <= 100
+    assert summary["mean"] == 50.5
+
+
+def test_empty_histogram():
+    assert LatencyHistogram().summary()["p99"] == 0.0
+
+
+def test_span_records_by_stage_and_type():
+    recorder = LatencyRecorder()
+    with recorder.span("db.save_round", "baccarat.resolved"):
+        time.sleep(0.002)
+    stats = recorder.snapshot()["stages"]["db.save_round"]["baccarat.resolved"]
+    assert stats["count"] == 1
+    assert stats["max"] >= 2.0
+
+
+def test_disabled_recorder_records_nothing():
+    recorder = LatencyRecorder(enabled=False)
+    recorder.record("decode", "baccarat.newGame", 1.0)
+    assert recorder.snapshot()["stages"] == {}
+
+
+def test_log_if_due_respects_interval():
+    recorder = LatencyRecorder()
+    recorder.record("decode", "baccarat.newGame", 1.0)
+    recorder._last_log -= 10
+
+    class Log:
+        lines = []
+
+        def info(self, line):
+            self.lines.append(line)
+
+    log = Log()
+    assert recorder.log_if_due(log, 5)
+    assert not recorder.log_if_due(log, 5)
+    assert len(log.lines) == 1
+
+
+def test_frame_queue_records_queue_and_frame_age():
+    ages = []
+
+    async def handler(payload):
+        await asyncio.sleep(0.002)
+        ages.append(since_frame_ms())
+
+    async def scenario():
+        queue = FrameQueue(handler).start()
+        queue.put(json.dumps({"type": "baccarat.newGame", "args": {}}))
+        await queue.join(timeout=5)
+
+    latency.reset()
+    asyncio.get_event_loop().run_until_complete(scenario())
+    stages = latency.snapshot()["stages"]
+    latency.reset()
+    assert stages["queue_wait"]["baccarat.newGame"]["count"] == 1
+    assert stages["handle"]["baccarat.newGame"]["max"] >= 2.0
+    assert ages[0] >= 2.0
+    assert since_frame_ms() is None
+
+
+def test_src_modules_share_one_recorder():
+    from src import api_server, replay, ws_messages
+
+    assert "latency" not in sys.modules
+    assert ws_messages.latency is latency
+    assert replay.latency is latency
+    assert api_server.latency is latency
@@ -0,0 +1,67 @@
+"""Tests for the in-memory streak/shoe state (src/live_state.py)."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.live_state import LiveState, is_pair, result_code
+
+
+def _apply_all(state, results, table_id="t1", **kwargs):
+    for i, r in enumerate(results):
+        state.apply(table_id, r, round_id=f"{table_id}_{i}", **kwargs)
+
+
+def test_result_codes_and_pairs():
+    assert result_code("Player") == "P"
+    assert result_code("banker") == "B"
+    assert result_code("T") == "T"
+    assert result_code("X") is None and result_code(None) is None
+    assert is_pair(["6D", "6H", "2C"])
+    assert is_pair(["10S", "10C"])
+    assert not is_pair(["6D", "7H"]) and not is_pair([])
+
+
+def test_streak_skips_ties():
+    state = LiveState()
+    _apply_all(state, ["B", "B", "P", "T", "P", "T"])
+    assert state.streak("t1") == {"side": "Player", "side_code": "P", "length": 2}
+    assert state.streak("missing") == {"side": None, "length": 0}
+
+
+def test_streak_per_table_and_overall():
+    state = LiveState()
+    _apply_all(state, ["B", "B"], table_id="a")
+    _apply_all(state, ["P"], table_id="b")
+    assert state.streak("a")["length"] == 2
+    assert state.streak() == {"side": "Player", "side_code": "P", "length": 1}
+
+
+def test_shoe_counters_reset_on_new_shoe():
+    state = LiveState()
+    state.apply("t1", "P", shoe_id="s1", player_pair=True)
+    state.apply("t1", "T", shoe_id="s1")
+    assert state.shoe_stats("t1")["player"] == 1
+    assert state.shoe_stats("t1")["player_pairs"] == 1
+    state.apply("t1", "B", shoe_id="s2", banker_pair=True)
+    assert state.shoe_stats() == {
+        "shoe_id": "s2", "player": 0, "banker": 1, "tie": 0,
+        "player_pairs": 0, "banker_pairs": 1,
+    }
+
+
+def test_window_counts():
+    state = LiveState(window=5)
+    _apply_all(state, ["P", "P", "B", "T", "B", "B", "P"])
+    # Window keeps the last 5: B T B B P
+    assert state.counts(5, "t1") == {"player": 1, "banker": 3, "tie": 1}
+    assert state.counts(2, "t1") == {"player": 1, "banker": 1, "tie": 0}
+    assert state.counts(6, "t1") is None
+    assert state.counts(3, "other") == {"player": 0, "banker": 0, "tie": 0}
+
+
+def test_unknown_result_ignored():
+    state = LiveState()
+    assert not state.apply("t1", "?")
+    assert state.snapshot()["tables"] == {}
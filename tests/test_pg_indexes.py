@@ -0,0 +1,111 @@
+"""Tests for the Postgres index migration and EXPLAIN advisor (src/pg_indexes.py)."""
+
+import json
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pg_indexes import (
+    INDEXES,
+    SAMPLE_ARGS,
+    SUPERSEDED_INDEXES,
+    advise,
+    ensure_indexes,
+    seq_scans,
+)
+from src.queries import QUERIES
+
+INDEX_SCAN_PLAN = {
+    "Node Type": "Limit",
+    "Total Cost": 4.2,
+    "Plans": [{
+        "Node Type": "Index Scan",
+        "Relation Name": "baccarat_rounds",
+        "Index Name": "idx_timestamp",
+    }],
+}
+
+SEQ_SCAN_PLAN = {
+    "Node Type": "Aggregate",
+    "Total Cost": 10000000012.5,
+    "Plans": [{
+        "Node Type": "Seq Scan",
+        "Relation Name": "ml_predictions",
+        "Plan Rows": 1200,
+        "Filter": "(actual_winner IS NOT NULL)",
+    }],
+}
+
+
+def _plans(conn, plans):
+    """EXPLAIN answers: the plan of the first marker found in the SQL, else an index scan"""
+    def explain(sql, *args):
+        plan = next((p for marker, p in plans.items() if marker in sql), INDEX_SCAN_PLAN)
+        return json.dumps([{"Plan": plan}])
+    return conn.on("fetchval", "", explain)
+
+
+def test_sample_args_cover_every_catalog_statement():
+    assert set(SAMPLE_ARGS) == set(QUERIES)
+    for name, sql in QUERIES.items():
+        placeholders = {int(n) for n in re.findall(r"\$(\d+)", sql)}
+        assert len(SAMPLE_ARGS[name]) == max(placeholders, default=0), name
+
+
+def test_seq_scans_found_in_nested_plans():
+    assert seq_scans(INDEX_SCAN_PLAN) == []
+    assert seq_scans(SEQ_SCAN_PLAN) == [{
+        "relation": "ml_predictions",
+        "rows": 1200,
+        "filter": "(actual_winner IS NOT NULL)",
+    }]
+
+
+async def test_ensure_indexes_builds_missing_and_rebuilds_invalid(fake_conn):
+    conn = fake_conn.on("fetch", "pg_index", [
+        {"relname": "idx_predictions_unresolved", "indisvalid": True},
+        {"relname": "idx_votes_unresolved", "indisvalid": False},
+    ])
+    built = await ensure_indexes(conn)
+
+    assert "idx_predictions_unresolved" not in built
+    assert set(built) == set(INDEXES) - {"idx_predictions_unresolved"}
+    assert "DROP INDEX CONCURRENTLY IF EXISTS idx_votes_unresolved" in conn.executed
+    creates = [sql for sql in conn.executed if sql.startswith("CREATE INDEX CONCURRENTLY")]
+    assert len(creates) == len(built)
+    for name in SUPERSEDED_INDEXES:
+        assert f"DROP INDEX CONCURRENTLY IF EXISTS {name}" in conn.executed
+
+
+async def test_partitioned_tables_indexed_without_concurrently(fake_conn):
+    conn = fake_conn.on("fetch", "relkind = 'p'", [{"relname": "strategy_votes"}])
+    await ensure_indexes(conn)
+
+    votes = INDEXES["idx_votes_unresolved"]
+    predictions = INDEXES["idx_predictions_unresolved"]
+    assert f"CREATE INDEX IF NOT EXISTS idx_votes_unresolved {votes}" in conn.executed
+    assert (f"CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_predictions_unresolved {predictions}"
+            in conn.executed)
+    for name in SUPERSEDED_INDEXES:
+        assert f"DROP INDEX IF EXISTS {name}" in conn.executed
+
+
+async def test_advisor_flags_sequential_scans(fake_conn):
+    conn = _plans(fake_conn, {"FROM ml_predictions\n    WHERE actual_winner": SEQ_SCAN_PLAN})
+    report = await advise(conn, {
+        "prediction_totals": QUERIES["prediction_totals"],
+        "recent_rounds": QUERIES["recent_rounds"],
+    })
+
+    assert report["recent_rounds"]["status"] == "ok"
+    assert report["prediction_totals"]["status"] == "seqscan"
+    assert report["prediction_totals"]["seq_scans"][0]["relation"] == "ml_predictions"
+    assert "SET LOCAL enable_seqscan = off" in conn.executed
+
+
+async def test_advisor_reports_planning_errors(fake_conn):
+    conn = fake_conn.on("fetchval", "", RuntimeError("syntax error"))
+    report = await advise(conn, {"recent_rounds": QUERIES["recent_rounds"]}, allow_seqscan=True)
+    assert report["recent_rounds"] == {"status": "error", "error": "syntax error"}
@@ -0,0 +1,277 @@
+"""
+Partitions, migration and indexes against a real Postgres.
+
+Skipped unless TEST_DB_URL points at a database the tests may write to, e.g.
+
+    TEST_DB_URL=postgresql://localhost/dragon_test python -m pytest tests/test_pg_integration.py
+
+Each test runs in its own schema, dropped afterwards.
+"""
+
+import gzip
+import os
+import sys
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import asyncpg
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pg_indexes import INDEXES, ensure_indexes
+from src.pg_partitions import (
+    PARTITIONED_TABLES,
+    add_months,
+    ensure_tables,
+    expire_partitions,
+    list_partitions,
+    migrate_table,
+    month_start,
+    partition_name,
+    server_now,
+    table_kind,
+)
+from src.queries import INSERT_ROUND, QUERIES, affected_rows, round_params
+
+TEST_DB_URL = os.getenv("TEST_DB_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DB_URL, reason="TEST_DB_URL not set")
+
+LEGACY_ROUNDS = '''
+    CREATE TABLE baccarat_rounds (
+        id SERIAL PRIMARY KEY,
+        game_id VARCHAR(100) UNIQUE,
+        game_number VARCHAR(50),
+        timestamp TIMESTAMP DEFAULT NOW(),
+        winner VARCHAR(20),
+        player_score INT,
+        banker_score INT,
+        player_pair BOOLEAN,
+        banker_pair BOOLEAN,
+        is_natural BOOLEAN,
+        player_cards JSONB,
+        banker_cards JSONB,
+        lightning_multipliers JSONB,
+        winning_spots JSONB,
+        with_lightning BOOLEAN,
+        shoe_cards_out INT,
+        total_winners INT,
+        total_amount NUMERIC,
+        captured_at TIMESTAMP DEFAULT NOW(),
+        table_id VARCHAR(100)
+    )
+'''
+
+
+def _round(game_id, **fields):
+    return round_params({"game_id": game_id, "winner": "Banker", "player_score": 3,
+                         "banker_score": 7, "table_id": "main", **fields})
+
+
+@pytest.fixture
+async def schema():
+    name = f"test_{uuid.uuid4().hex[:12]}"
+    admin = await asyncpg.connect(TEST_DB_URL)
+    await admin.execute(f"CREATE SCHEMA {name}")
+    try:
+        yield name
+    finally:
+        await admin.execute(f"DROP SCHEMA {name} CASCADE")
+        await admin.close()
+
+
+@pytest.fixture
+async def conn(schema):
+    connection = await asyncpg.connect(TEST_DB_URL, server_settings={"search_path": schema})
+    try:
+        yield connection
+    finally:
+        await connection.close()
+
+
+async def _insert_round(conn, game_id, **fields):
+    return affected_rows(await conn.execute(INSERT_ROUND, *_round(game_id, **fields)))
+
+
+async def test_fresh_tables_are_partitioned_and_dedupe_rounds(conn):
+    now = await server_now(conn)
+    report = await ensure_tables(conn, ahead=1)
+
+    assert report["unpartitioned"] == []
+    for table in PARTITIONED_TABLES:
+        assert await table_kind(conn, table) == "partitioned"
+        assert partition_name(table, month_start(now)) in await list_partitions(conn, table)
+    assert await _insert_round(conn, "g1") == 1
+    assert await _insert_round(conn, "g1") == 0
+    assert await conn.fetchval("SELECT COUNT(*) FROM baccarat_rounds_default") == 0
+    # Idempotent
+    assert (await ensure_tables(conn, ahead=1))["created"] == []
+
+
+async def test_rows_in_default_wait_for_maintain(conn):
+    await ensure_tables(conn, ahead=0)
+    future = add_months(month_start(await server_now(conn)), 2)
+    await conn.execute(
+        "INSERT INTO ml_predictions (game_id, predicted_winner, timestamp) "
+        "VALUES ('g1', 'Tie', $1)", future,
+    )
+    name = partition_name("ml_predictions", future)
+
+    # Live path: the month is left alone while its rows sit in the default partition
+    later = add_months(future, -1)
+    report = await ensure_tables(conn, ahead=1, now=later)
+    assert name not in report["created"]
+    assert await conn.fetchval("SELECT COUNT(*) FROM ml_predictions_default") == 1
+
+    report = await ensure_tables(conn, ahead=1, now=later, move_stray=True)
+    assert name in report["created"]
+    assert await conn.fetchval("SELECT COUNT(*) FROM ml_predictions_default") == 0
+    assert await conn.fetchval(f"SELECT game_id FROM {name}") == "g1"
+
+
+async def test_unmigrated_rounds_keep_deduping(conn):
+    await conn.execute(LEGACY_ROUNDS)
+    await conn.execute(
+        "INSERT INTO baccarat_rounds (game_id, winner) VALUES ('old1', 'Player'), ('old2', 'Tie')"
+    )
+    report = await ensure_tables(conn, ahead=0)
+
+    assert report["unpartitioned"] == ["baccarat_rounds"]
+    claimed = await conn.fetch("SELECT game_id FROM round_ids ORDER BY game_id")
+    assert [r["game_id"] for r in claimed] == ["old1", "old2"]
+    assert await _insert_round(conn, "old1") == 0
+    assert await _insert_round(conn, "new1") == 1
+    assert await conn.fetchval("SELECT COUNT(*) FROM baccarat_rounds") == 3
+
+
+async def test_migrate_moves_rows_and_foreign_keys(conn):
+    await conn.execute(LEGACY_ROUNDS)
+    await conn.execute('CREATE INDEX idx_timestamp ON baccarat_rounds ("timestamp" DESC)')
+    await conn.execute(
+        "CREATE TABLE roadmaps (id SERIAL PRIMARY KEY, "
+        "game_id VARCHAR(100) REFERENCES baccarat_rounds(game_id))"
+    )
+    await conn.execute(
+        "INSERT INTO baccarat_rounds (game_id, winner, timestamp) VALUES "
+        "('g1', 'Banker', '2026-01-15'), ('g2', 'Player', NULL)"
+    )
+    await conn.execute("INSERT INTO roadmaps (game_id) VALUES ('g1')")
+
+    assert await migrate_table(conn, "baccarat_rounds", ahead=1) == 2
+
+    assert await table_kind(conn, "baccarat_rounds") == "partitioned"
+    assert "baccarat_rounds_p2026_01" in await list_partitions(conn, "baccarat_rounds")
+    assert await conn.fetchval("SELECT COUNT(*) FROM baccarat_rounds_p2026_01") == 1
+    assert await conn.fetchval("SELECT COUNT(*) FROM round_ids") == 2
+    indexes = await conn.fetch(
+        "SELECT indexname FROM pg_indexes WHERE tablename = 'baccarat_rounds'"
+    )
+    assert "idx_timestamp" in {r["indexname"] for r in indexes}
+    referenced = await conn.fetchval(
+        "SELECT confrelid::regclass::text FROM pg_constraint "
+        "WHERE conrelid = 'roadmaps'::regclass AND contype = 'f'"
+    )
+    assert referenced == "round_ids"
+    # New rows get fresh ids and still dedupe
+    assert await _insert_round(conn, "g2") == 0
+    assert await _insert_round(conn, "g3") == 1
+    assert await conn.fetchval("SELECT MAX(id) FROM baccarat_rounds") == 3
+
+
+async def test_expire_exports_and_drops_old_months(conn, tmp_path):
+    await ensure_tables(conn, ahead=0)
+    old = datetime(2020, 5, 1)
+    await ensure_tables(conn, ahead=0, now=old)
+    await _insert_round(conn, "g-old")
+    await conn.execute(
+        "UPDATE baccarat_rounds SET timestamp = '2020-05-10' WHERE game_id = 'g-old'"
+    )
+
+    expired = await expire_partitions(conn, 12, tmp_path, compression="gzip")
+
+    rounds = [e for e in expired if e["partition"] == "baccarat_rounds_p2020_05"]
+    assert rounds and rounds[0]["rows"] == 1 and rounds[0]["dropped"]
+    with gzip.open(tmp_path / "baccarat_rounds_p2020_05.csv.gz", "rt") as f:
+        assert "g-old" in f.read()
+    assert "baccarat_rounds_p2020_05" not in await list_partitions(conn, "baccarat_rounds")
+    # The archived game_id stays claimed
+    assert await _insert_round(conn, "g-old") == 0
+
+
+async def test_partial_indexes_on_partitioned_tables(conn):
+    await ensure_tables(conn, ahead=0)
+
+    assert set(await ensure_indexes(conn)) == set(INDEXES)
+    assert await ensure_indexes(conn) == []
+
+
+async def test_bot_live_state_counts_rounds_of_other_writers(schema, conn):
+    from dragon_bot_ml import DragonBotDB
+
+    sep = "&" if "?" in TEST_DB_URL else "?"
+    db = DragonBotDB(f"{TEST_DB_URL}{sep}search_path={schema}")
+    await db.init()
+    try:
+        await db.save_round({"game_id": "own", "winner": "Banker", "table_id": "main"})
+        # Stored by another process (dragon_bot_advanced.py, load_historical_data.py)
+        await _insert_round(conn, "other", winner="Player")
+
+        assert await db.get_recent_stats(table_id="main") == {
+            "player": 1, "banker": 1, "tie": 0,
+        }
+        assert await db.get_recent_stats(table_id="main") == {
+            "player": 1, "banker": 1, "tie": 0,
+        }
+    finally:
+        await db.pool.close()
+
+
+async def test_every_catalog_statement_prepares_on_the_bots_schema(schema, conn):
+    import dragon_bot_advanced
+    from dragon_bot_ml import DragonBotDB
+
+    sep = "&" if "?" in TEST_DB_URL else "?"
+    dsn = f"{TEST_DB_URL}{sep}search_path={schema}"
+    advanced = dragon_bot_advanced.DragonBotDB(dsn)
+    db = DragonBotDB(dsn)
+    await advanced.init()
+    await db.init()
+    try:
+        for name, sql in QUERIES.items():
+            try:
+                await conn.prepare(sql)
+            except asyncpg.PostgresError as e:
+                pytest.fail(f"{name}: {e}")
+        assert await db.get_global_accuracy() == {"correct": 0, "total": 0}
+    finally:
+        await db.pool.close()
+        await advanced.pool.close()
+
+
+async def test_ledger_counts_tie_hits_and_recounts_old_rows(schema, conn):
+    from dragon_bot_ml import DragonBotDB
+
+    sep = "&" if "?" in TEST_DB_URL else "?"
+    db = DragonBotDB(f"{TEST_DB_URL}{sep}search_path={schema}")
+    await db.init()
+    try:
+        votes = [{"strategy": "tie_bet", "predicted": "Tie"},
+                 {"strategy": "memory", "predicted": "Banker"}]
+        for game_id, winner in (("g1", "Tie"), ("g2", "Banker")):
+            await db.save_strategy_votes(game_id, votes)
+            await db.update_strategy_votes_result(game_id, winner)
+        live = {r["strategy"]: r for r in await db.get_strategy_accuracy(min_votes=1)}
+        assert (live["tie_bet"]["ties"], live["tie_bet"]["tie_correct"]) == (1, 1)
+        assert (live["memory"]["correct"], live["memory"]["tie_correct"]) == (1, 0)
+
+        # A ledger from before tie_correct existed is recounted on the next start
+        await conn.execute("ALTER TABLE strategy_accuracy DROP COLUMN tie_correct")
+        first_pool = db.pool
+        await db.init()
+        await first_pool.close()
+        rebuilt = {r["strategy"]: r for r in await db.get_strategy_accuracy(min_votes=1)}
+        assert rebuilt == live
+    finally:
+        await db.pool.close()
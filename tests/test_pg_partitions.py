@@ -0,0 +1,205 @@
+"""Tests for the monthly partitions, retention and export (src/pg_partitions.py)."""
+
+import gzip
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pg_partitions import (
+    PARTITIONED_TABLES,
+    ROUND_IDS_DDL,
+    add_months,
+    create_table_sql,
+    ensure_partitions,
+    ensure_tables,
+    expire_partitions,
+    migrate_table,
+    partition_month,
+    partition_name,
+)
+
+NOW = datetime(2026, 10, 17, 12, 30)
+CSV = b'id,game_id\n1,g1\n2,g2\n'
+
+
+def _conn(fake_conn, kinds=None, partitions=None, stray=0, rows=2, copied=2, first=None,
+          index_defs=(), foreign_keys=(), columns=('id', 'game_id', 'timestamp')):
+    """Catalog answers for the shared FakeConnection"""
+    kinds, partitions = kinds or {}, partitions or {}
+
+    def copy(name, output):
+        output.write(CSV)
+        return f'COPY {copied}'
+
+    return (
+        fake_conn
+        .on('fetchval', 'LOCALTIMESTAMP', NOW)
+        .on('fetchval', 'relkind', lambda sql, table: kinds.get(table))
+        .on('fetchval', 'MIN(', first)
+        .on('fetchval', '_default WHERE', stray)
+        .on('fetchval', '', rows)
+        .on('fetch', 'pg_inherits', lambda sql, table: [
+            {'relname': n, 'estimated_rows': 0} for n in partitions.get(table, [])
+        ])
+        .on('fetch', 'pg_indexes', [{'indexdef': d} for d in index_defs])
+        .on('fetch', 'pg_constraint', list(foreign_keys))
+        .on('fetch', '', [{'column_name': c} for c in columns])
+        .on('execute', '', lambda sql, *args: (
+            f'INSERT 0 {rows}' if sql.startswith('INSERT INTO') else 'OK'
+        ))
+        .on('copy_from_table', '', copy)
+    )
+
+
+def test_month_arithmetic_and_names():
+    assert add_months(datetime(2026, 11, 1), 2) == datetime(2027, 1, 1)
+    assert add_months(datetime(2026, 1, 1), -13) == datetime(2024, 12, 1)
+    name = partition_name('strategy_votes', datetime(2026, 3, 1))
+    assert name == 'strategy_votes_p2026_03'
+    assert partition_month('strategy_votes', name) == datetime(2026, 3, 1)
+    assert partition_month('strategy_votes', 'strategy_votes_default') is None
+
+
+def test_create_table_keys_primary_key_on_partition_column():
+    for table, key in PARTITIONED_TABLES.items():
+        sql = create_table_sql(table)
+        assert f'PRIMARY KEY (id, "{key}")' in sql
+        assert sql.endswith(f'PARTITION BY RANGE ("{key}")')
+        assert 'UNIQUE' not in sql
+
+
+async def test_ensure_tables_creates_partitioned_tables_and_months_ahead(fake_conn):
+    conn = _conn(fake_conn)
+    report = await ensure_tables(conn, ahead=2)
+
+    assert conn.executed[0] == ' '.join(ROUND_IDS_DDL.split())
+    assert len(conn.ran('CREATE TABLE IF NOT EXISTS baccarat_rounds_default')) == 1
+    assert report['unpartitioned'] == []
+    assert len(report['created']) == 3 * len(PARTITIONED_TABLES)
+    assert "CREATE TABLE IF NOT EXISTS baccarat_rounds_p2026_12 PARTITION OF baccarat_rounds " \
+           "FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')" in conn.executed
+
+
+async def test_ensure_tables_leaves_unpartitioned_tables_alone(fake_conn):
+    partitions = {
+        table: [partition_name(table, add_months(datetime(2026, 10, 1), i)) for i in range(4)]
+        for table in ('ml_predictions', 'strategy_votes')
+    }
+    conn = _conn(fake_conn, kinds={'baccarat_rounds': 'r', 'ml_predictions': 'p',
+                                   'strategy_votes': 'p'}, partitions=partitions)
+    report = await ensure_tables(conn, ahead=3)
+
+    assert report == {'created': [], 'unpartitioned': ['baccarat_rounds']}
+    assert conn.ran('CREATE TABLE IF NOT EXISTS baccarat_rounds') == []
+    # Its UNIQUE game_id still dedupes, round_ids catches up with the stored rounds
+    [claim] = conn.ran('INSERT INTO round_ids')
+    assert 'FROM baccarat_rounds' in claim
+
+
+async def test_live_path_leaves_rows_in_default_to_maintain(fake_conn):
+    conn = _conn(fake_conn, stray=5)
+    created = await ensure_partitions(conn, 'ml_predictions', ahead=0, now=NOW)
+
+    assert created == []
+    assert [sql for sql in conn.executed if 'DELETE' in sql] == []
+    assert conn.ran('CREATE TABLE IF NOT EXISTS ml_predictions_p') == []
+
+
+async def test_maintain_takes_new_partition_rows_out_of_default(fake_conn):
+    conn = _conn(fake_conn, stray=5)
+    created = await ensure_partitions(conn, 'ml_predictions', ahead=0, now=NOW, move_stray=True)
+
+    assert created == ['ml_predictions_p2026_10']
+    moved = [sql for sql in conn.executed if 'DELETE FROM ml_predictions_default' in sql]
+    assert moved and 'INSERT INTO stray_ml_predictions_p2026_10' in moved[0]
+    [create] = conn.ran('CREATE TABLE IF NOT EXISTS ml_predictions_p2026_10')
+    [restore] = conn.ran('INSERT INTO ml_predictions SELECT * FROM stray_')
+    create, restore = conn.executed.index(create), conn.executed.index(restore)
+    assert conn.executed.index(moved[0]) < create < restore
+
+
+async def test_expire_exports_then_drops_old_partitions(fake_conn, tmp_path):
+    months = ['2025_08', '2025_09', '2025_10', '2026_10']
+    conn = _conn(
+        fake_conn,
+        kinds={table: 'p' for table in PARTITIONED_TABLES},
+        partitions={'baccarat_rounds': [f'baccarat_rounds_p{m}' for m in months]
+                    + ['baccarat_rounds_default']},
+    )
+    expired = await expire_partitions(conn, 12, tmp_path, compression='gzip', now=NOW)
+
+    assert [e['partition'] for e in expired] == [
+        'baccarat_rounds_p2025_08', 'baccarat_rounds_p2025_09',
+    ]
+    assert expired[0]['rows'] == 2 and expired[0]['dropped']
+    with gzip.open(tmp_path / 'baccarat_rounds_p2025_08.csv.gz', 'rb') as f:
+        assert f.read() == CSV
+    assert conn.ran('ALTER TABLE baccarat_rounds DETACH PARTITION') == [
+        'ALTER TABLE baccarat_rounds DETACH PARTITION baccarat_rounds_p2025_08',
+        'ALTER TABLE baccarat_rounds DETACH PARTITION baccarat_rounds_p2025_09',
+    ]
+    assert len(conn.ran('DROP TABLE')) == 2
+
+
+async def test_failed_export_drops_nothing(fake_conn, tmp_path):
+    conn = _conn(
+        fake_conn,
+        kinds={'strategy_votes': 'p'},
+        partitions={'strategy_votes': ['strategy_votes_p2024_01']},
+        rows=3, copied=2,
+    )
+    with pytest.raises(RuntimeError, match='exported 2 rows, expected 3'):
+        await expire_partitions(conn, 12, tmp_path, compression='gzip', now=NOW)
+
+    assert conn.ran('ALTER TABLE') == [] and conn.ran('DROP') == []
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_expire_can_keep_detached_tables(fake_conn):
+    conn = _conn(fake_conn, kinds={'ml_predictions': 'p'},
+                 partitions={'ml_predictions': ['ml_predictions_p2020_05']})
+    [entry] = await expire_partitions(conn, 1, drop=False, now=NOW)
+
+    assert entry == {'partition': 'ml_predictions_p2020_05', 'month': '2020-05', 'dropped': False}
+    assert conn.ran('DROP') == []
+
+
+async def test_migrate_copies_rows_and_moves_foreign_keys_to_round_ids(fake_conn):
+    index_def = ('CREATE INDEX idx_timestamp ON public.baccarat_rounds '
+                 'USING btree ("timestamp" DESC)')
+    conn = _conn(
+        fake_conn, kinds={'baccarat_rounds': 'r'}, rows=42, first=datetime(2026, 8, 3),
+        columns=['id', 'game_id', 'timestamp', 'winner'], index_defs=[index_def],
+        foreign_keys=[{
+            'conname': 'roadmaps_game_id_fkey', 'referencing': 'roadmaps',
+            'definition': 'FOREIGN KEY (game_id) REFERENCES baccarat_rounds(game_id)',
+        }],
+    )
+    rows = await migrate_table(conn, 'baccarat_rounds', ahead=1, now=NOW)
+
+    assert rows == 42
+    executed = conn.executed
+    assert conn.ran('INSERT INTO round_ids')
+    rename = executed.index('ALTER TABLE baccarat_rounds RENAME TO baccarat_rounds_unpartitioned')
+    months = conn.ran('CREATE TABLE IF NOT EXISTS baccarat_rounds_p')
+    assert [sql.split()[5] for sql in months] == [
+        'baccarat_rounds_p2026_08', 'baccarat_rounds_p2026_09',
+        'baccarat_rounds_p2026_10', 'baccarat_rounds_p2026_11',
+    ]
+    [copy] = conn.ran('INSERT INTO baccarat_rounds (')
+    assert 'COALESCE("timestamp", NOW())' in copy
+    drop = executed.index('DROP TABLE baccarat_rounds_unpartitioned')
+    index = executed.index(index_def)
+    assert rename < executed.index(copy) < drop < index
+    assert executed[-1] == ('ALTER TABLE roadmaps ADD CONSTRAINT roadmaps_game_id_fkey '
+                            'FOREIGN KEY (game_id) REFERENCES round_ids(game_id)')
+
+
+async def test_migrate_skips_partitioned_tables(fake_conn):
+    conn = _conn(fake_conn, kinds={'ml_predictions': 'p'})
+    assert await migrate_table(conn, 'ml_predictions', now=NOW) == 0
+    assert conn.executed == []
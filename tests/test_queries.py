@@ -0,0 +1,119 @@
+"""Tests for the SQL statement catalog (src/queries.py)."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.queries import (
+    INSERT_ROUND,
+    QUERIES,
+    RESOLVE_ROUND,
+    QueryCatalog,
+    affected_rows,
+    round_params,
+)
+
+
+def _conn(fake_conn):
+    return (
+        fake_conn
+        .on('execute', '', 'INSERT 0 1')
+        .on('fetch', '', [{'winner': 'Banker'}])
+        .on('fetchrow', '', {'total': 3, 'correct': 2})
+        .on('fetchval', '', 7)
+    )
+
+
+async def test_statements_run_by_name_with_parameters(fake_conn):
+    catalog = QueryCatalog()
+    conn = _conn(fake_conn)
+
+    assert await catalog.execute(conn, 'insert_prediction', 'g1', 'Banker', 61.5) == 'INSERT 0 1'
+    assert await catalog.fetch(conn, 'recent_winners', 81) == [{'winner': 'Banker'}]
+    assert await catalog.fetchrow(conn, 'prediction_totals') == {'total': 3, 'correct': 2}
+
+    method, sql, args = conn.calls[0]
+    assert method == 'execute'
+    assert sql is QUERIES['insert_prediction']
+    assert args == ('g1', 'Banker', 61.5)
+    assert conn.calls[1][2] == (81,)
+
+
+async def test_unknown_statement_rejected(fake_conn):
+    catalog = QueryCatalog()
+    with pytest.raises(KeyError, match="no_such_query"):
+        await catalog.fetch(fake_conn, 'no_such_query')
+    assert fake_conn.calls == []
+    assert catalog.snapshot()['statements'] == {}
+
+
+async def test_stats_count_calls_and_errors_per_statement(fake_conn):
+    catalog = QueryCatalog()
+    conn = fake_conn.on('execute', '', RuntimeError("connection lost"))
+    for _ in range(3):
+        await catalog.fetch(conn, 'recent_rounds', 100)
+    with pytest.raises(RuntimeError):
+        await catalog.execute(conn, 'insert_round', *range(17))
+
+    statements = catalog.snapshot()['statements']
+    assert statements['recent_rounds']['count'] == 3
+    assert statements['recent_rounds']['errors'] == 0
+    assert statements['insert_round']['count'] == 1
+    assert statements['insert_round']['errors'] == 1
+    assert set(statements['insert_round']) >= {'p50', 'p95', 'p99', 'max', 'total_ms'}
+
+    catalog.reset()
+    assert catalog.snapshot()['statements'] == {}
+
+
+async def test_snapshot_ranks_statements_by_total_time(fake_conn):
+    async def slow(sql, *args):
+        await asyncio.sleep(0.02)
+        return []
+
+    catalog = QueryCatalog()
+    conn = fake_conn.on('fetch', '', slow)
+    for _ in range(5):
+        await catalog.fetchrow(conn, 'prediction_totals')
+    await catalog.fetch(conn, 'strategy_accuracy', 3)
+
+    assert list(catalog.snapshot()['statements']) == ['strategy_accuracy', 'prediction_totals']
+
+
+def test_resolve_round_embeds_insert_round():
+    # Data-modifying CTEs are only allowed at the top level of the statement
+    assert RESOLVE_ROUND.strip().startswith('WITH claimed AS')
+    for part in ('INSERT INTO round_ids', 'INSERT INTO baccarat_rounds', 'FROM claimed'):
+        assert part in INSERT_ROUND and part in RESOLVE_ROUND
+    assert '$18::bool' in RESOLVE_ROUND
+
+
+def test_round_params_match_insert_round_placeholders():
+    params = round_params({
+        'game_id': 123,
+        'winner': 'Player',
+        'player_cards': ['6D', '6H'],
+        'table_id': 'lightning',
+    })
+    assert len(params) == INSERT_ROUND.count('$')
+    assert params[0] == '123'
+    assert params[2] == 'Player'
+    assert params[8] == '["6D", "6H"]'
+    assert params[-1] == 'lightning'
+
+
+def test_affected_rows():
+    assert affected_rows('INSERT 0 1') == 1
+    assert affected_rows('UPDATE 12') == 12
+    assert affected_rows('') == 0
+    assert affected_rows(None) == 0
+
+
+def test_pool_options_keep_statement_cache():
+    options = QueryCatalog().pool_options()
+    assert options['max_inactive_connection_lifetime'] == 0
+    assert options['statement_cache_size'] >= len(QUERIES)
@@ -0,0 +1,281 @@
+"""Tests for the offline WebSocket replay engine (src/replay.py)."""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.replay import FrameReplayer, ReplayBotDB, ReplayFrame, load_frames, replay
+
+SAMPLES_DIR = Path(__file__).parent.parent / "ws_samples"
+
+
+def _run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+# ---------------------------------------------------------------------------
+# load_frames
+# ---------------------------------------------------------------------------
+
+
+class TestLoadFrames:
+    def test_samples_directory_sorted_by_time(self):
+        frames = load_frames(SAMPLES_DIR)
+        assert len(frames) == 5
+        times = [f.recorded_at for f in frames]
+        assert times == sorted(times)
+        assert frames[-1].msg_type == "baccarat.newGame"
+
+    def test_payload_is_json_string(self):
+        frames = load_frames(SAMPLES_DIR / "baccarat_resolved.json")
+        assert json.loads(frames[0].payload)["type"] == "baccarat.resolved"
+
+    def test_capture_wrapper_format(self, tmp_path):
+        capture = [
+            {"index": 1, "timestamp": "2026-02-14T00:53:38", "data": {"type": "baccarat.newGame"}},
+            {"index": 2, "timestamp": "2026-02-14T00:53:40", "data": {"type": "baccarat.resolved"}},
+        ]
+        path = tmp_path / "ws_messages_authenticated.json"
+        path.write_text(json.dumps(capture))
+        frames = load_frames(path)
+        assert [f.msg_type for f in frames] == ["baccarat.newGame", "baccarat.resolved"]
+        assert frames[1].recorded_at - frames[0].recorded_at == pytest.approx(2.0)
+
+    def test_ndjson_format(self, tmp_path):
+        path = tmp_path / "frames.ndjson"
+        path.write_text('{"type": "a", "time": 1000}\n\n{"type": "b", "time": 2000}\n')
+        frames = load_frames(path)
+        assert [f.msg_type for f in frames] == ["a", "b"]
+
+
+# ---------------------------------------------------------------------------
+# FrameReplayer
+# ---------------------------------------------------------------------------
+
+
+class TestFrameReplayer:
+    def test_replays_in_order_and_counts(self):
+        frames = [ReplayFrame(f'{{"n": {i}}}', "t", None) for i in range(10)]
+        seen = []
+
+        async def handler(payload):
+            seen.append(json.loads(payload)["n"])
+
+        stats = _run(FrameReplayer(frames, speed=0, loops=2).run(handler))
+        assert seen == list(range(10)) * 2
+        report = stats.report()
+        assert report["frames"] == 20
+        assert report["by_type"]["t"]["count"] == 20
+
+    def test_handler_errors_are_counted(self):
+        async def handler(payload):
+            raise ValueError("boom")
+
+        stats = _run(FrameReplayer([ReplayFrame("{}", "x")], speed=0).run(handler))
+        assert stats.errors == 1
+        assert stats.frames == 1
+
+    def test_speed_scales_recorded_gaps(self):
+        frames = [ReplayFrame("{}", "t", 100.0), ReplayFrame("{}", "t", 101.0)]
+
+        async def handler(payload):
+            return None
+
+        started = time.perf_counter()
+        _run(FrameReplayer(frames, speed=20).run(handler))
+        elapsed = time.perf_counter() - started
+        # 1s recorded gap at 20x → ~50ms
+        assert 0.04 <= elapsed < 0.5
+
+
+# ---------------------------------------------------------------------------
+# Stand-ins and targets
+# ---------------------------------------------------------------------------
+
+
+class TestReplayBotDB:
+    def test_prediction_resolution_and_accuracy(self):
+        db = ReplayBotDB()
+        _run(db.save_prediction("g1", "Banker", 60))
+        _run(db.save_strategy_votes("g1", [
+            {"strategy": "memory", "predicted": "Banker"},
+            {"strategy": "streak", "predicted": "Player"},
+        ]))
+        assert _run(db.update_prediction_result("g1", "Banker")) == 1
+        assert _run(db.update_strategy_votes_result("g1", "Banker")) == 2
+        assert _run(db.get_total_prediction_stats()) == {"total": 1, "correct": 1}
+        accuracy = _run(db.get_strategy_accuracy(min_votes=1))
+        assert accuracy[0]["strategy"] == "memory"
+        assert accuracy[0]["accuracy"] == 100.0
+        assert accuracy[0]["recent_total"] == 1
+        assert accuracy[1]["strategy"] == "streak" and accuracy[1]["accuracy"] == 0
+
+    def test_resolve_round(self):
+        db = ReplayBotDB()
+        _run(db.save_prediction("g1", "Player", 55))
+        _run(db.save_strategy_votes("g1", [{"strategy": "memory", "predicted": "Player"}]))
+        resolved = _run(db.resolve_round(
+            {"game_id": "g1", "winner": "Player", "shoe_cards_out": 300},
+            include_totals=True, include_accuracy=True, min_votes=1,
+        ))
+        assert resolved["inserted"] is True
+        assert (resolved["predictions_updated"], resolved["votes_updated"]) == (1, 1)
+        assert resolved["total_stats"] == {"total": 1, "correct": 1}
+        assert resolved["strategy_accuracy"][0]["accuracy"] == 100.0
+        assert resolved["strategy_accuracy"][0]["phases"]["late"]["total"] == 1
+        again = _run(db.resolve_round({"game_id": "g1", "winner": "Player"}))
+        assert again["inserted"] is False and again["total_stats"] is None
+
+    def test_save_strategy_votes_many(self):
+        db = ReplayBotDB()
+        written = _run(db.save_strategy_votes_many([
+            ("g1", [{"strategy": "memory", "predicted": "Banker"}, {"type": "streak"}]),
+            ("g2", [{"type": "streak", "prediction": "Player"}]),
+            (None, [{"strategy": "memory", "predicted": "Banker"}]),
+        ]))
+        assert written == 2
+        assert [(v["game_id"], v["strategy_name"]) for v in db.strategy_votes] == [
+            ("g1", "memory"), ("g2", "streak"),
+        ]
+
+    def test_recent_rounds_filtered_by_table(self):
+        db = ReplayBotDB()
+        _run(db.save_round({"game_id": "g1", "winner": "Banker", "table_id": "t1"}))
+        _run(db.save_round({"game_id": "g2", "winner": "Player", "table_id": "t2"}))
+        assert len(_run(db.get_round_arrays(10))) == 2
+        assert _run(db.get_round_arrays(10, table_id="t2")).winners() == ["Player"]
+        assert _run(db.get_recent_stats(table_id="t1")) == {"player": 0, "banker": 1, "tie": 0}
+
+
+def test_replay_scraper_target_restores_db():
+    from src import scraper as scraper_module
+
+    original = scraper_module.db
+    report = _run(replay([SAMPLES_DIR], target="scraper"))
+    assert report["frames"] == 5
+    assert report["errors"] == 0
+    assert scraper_module.db is original
+
+
+def test_replay_bot_target():
+    pytest.importorskip("xgboost")
+    report = _run(replay([SAMPLES_DIR], target="bot"))
+    assert report["frames"] == 5
+    assert report["rounds_saved"] == 1
+    assert report["newgame_to_telegram_ms"]["count"] == report["telegram_messages"]
+    assert report["stages_ms"]["db.resolve_round"]["baccarat.resolved"]["count"] == 1
+
+
+def test_bot_prediction_precomputed_on_shoe_state():
+    pytest.importorskip("xgboost")
+    from src.replay import build_bot_target
+
+    frames = {f.msg_type: f.payload for f in load_frames(SAMPLES_DIR)}
+    handler, bot = build_bot_target()
+
+    async def scenario():
+        await handler(frames["baccarat.resolved"])
+        assert bot._next_prediction is None
+        await handler(frames["baccarat.encodedShoeState"])
+        bundle = bot._next_prediction
+        assert bundle is not None and bundle["predicted"]
+        await handler(frames["baccarat.newGame"])
+        return bundle
+
+    bundle = _run(scenario())
+    assert bot.last_prediction == (bundle["predicted"], bundle["confidence"])
+    assert len(bot.newgame_latency_ms) == len(bot.telegram.sent) == 1
+    assert bot.db.predictions[-1]["predicted_winner"] == bundle["predicted"]
+
+
+def test_bot_speculative_branch_selected_on_resolved():
+    pytest.importorskip("xgboost")
+    from src.replay import build_bot_target
+
+    frames = {f.msg_type: f.payload for f in load_frames(SAMPLES_DIR)}
+    shoe = json.loads(frames["baccarat.encodedShoeState"])
+    handler, bot = build_bot_target()
+
+    card_dealt = json.dumps({
+        "type": "baccarat.cardDealt",
+        "args": {
+            "gameId": "1893f6c85c2f25513736ba30",
+            "gameData": {
+                "playerHand": {"cards": ["6D", "6H", "2S"], "score": 4},
+                "bankerHand": {"cards": ["4D", "9S", "4S"], "score": 7},
+            },
+        },
+    })
+    shoe["args"]["history_v2"].append(
+        {"winner": "Banker", "playerPair": True, "playerScore": 4, "bankerScore": 7}
+    )
+    shoe["args"]["stats"]["gameCount"] += 1
+
+    async def scenario():
+        await handler(frames["baccarat.encodedShoeState"])
+        await handler(card_dealt)
+        await bot._speculation_task
+        # Banker 7 - Player 4: only the Banker branch is computed
+        assert [key[0] for key in bot._speculation[1]] == ["Banker"]
+        await handler(frames["baccarat.resolved"])
+        selected = bot._next_prediction
+        assert selected is not None
+        await handler(json.dumps(shoe))
+        return selected
+
+    selected = _run(scenario())
+    assert bot.speculation_stats == {"hits": 1, "misses": 0}
+    # The shoe frame confirmed the branch: no recompute, same bundle kept
+    assert bot._next_prediction is selected
+    assert len(bot.strategies.history) == 18
+    fresh = bot._predict_bundle(verbose=False)
+    assert (fresh["predicted"], fresh["confidence"]) == (
+        selected["predicted"], selected["confidence"]
+    )
+
+
+def test_bot_hypothetical_round_restores_full_histories():
+    pytest.importorskip("xgboost")
+    from src.replay import build_bot_target
+
+    _, bot = build_bot_target()
+    for i in range(60):
+        bot.predictor.add_round("Banker" if i % 2 else "Player", i % 10, 0)
+    before = (list(bot.predictor.history), list(bot.predictor.score_history))
+
+    with bot._hypothetical_round({"winner": "Tie", "playerScore": 5, "bankerScore": 5}):
+        assert bot.predictor.history[-1] == "Tie"
+        assert len(bot.strategies.history) == 1
+
+    assert (list(bot.predictor.history), list(bot.predictor.score_history)) == before
+    assert len(bot.strategies.history) == 0
+
+
+def test_bot_saves_rounds_with_its_table_id():
+    pytest.importorskip("xgboost")
+    from src.replay import build_bot_target
+
+    handler, bot = build_bot_target()
+    bot.table_id = "XXXtremeLB000001"
+    for frame in load_frames(SAMPLES_DIR):
+        _run(handler(frame.payload))
+    [saved] = bot.db.rounds.values()
+    assert saved["table_id"] == "XXXtremeLB000001"
+
+
+def test_strategy_vote_rows_skip_votes_without_prediction():
+    pytest.importorskip("xgboost")
+    from dragon_bot_ml import strategy_vote_rows
+
+    rows = strategy_vote_rows(123, [
+        {"strategy": "memory", "predicted": "Banker"},
+        {"type": "streak", "prediction": "Player"},
+        {"strategy": "twins"},
+    ])
+    assert rows == [("123", "memory", "Banker"), ("123", "streak", "Player")]
@@ -0,0 +1,68 @@
+"""Tests for the columnar round history (src/round_arrays.py)."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from baccarat_strategies import BaccaratStrategies
+from src.round_arrays import WINNERS, RoundArrays, round_arrays
+
+NEWEST_FIRST = [
+    {"winner": "Tie", "player_score": 6, "banker_score": 6,
+     "player_pair": None, "banker_pair": True, "is_natural": False},
+    {"winner": "Player", "player_score": None, "banker_score": 9,
+     "player_pair": True, "banker_pair": False, "is_natural": True},
+    {"winner": "Banker", "player_score": 2, "banker_score": 7,
+     "player_pair": False, "banker_pair": False, "is_natural": None},
+]
+
+
+def test_columns_are_compact_and_oldest_first():
+    rounds = round_arrays(NEWEST_FIRST)
+
+    assert len(rounds) == 3
+    assert rounds.winner.tolist() == [0, 1, 2]
+    assert [a.dtype for a in (rounds.winner, rounds.player_score, rounds.is_natural)] == [
+        np.int8, np.uint8, np.bool_,
+    ]
+    assert rounds.scores() == [(2, 7), (0, 9), (6, 6)]
+    assert rounds.nbytes == 6 * 3
+
+
+def test_winner_codes_match_label_encoder_order():
+    assert list(WINNERS) == sorted(WINNERS)
+    rows = [dict(NEWEST_FIRST[0], winner=w) for w in ("B", "P", "T", "Dragon")]
+    assert RoundArrays.from_rows(rows).winners() == ["Banker", "Player", "Tie", None]
+
+
+def test_tail_and_plain_rows():
+    rounds = round_arrays(NEWEST_FIRST)
+
+    assert len(rounds.tail(10)) == 3
+    assert list(rounds.tail(2).iter_rounds()) == [
+        ("Player", 0, 9, True, False, True),
+        ("Tie", 6, 6, False, True, False),
+    ]
+
+
+def test_empty():
+    rounds = round_arrays([])
+    assert len(rounds) == 0
+    assert rounds.winners() == [] and rounds.scores() == []
+
+
+async def test_strategies_load_the_whole_fetched_history():
+    class FakeDB:
+        async def get_round_arrays(self, limit):
+            return RoundArrays.from_rows(NEWEST_FIRST * 20)
+
+    strategies = BaccaratStrategies(db=FakeDB())
+    assert await strategies.load_from_db(60) == 60
+    assert strategies.history[0]["winner"] == "Tie"
+    assert strategies.history[-1] == {
+        "winner": "Banker", "player_score": 2, "banker_score": 7,
+        "player_pair": False, "banker_pair": False,
+    }
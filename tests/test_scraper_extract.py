@@ -328,7 +328,28 @@ def test_validate_result_empty_dict():
 def test_is_stale_no_frame():
     """When no frames have been received, not stale (nothing to compare)"""
     scraper = EvolutionScraper()
-    assert scraper._is_stale() is False
+    assert scraper._stale_tables() == []
+
+
+def test_stale_check_is_per_table():
+    """A dead secondary page is stale even while the main page keeps receiving frames"""
+    from datetime import datetime, timedelta
+
+    from src.table_state import build_tables
+
+    scraper = EvolutionScraper()
+    scraper.tables = build_tables([("t1", "https://a"), ("t2", "https://b")], "x", "https://x")
+    scraper.main_table = scraper.tables["t1"]
+    now = datetime.utcnow()
+    scraper.tables["t1"].last_frame_at = now
+    scraper.tables["t2"].last_frame_at = now - timedelta(minutes=10)
+    assert scraper._stale_tables() == [scraper.tables["t2"]]
+
+    # Reloaded but still silent: stale again once the timer runs out
+    scraper.tables["t2"].loaded_at = now
+    assert scraper._stale_tables() == []
+    scraper.tables["t2"].loaded_at = now - timedelta(minutes=4)
+    assert scraper._stale_tables() == [scraper.tables["t2"]]
 
 
 def test_should_refresh_session_initially():
@@ -364,3 +385,105 @@ def test_extract_invalid_winner_then_validate():
     result = scraper._extract_baccarat_result(data)
     # _extract should return None for invalid winners
     assert result is None
+
+
+# ---------------------------------------------------------------------------
+# _on_ws_message dispatch
+# ---------------------------------------------------------------------------
+
+
+def _dispatch(scraper, payload):
+    import asyncio
+
+    captured = []
+
+    async def fake_process(result):
+        captured.append(result)
+
+    scraper._process_result = fake_process
+    asyncio.get_event_loop().run_until_complete(scraper._on_ws_message("wss://test", payload))
+    return captured
+
+
+def test_ws_message_resolved_frame_is_extracted():
+    scraper = EvolutionScraper()
+    payload = (Path(__file__).parent.parent / "ws_samples" / "baccarat_resolved.json").read_text()
+    captured = _dispatch(scraper, payload)
+    assert len(captured) == 1
+    assert captured[0]["result"] == "B"
+    assert captured[0]["round_id"] == "1893f6c85c2f25513736ba30"
+    assert captured[0]["player_score"] == 4
+    assert scraper.ws_frame_counts["dispatched"] == 1
+
+
+def test_ws_message_unhandled_type_dropped_undecoded():
+    scraper = EvolutionScraper()
+    # Not valid JSON after the head: it must never reach the decoder
+    captured = _dispatch(scraper, '{"type": "chat.message", "args": {"winner": "PLAYER"')
+    assert captured == []
+    assert scraper.ws_frame_counts["ignored"] == 1
+
+
+def test_ws_message_untyped_frame_uses_legacy_path():
+    scraper = EvolutionScraper()
+    captured = _dispatch(scraper, 'event {"data": {"winner": "PLAYER", "roundId": "lg1"}}')
+    assert len(captured) == 1
+    assert captured[0]["round_id"] == "lg1"
+    assert scraper.ws_frame_counts["untyped"] == 1
+
+
+def test_ws_message_resolved_carries_cards_from_same_game():
+    import json
+
+    scraper = EvolutionScraper()
+    cards = {
+        "type": "baccarat.cardDealt",
+        "args": {
+            "gameId": "1893f6c85c2f25513736ba30",
+            "gameData": {"playerHand": {"cards": ["6D", "6H", "2S"]},
+                         "bankerHand": {"cards": ["4D", "9S", "4S"]}},
+        },
+    }
+    _dispatch(scraper, json.dumps(cards))
+    payload = (Path(__file__).parent.parent / "ws_samples" / "baccarat_resolved.json").read_text()
+    captured = _dispatch(scraper, payload)
+    assert captured[0]["player_cards"] == ["6D", "6H", "2S"]
+    assert captured[0]["banker_cards"] == ["4D", "9S", "4S"]
+
+
+def test_ws_message_routed_to_page_table():
+    import asyncio
+    import json
+
+    from src.table_state import build_tables
+
+    scraper = EvolutionScraper()
+    scraper.tables = build_tables([("t1", "https://a"), ("t2", "https://b")], "x", "https://x")
+    scraper.main_table = scraper.tables["t1"]
+    t2 = scraper.tables["t2"]
+    cards = {
+        "type": "baccarat.cardDealt",
+        "args": {
+            "gameId": "1893f6c85c2f25513736ba30",
+            "gameData": {"playerHand": {"cards": ["6D"]}, "bankerHand": {"cards": ["4D"]}},
+        },
+    }
+    captured = []
+
+    async def fake_process(result):
+        captured.append(result)
+
+    payload = (Path(__file__).parent.parent / "ws_samples" / "baccarat_resolved.json").read_text()
+
+    async def feed():
+        await scraper._on_ws_message("wss://b", json.dumps(cards), t2)
+        await scraper._on_ws_message("wss://b", payload, t2)
+        # Same gameId on the other table is a different round
+        await scraper._on_ws_message("wss://a", payload)
+
+    scraper._process_result = fake_process
+    asyncio.get_event_loop().run_until_complete(feed())
+    assert [r["table_id"] for r in captured] == ["t2", "t1"]
+    assert captured[0]["player_cards"] == ["6D"]
+    assert captured[1]["player_cards"] == []
+    assert t2.frames == 2 and scraper.main_table.frames == 1
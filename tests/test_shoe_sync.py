@@ -0,0 +1,71 @@
+"""Tests for incremental encodedShoeState sync (src/shoe_sync.py)."""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from baccarat_strategies import BaccaratStrategies
+from src.shoe_sync import DELTA, RESYNC, UNCHANGED, ShoeHistorySync
+
+SAMPLES_DIR = Path(__file__).parent.parent / "ws_samples"
+
+
+def _shoe_history():
+    frame = json.loads((SAMPLES_DIR / "baccarat_encodedShoeState.json").read_text())
+    return frame["args"]["history_v2"]
+
+
+def test_first_snapshot_resyncs():
+    sync = ShoeHistorySync()
+    history = _shoe_history()
+    mode, rounds = sync.diff(history)
+    assert mode == RESYNC and rounds == history
+    assert sync.stats()["resyncs"] == {"initial": 1}
+
+
+def test_appended_rounds_are_a_delta():
+    sync = ShoeHistorySync()
+    history = _shoe_history()
+    sync.diff(history[:10])
+    mode, rounds = sync.diff(history[:12])
+    assert mode == DELTA and rounds == history[10:12]
+    assert sync.diff(history[:12]) == (UNCHANGED, [])
+    assert sync.stats()["deltas"] == 1 and sync.stats()["unchanged"] == 1
+
+
+def test_divergence_and_new_shoe_resync():
+    sync = ShoeHistorySync()
+    history = _shoe_history()
+    sync.diff(history[:10])
+
+    rewritten = [dict(r) for r in history]
+    rewritten[9]["winner"] = "Tie"
+    assert sync.diff(rewritten)[0] == RESYNC
+
+    assert sync.diff(history[:3])[0] == RESYNC
+    assert sync.diff(history[:4], new_shoe=True)[0] == RESYNC
+    assert sync.stats()["resyncs"] == {"initial": 1, "diverged": 1, "shrunk": 1, "new_shoe": 1}
+
+    sync.reset()
+    assert sync.diff(history[:5])[0] == RESYNC
+
+
+def test_incremental_apply_matches_full_sync():
+    history = _shoe_history()
+    sync = ShoeHistorySync()
+    incremental = BaccaratStrategies()
+    full = BaccaratStrategies()
+
+    for n in range(1, len(history) + 1):
+        snapshot = history[:n]
+        full.sync_from_shoe_history(snapshot)
+        mode, rounds = sync.diff(snapshot)
+        if mode == RESYNC:
+            incremental.sync_from_shoe_history(snapshot)
+        elif mode == DELTA:
+            incremental.extend_from_shoe_history(rounds)
+        assert list(incremental.history) == list(full.history)
+
+    assert sync.stats()["resyncs_total"] == 1
@@ -0,0 +1,78 @@
+"""Tests for the per-strategy accuracy ledger (src/strategy_ledger.py)."""
+
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.queries import RESOLVE_ROUND, RESOLVE_VOTES
+from src.strategy_ledger import StrategyLedger, accuracy_rows, shoe_phase
+
+
+def test_shoe_phase_by_cards_dealt():
+    assert shoe_phase(None) is None
+    assert shoe_phase(0) is None
+    assert shoe_phase(100) == "early"
+    assert shoe_phase(146) == "middle"
+    assert shoe_phase(291) == "middle"
+    assert shoe_phase(292) == "late"
+
+
+def test_totals_ties_and_phases():
+    ledger = StrategyLedger()
+    ledger.apply("memory", True, "Banker", shoe_cards_out=40)
+    ledger.apply("memory", False, "Tie", shoe_cards_out=200)
+    ledger.apply("memory", True, "Player", shoe_cards_out=None)
+    ledger.apply("tie_bet", True, "Tie")
+
+    rows = {r["strategy"]: r for r in ledger.accuracy(min_votes=1)}
+    row = rows["memory"]
+    assert (row["total"], row["correct"], row["ties"], row["tie_correct"]) == (3, 2, 1, 0)
+    assert (rows["tie_bet"]["ties"], rows["tie_bet"]["tie_correct"]) == (1, 1)
+    assert row["accuracy"] == 66.67
+    assert row["phases"]["early"] == {"total": 1, "correct": 1, "accuracy": 100.0}
+    assert row["phases"]["middle"] == {"total": 1, "correct": 0, "accuracy": 0}
+    assert row["phases"]["late"]["total"] == 0
+
+
+def test_recent_window_keeps_last_votes():
+    ledger = StrategyLedger(window=4)
+    for was_correct in [False, False, True, True, True, False]:
+        ledger.apply("streak", was_correct, "Banker")
+
+    [row] = ledger.accuracy(min_votes=1)
+    assert ledger.rows["streak"]["recent"] == "1110"
+    assert (row["recent_total"], row["recent_correct"]) == (4, 3)
+    assert row["recent_accuracy"] == 75.0
+    assert row["total"] == 6
+
+
+def test_accuracy_order_and_min_votes():
+    ledger = StrategyLedger()
+    for _ in range(5):
+        ledger.apply("good", True, "Banker")
+        ledger.apply("bad", False, "Banker")
+    ledger.apply("new", True, "Banker")
+
+    rows = ledger.accuracy(min_votes=5)
+    assert [r["strategy"] for r in rows] == ["good", "bad"]
+
+
+def test_accuracy_rows_from_database_rows():
+    [row] = accuracy_rows([{
+        "strategy_name": "memory", "total": 10, "correct": 6, "ties": 1, "tie_correct": 1,
+        "recent": "",
+        "early_total": 4, "early_correct": 3, "middle_total": 0, "middle_correct": 0,
+        "late_total": 6, "late_correct": 3,
+    }])
+    assert row["accuracy"] == 60.0
+    assert row["recent_total"] == 0 and row["recent_accuracy"] == 0
+    assert row["phases"]["early"]["accuracy"] == 75.0
+
+
+def test_ledger_updated_in_the_resolving_statement():
+    for sql, last_param in ((RESOLVE_ROUND, 20), (RESOLVE_VOTES, 4)):
+        assert "INSERT INTO strategy_accuracy" in sql
+        assert sql.index("UPDATE strategy_votes") < sql.index("INSERT INTO strategy_accuracy")
+        assert max(int(n) for n in re.findall(r"\$(\d+)", sql)) == last_param
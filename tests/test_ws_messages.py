@@ -0,0 +1,111 @@
+"""Tests for the typed baccarat.* decoders (src/ws_messages.py)."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import ws_messages
+from src.ws_messages import (
+    CardDealt,
+    EncodedShoeState,
+    NewGame,
+    Resolved,
+    Roads,
+    decode,
+    decode_frame,
+)
+
+SAMPLES_DIR = Path(__file__).parent.parent / "ws_samples"
+
+
+def _sample(name):
+    return (SAMPLES_DIR / f"{name}.json").read_text()
+
+
+@pytest.fixture(params=list(ws_messages.JSON_BACKENDS))
+def backend(request):
+    active = ws_messages.JSON_BACKEND
+    ws_messages.set_json_backend(request.param)
+    yield request.param
+    ws_messages.set_json_backend(active)
+
+
+def test_resolved(backend):
+    msg = decode(_sample("baccarat_resolved"))
+    assert isinstance(msg, Resolved)
+    assert msg.game_id == "1893f6c85c2f25513736ba30"
+    assert msg.winner == "Banker"
+    assert (msg.player_score, msg.banker_score) == (4, 7)
+    assert msg.player_pair is True and msg.banker_pair is False
+    assert msg.winning_spots == ["EitherPair", "PlayerPair", "Banker", "Big"]
+    assert msg.with_lightning is False
+
+
+def test_new_game_and_shoe_state(backend):
+    msg = decode(_sample("baccarat_newGame"))
+    assert isinstance(msg, NewGame)
+    assert (msg.game_number, msg.shoe_cards_out) == ("00:54:22", 104)
+
+    shoe = decode(_sample("baccarat_encodedShoeState"))
+    assert isinstance(shoe, EncodedShoeState)
+    assert (shoe.game_count, shoe.player_wins, shoe.banker_wins) == (17, 8, 9)
+    assert len(shoe.history) == 17
+    assert shoe.table_id == "XXXtremeLB000001"
+
+
+def test_card_dealt_missing_fields_default():
+    msg = decode_frame({"type": "baccarat.cardDealt", "args": {"gameData": None}})
+    assert isinstance(msg, CardDealt)
+    assert msg.player_cards == [] and msg.banker_cards == []
+    assert msg.player_score is None
+
+
+def test_roads_and_game_history():
+    roads = decode_frame({"type": "baccarat.roads", "args": {"bigRoad": [1]}})
+    history = decode_frame({"type": "baccarat.gameHistory", "args": {"roads": {"bigRoad": [2]}}})
+    assert isinstance(roads, Roads) and roads.roads == {"bigRoad": [1]}
+    assert history.roads == {"bigRoad": [2]}
+
+
+def test_unhandled_frames():
+    assert decode(_sample("baccarat_tableState")) is None
+    assert decode('{"type": "chat.message", "args": {}}') is None
+
+
+@pytest.mark.parametrize("payload", [
+    '{"type": "baccarat.resolved", "args": ',
+    b'{"type": "baccarat.resolved", "args": {]}',
+    b'{"type": "baccarat.resolved", "args": "\xff"}',
+])
+def test_malformed_frames_counted_by_every_backend(backend, payload):
+    errors = ws_messages.decode_stats.errors
+    assert decode(payload) is None
+    assert ws_messages.decode_stats.errors == errors + 1
+
+
+def test_same_payload_decoded_once():
+    payload = json.dumps({"type": "baccarat.gameWinners", "args": {"totalWinners": 3}})
+    first = decode(payload)
+    hits = ws_messages.decode_stats.cache_hits
+    assert decode(payload) is first
+    assert ws_messages.decode_stats.cache_hits == hits + 1
+    assert first.total_winners == 3
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        ws_messages.set_json_backend("simdjson")
+
+
+def test_src_modules_share_one_decoder():
+    from src import game_round, ingest_queue, scraper, table_state, ws_protocol
+
+    for name in ("ws_messages", "ws_protocol", "game_round"):
+        assert name not in sys.modules
+    assert scraper.decode is decode
+    assert ingest_queue.sniff_type is ws_protocol.sniff_type
+    assert table_state.RoundAssembler is game_round.RoundAssembler
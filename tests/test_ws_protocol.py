@@ -0,0 +1,75 @@
+"""Tests for the Evolution WebSocket protocol helpers (src/ws_protocol.py)."""
+
+import json
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ws_protocol import extract_json_object, sniff_type
+
+SAMPLES_DIR = Path(__file__).parent.parent / "ws_samples"
+
+
+class TestSniffType:
+    def test_sample_frames(self):
+        for path in SAMPLES_DIR.glob("*.json"):
+            payload = json.dumps(json.loads(path.read_text()))
+            assert sniff_type(payload) == json.loads(payload)["type"]
+
+    def test_pretty_printed_frame(self):
+        payload = (SAMPLES_DIR / "baccarat_newGame.json").read_text()
+        assert sniff_type(payload) == "baccarat.newGame"
+
+    def test_bytes_payload(self):
+        assert sniff_type(b'{"id":"1","type":"chat.message","args":{}}') == "chat.message"
+
+    def test_no_type_field(self):
+        assert sniff_type('{"data": {"winner": "PLAYER"}}') is None
+        assert sniff_type("") is None
+        assert sniff_type(None) is None
+
+    def test_type_beyond_head_is_ignored(self):
+        payload = '{"args": "' + "x" * 400 + '", "type": "baccarat.resolved"}'
+        assert sniff_type(payload) is None
+
+    def test_malformed_type_value(self):
+        assert sniff_type('{"type": 5}') is None
+        assert sniff_type('{"type" "x"}') is None
+        assert sniff_type('{"type": "unterminated') is None
+
+
+class TestExtractJsonObject:
+    def test_matches_greedy_regex(self):
+        for data in [
+            'prefix {"a": {"b": 1}} suffix',
+            '42["msg", {"x": 1}]',
+            "no braces here",
+            "} backwards {",
+        ]:
+            match = re.search(r"\{.*\}", data, re.DOTALL)
+            assert extract_json_object(data) == (match.group() if match else None)
+
+
+def test_sniff_field():
+    from src.ws_protocol import sniff_field
+
+    payload = (SAMPLES_DIR / "baccarat_resolved.json").read_text()
+    assert sniff_field(payload, "id") == "1771030456594-1618"
+    assert sniff_field(payload, "gameId") == "1893f6c85c2f25513736ba30"
+    assert sniff_field(payload, "tableId") is None  # beyond the sniffed head
+
+
+def test_sniff_field_top_level_skips_nested_keys():
+    from src.ws_protocol import sniff_field
+
+    payload = '{"args": {"id": "inner", "note": "\\"id\\": \\"quoted\\""}, "id": "outer"}'
+    assert sniff_field(payload, "id") == "inner"
+    assert sniff_field(payload, "id", top_level=True) == "outer"
+    assert sniff_field(payload.encode(), "id", top_level=True) == "outer"
+
+    # Top-level key past the sniffed head: read from the decoded frame
+    padded = json.dumps({"args": {"id": "inner", "pad": "x" * 300}, "id": "outer"})
+    assert sniff_field(padded, "id", top_level=True) == "outer"
+    assert sniff_field('{"args": {"id": "inner"}}', "id", top_level=True) is None